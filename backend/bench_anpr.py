@@ -0,0 +1,359 @@
+"""
+Offline ANPR benchmark: runs the /detect pipeline over a labeled corpus.
+
+Usage (from the backend directory):
+    python bench_anpr.py corpus/ --workers 1 2 4 --output bench.json
+    python bench_anpr.py corpus/ --video-stride 10 --repeat 3
+
+The corpus is a directory of images and/or videos. Each file's plate label comes
+from `labels.json` ({"filename": "ABC1234"}) or `labels.csv` (filename,plate) in that
+directory, or else from the file name up to the first "_" (ABC1234_front.jpg).
+Videos are sampled every --video-stride frames and re-encoded as JPEG so the decode
+stage is measured like an upload.
+
+MongoDB is replaced by an in-memory stand-in seeded with every label as an ACTIVE
+vehicle (no owners, so no SMS is sent), captures and the log outbox go to a temporary
+directory and the gate cooldown and OCR cache are disabled so repeated plates are
+fully processed.
+
+Reports, and writes as JSON for comparing runs:
+  - per-stage latency percentiles from the response timings (decode, YOLO,
+    preprocessing, each OCR pass, DB decision, total) at the first worker count,
+  - throughput (frames/s) at each --workers count,
+  - peak RSS, and plate accuracy / character error rate (CER).
+"""
+
+import argparse
+import csv
+import json
+import os
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+import cv2
+
+IMAGE_EXTENSIONS = {".jpg", ".jpeg", ".png", ".bmp", ".webp"}
+VIDEO_EXTENSIONS = {".mp4", ".avi", ".mov", ".mkv"}
+
+# --- In-memory MongoDB stand-in -------------------------------------------------
+
+def _matches(doc: dict, query: dict) -> bool:
+    for field, condition in query.items():
+        if field == "$or":
+            if not any(_matches(doc, sub) for sub in condition):
+                return False
+            continue
+        value = doc.get(field)
+        if isinstance(condition, dict) and any(k.startswith("$") for k in condition):
+            for op, operand in condition.items():
+                if op == "$in" and value not in operand:
+                    return False
+                if op == "$ne" and value == operand:
+                    return False
+                if op in ("$lt", "$lte", "$gt", "$gte"):
+                    if value is None:
+                        return False
+                    if op == "$lt" and not value < operand:
+                        return False
+                    if op == "$lte" and not value <= operand:
+                        return False
+                    if op == "$gt" and not value > operand:
+                        return False
+                    if op == "$gte" and not value >= operand:
+                        return False
+        elif value != condition:
+            return False
+    return True
+
+def _project(doc: dict, projection):
+    if not projection:
+        return dict(doc)
+    kept = {k: v for k, v in doc.items() if projection.get(k)}
+    kept["_id"] = doc["_id"]
+    return kept
+
+class InMemoryCursor(list):
+    def sort(self, key, direction=1):
+        super().sort(key=lambda d: (d.get(key) is not None, d.get(key)), reverse=direction < 0)
+        return self
+
+    def skip(self, count):
+        return InMemoryCursor(self[count:])
+
+    def limit(self, count):
+        return InMemoryCursor(self[:count] if count else self)
+
+class InMemoryCollection:
+    """The subset of pymongo's Collection API the detection path uses."""
+
+    def __init__(self, name: str):
+        from bson import ObjectId
+        self._new_id = ObjectId
+        self.name = name
+        self.docs = []
+
+    def find(self, query=None, projection=None):
+        return InMemoryCursor(_project(d, projection) for d in self.docs if _matches(d, query or {}))
+
+    def find_one(self, query=None, projection=None, sort=None):
+        cursor = self.find(query, projection)
+        for key, direction in sort or []:
+            cursor = cursor.sort(key, direction)
+        return cursor[0] if cursor else None
+
+    def insert_one(self, doc):
+        from pymongo.results import InsertOneResult
+        doc.setdefault("_id", self._new_id())
+        self.docs.append(doc)
+        return InsertOneResult(doc["_id"], acknowledged=True)
+
+    def insert_many(self, docs, ordered=True):
+        from pymongo.results import InsertManyResult
+        return InsertManyResult([self.insert_one(doc).inserted_id for doc in docs], acknowledged=True)
+
+    def update_one(self, query, update, upsert=False):
+        for doc in self.docs:
+            if _matches(doc, query):
+                doc.update(update.get("$set", {}))
+                return
+        if upsert:
+            self.insert_one({**{k: v for k, v in query.items() if not isinstance(v, dict)}, **update.get("$set", {})})
+
+    def count_documents(self, query):
+        return len(self.find(query))
+
+    def create_index(self, *args, **kwargs):
+        return kwargs.get("name", "index")
+
+def install_memory_db(plates):
+    """Point mongo_client's collections at in-memory stand-ins seeded with `plates`."""
+    import mongo_client
+    from utils.plates import normalize_plate
+
+    for attr in ("users_collection", "vehicles_collection", "access_logs_collection",
+                 "denied_logs_collection", "notifications_collection", "cameras_collection"):
+        setattr(mongo_client, attr, InMemoryCollection(attr.replace("_collection", "")))
+    for plate in sorted(set(plates)):
+        mongo_client.vehicles_collection.insert_one({
+            "plate_number": plate,
+            "plate_key": normalize_plate(plate),
+            "status": "ACTIVE",
+            "model": "Benchmark",
+            "updated_at": datetime.utcnow(),
+        })
+
+# --- Corpus ---------------------------------------------------------------------
+
+def _load_labels(directory: str) -> dict:
+    labels = {}
+    json_path = os.path.join(directory, "labels.json")
+    csv_path = os.path.join(directory, "labels.csv")
+    if os.path.exists(json_path):
+        with open(json_path) as f:
+            labels.update(json.load(f))
+    if os.path.exists(csv_path):
+        with open(csv_path, newline="") as f:
+            for row in csv.reader(f):
+                if len(row) >= 2 and row[0] != "filename":
+                    labels[row[0]] = row[1]
+    return labels
+
+def load_corpus(directory: str, video_stride: int):
+    """[(sample name, normalized label, encoded image bytes), ...]"""
+    from utils.plates import normalize_plate
+
+    labels = _load_labels(directory)
+    samples = []
+    for filename in sorted(os.listdir(directory)):
+        path = os.path.join(directory, filename)
+        ext = os.path.splitext(filename)[1].lower()
+        label = normalize_plate(labels.get(filename) or os.path.splitext(filename)[0].split("_")[0])
+        if ext in IMAGE_EXTENSIONS:
+            with open(path, "rb") as f:
+                samples.append((filename, label, f.read()))
+        elif ext in VIDEO_EXTENSIONS:
+            cap = cv2.VideoCapture(path)
+            index = 0
+            while True:
+                ok, frame = cap.read()
+                if not ok:
+                    break
+                if index % video_stride == 0:
+                    encoded = cv2.imencode(".jpg", frame, [cv2.IMWRITE_JPEG_QUALITY, 90])[1].tobytes()
+                    samples.append((f"{filename}#{index}", label, encoded))
+                index += 1
+            cap.release()
+    return samples
+
+# --- Metrics --------------------------------------------------------------------
+
+def _percentile(sorted_values, pct: float):
+    if not sorted_values:
+        return None
+    index = min(len(sorted_values) - 1, max(0, int(round(pct / 100 * len(sorted_values))) - 1))
+    return round(sorted_values[index], 2)
+
+def _edit_distance(a: str, b: str) -> int:
+    previous = list(range(len(b) + 1))
+    for i, ca in enumerate(a, 1):
+        current = [i]
+        for j, cb in enumerate(b, 1):
+            current.append(min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + (ca != cb)))
+        previous = current
+    return previous[-1]
+
+def _peak_rss_mb():
+    try:
+        import resource
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        # KiB on Linux, bytes on macOS
+        return round(peak / (1024 * 1024 if sys.platform == "darwin" else 1024), 1)
+    except ImportError:
+        try:
+            import psutil
+            return round(psutil.Process().memory_info().peak_wset / (1024 * 1024), 1)
+        except Exception:
+            return None
+
+def stage_percentiles(results) -> dict:
+    stages = {}
+    for result in results:
+        for stage, value in result.get("timings", {}).items():
+            if stage.endswith("_ms") and isinstance(value, (int, float)):
+                stages.setdefault(stage, []).append(value)
+    report = {}
+    for stage, values in sorted(stages.items()):
+        values.sort()
+        report[stage] = {
+            "count": len(values),
+            "mean": round(sum(values) / len(values), 2),
+            "p50": _percentile(values, 50),
+            "p90": _percentile(values, 90),
+            "p99": _percentile(values, 99),
+            "max": round(values[-1], 2),
+        }
+    return report
+
+def accuracy(samples, results) -> dict:
+    exact = detected = edits = characters = 0
+    misreads = []
+    for (name, label, _), result in zip(samples, results):
+        predicted = result.get("plate_number") or ""
+        predicted = predicted if result.get("detected") and predicted not in ("Not Detected", "OCR Error") else ""
+        detected += bool(predicted)
+        exact += predicted == label
+        edits += _edit_distance(predicted, label)
+        characters += len(label)
+        if predicted != label:
+            misreads.append({"sample": name, "label": label, "predicted": predicted})
+    total = len(samples)
+    return {
+        "samples": total,
+        "detected_rate": round(detected / total, 4) if total else 0.0,
+        "plate_accuracy": round(exact / total, 4) if total else 0.0,
+        "cer": round(edits / characters, 4) if characters else 0.0,
+        "misreads": misreads,
+    }
+
+# --- Runner ---------------------------------------------------------------------
+
+def _run_one(process, contents):
+    try:
+        return process(contents)
+    except Exception as e:
+        return {"detected": False, "error": str(getattr(e, "detail", e)), "timings": {}}
+
+def run_pass(process, samples, workers: int):
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="bench") as executor:
+        results = list(executor.map(lambda s: _run_one(process, s[2]), samples))
+    return results, time.perf_counter() - start
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the ANPR pipeline over a labeled corpus.")
+    parser.add_argument("corpus", help="directory of labeled images and/or videos")
+    parser.add_argument("--workers", type=int, nargs="+", default=[1], help="concurrency levels to measure")
+    parser.add_argument("--repeat", type=int, default=1, help="passes over the corpus per concurrency level")
+    parser.add_argument("--video-stride", type=int, default=5, help="use every Nth video frame")
+    parser.add_argument("--ocr-cache", action="store_true", help="keep the OCR result cache enabled")
+    parser.add_argument("--output", help="write the JSON report here (default: stdout only)")
+    args = parser.parse_args()
+
+    samples = load_corpus(args.corpus, args.video_stride)
+    if not samples:
+        raise SystemExit(f"No images or videos found in {args.corpus}")
+    install_memory_db(label for _, label, _ in samples)
+    scratch = tempfile.mkdtemp(prefix="anpr-bench-")
+    os.environ.setdefault("OUTBOX_PATH", os.path.join(scratch, "outbox.db"))
+
+    from model_registry import model_registry
+    from utils.vehicle_registry import vehicle_registry
+    from utils.capture_writer import capture_writer
+    from utils.cooldown import gate_cooldown, MemoryBackend
+    from utils.ocr_cache import ocr_cache
+    from utils.outbox import outbox
+    from endpoints.detection import _process_detection, AI_AVAILABLE
+
+    if not AI_AVAILABLE:
+        raise SystemExit("OpenCV, ultralytics and easyocr are required for the benchmark.")
+    capture_writer.root = scratch
+    gate_cooldown.backend = MemoryBackend()
+    gate_cooldown.ttl_seconds = 0
+    if not args.ocr_cache:
+        ocr_cache.max_entries = 0
+    vehicle_registry.full_load()
+    outbox.start()
+
+    load_start = time.perf_counter()
+    model_registry.load()
+    load_seconds = round(time.perf_counter() - load_start, 2)
+    _run_one(_process_detection, samples[0][2])  # warm the pipeline outside the measurements
+
+    passes = samples * max(1, args.repeat)
+    throughput = []
+    first_results = None
+    for workers in args.workers:
+        results, seconds = run_pass(_process_detection, passes, workers)
+        first_results = first_results or results
+        throughput.append({
+            "workers": workers,
+            "frames": len(passes),
+            "seconds": round(seconds, 3),
+            "fps": round(len(passes) / seconds, 2) if seconds else None,
+        })
+        print(f"workers={workers}: {len(passes)} frames in {seconds:.2f}s ({throughput[-1]['fps']} fps)")
+    capture_writer.shutdown()
+    outbox.shutdown()
+
+    report = {
+        "meta": {
+            "corpus": os.path.abspath(args.corpus),
+            "samples": len(samples),
+            "repeat": args.repeat,
+            "ocr_cache": args.ocr_cache,
+            "started": datetime.now().isoformat(),
+            "model_load_seconds": load_seconds,
+            "models": model_registry.status()["models"],
+        },
+        "stages": stage_percentiles(first_results),
+        "throughput": throughput,
+        "accuracy": accuracy(samples, first_results[:len(samples)]),
+        "peak_rss_mb": _peak_rss_mb(),
+    }
+
+    for stage, stats in report["stages"].items():
+        print(f"{stage:<20} p50 {stats['p50']:>8} | p90 {stats['p90']:>8} | p99 {stats['p99']:>8} ms")
+    acc = report["accuracy"]
+    print(f"accuracy {acc['plate_accuracy']:.1%} | CER {acc['cer']:.3f} | detected {acc['detected_rate']:.1%} "
+          f"| peak RSS {report['peak_rss_mb']} MB")
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2, default=str)
+        print(f"Report written to {args.output}")
+
+if __name__ == "__main__":
+    main()
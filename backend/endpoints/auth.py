@@ -1,10 +1,12 @@
 from fastapi import APIRouter, Depends, HTTPException, Header, UploadFile, File
+from fastapi.concurrency import run_in_threadpool
 from pydantic import BaseModel
 import os
 from dotenv import load_dotenv
 import jwt
 import bcrypt
-from mongo_client import users_collection, log_notification
+from mongo_async import users_collection, log_notification
+from utils.vehicle_registry import vehicle_registry
 from bson import ObjectId
 from datetime import datetime, timedelta
 
@@ -44,7 +46,7 @@ def create_access_token(data: dict):
     encoded_jwt = jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
     return encoded_jwt
 
-def get_current_user(authorization: str = Header(None)):
+async def get_current_user(authorization: str = Header(None)):
     if not authorization or not authorization.startswith("Bearer "):
         raise HTTPException(status_code=401, detail="Missing or invalid Authorization Header")
     
@@ -55,7 +57,7 @@ def get_current_user(authorization: str = Header(None)):
         if user_id is None:
             raise HTTPException(status_code=401, detail="Invalid token")
         
-        user = users_collection.find_one({"_id": ObjectId(user_id)})
+        user = await users_collection.find_one({"_id": ObjectId(user_id)})
         if user is None:
              raise HTTPException(status_code=401, detail="User not found")
         
@@ -69,23 +71,25 @@ def get_current_user(authorization: str = Header(None)):
         raise HTTPException(status_code=401, detail=f"Invalid Token: {str(e)}")
 
 @router.post("/signup")
-def signup(request: SignUpRequest):
-    existing_user = users_collection.find_one({"email": request.email})
+async def signup(request: SignUpRequest):
+    existing_user = await users_collection.find_one({"email": request.email})
     if existing_user:
         raise HTTPException(status_code=400, detail="Email already registered")
         
     user_dict = {
         "email": request.email,
-        "hashed_password": get_password_hash(request.password),
+        # bcrypt is deliberately slow; hash off the event loop
+        "hashed_password": await run_in_threadpool(get_password_hash, request.password),
         "name": request.name,
         "phone": request.phone,
         "role": request.role,
-        "created_at": datetime.utcnow()
+        "created_at": datetime.utcnow(),
+        "updated_at": datetime.utcnow()
     }
     
-    result = users_collection.insert_one(user_dict)
+    result = await users_collection.insert_one(user_dict)
     
-    log_notification(
+    await log_notification(
         title="New Account Created",
         message=f"{request.name} created a new {request.role} account.",
         type="user"
@@ -102,8 +106,8 @@ def signup(request: SignUpRequest):
     return {"access_token": access_token, "token_type": "bearer", "user": user_out}
 
 @router.post("/login")
-def login(request: LoginRequest):
-    user = users_collection.find_one({"email": request.email})
+async def login(request: LoginRequest):
+    user = await users_collection.find_one({"email": request.email})
     
     if not user:
         raise HTTPException(status_code=401, detail="User not found in MongoDB")
@@ -112,8 +116,8 @@ def login(request: LoginRequest):
     # Since the frontend already verified this password with Firebase Auth, 
     # we take this opportunity to sync the password into our MongoDB. 
     # This ensures that if they reset their password via Firebase, MongoDB gets updated here.
-    new_hashed_password = get_password_hash(request.password)
-    users_collection.update_one(
+    new_hashed_password = await run_in_threadpool(get_password_hash, request.password)
+    await users_collection.update_one(
         {"_id": user["_id"]}, 
         {"$set": {"hashed_password": new_hashed_password}}
     )
@@ -129,7 +133,7 @@ def login(request: LoginRequest):
     return {"access_token": access_token, "token_type": "bearer", "user": user_out}
 
 @router.get("/me")
-def read_users_me(user = Depends(get_current_user)):
+async def read_users_me(user = Depends(get_current_user)):
     return {"user": user}
 
 class UserUpdate(BaseModel):
@@ -140,7 +144,7 @@ class UserUpdate(BaseModel):
 from fastapi import Request
 
 @router.put("/update_profile")
-def update_profile(data: UserUpdate, user = Depends(get_current_user)):
+async def update_profile(data: UserUpdate, user = Depends(get_current_user)):
     try:
         update_fields = {}
         
@@ -152,9 +156,11 @@ def update_profile(data: UserUpdate, user = Depends(get_current_user)):
              update_fields["profile_url"] = data.profile_url
              
         if update_fields:
-            users_collection.update_one({"_id": ObjectId(user["id"])}, {"$set": update_fields})
+            update_fields["updated_at"] = datetime.utcnow()
+            await users_collection.update_one({"_id": ObjectId(user["id"])}, {"$set": update_fields})
+            await run_in_threadpool(vehicle_registry.invalidate_owner, user["id"])
             print(f"DEBUG: Successfully updated profile fields for {user['id']}: {list(update_fields.keys())}")
-            log_notification(
+            await log_notification(
                 title="Profile Updated",
                 message=f"{user.get('name', 'User')} updated their profile.",
                 user_id=user["id"],
@@ -171,26 +177,29 @@ def update_profile(data: UserUpdate, user = Depends(get_current_user)):
 import shutil
 import uuid
 
+def _save_upload(source, filepath: str):
+    with open(filepath, "wb") as buffer:
+        shutil.copyfileobj(source, buffer)
+
 @router.post("/upload_profile_picture")
-def upload_profile_picture(file: UploadFile = File(...), user = Depends(get_current_user)):
+async def upload_profile_picture(file: UploadFile = File(...), user = Depends(get_current_user)):
     try:
         # Generate unique filename to avoid caching issues
         ext = file.filename.split('.')[-1] if '.' in file.filename else 'jpg'
         filename = f"{user['id']}_{uuid.uuid4().hex}.{ext}"
         filepath = os.path.join("static", "profiles", filename)
         
-        # Save file to disk locally
-        with open(filepath, "wb") as buffer:
-            shutil.copyfileobj(file.file, buffer)
+        # Save file to disk locally (off the event loop)
+        await run_in_threadpool(_save_upload, file.file, filepath)
             
         # Update MongoDB with the new URL hosted by our static endpoint
         # For this prototype we're using localhost:8000, 
         # in production you would use request.base_url or an S3 bucket
         url = f"http://localhost:8000/static/profiles/{filename}"
         
-        users_collection.update_one({"_id": ObjectId(user["id"])}, {"$set": {"profile_url": url}})
+        await users_collection.update_one({"_id": ObjectId(user["id"])}, {"$set": {"profile_url": url}})
         
-        log_notification(
+        await log_notification(
             title="Profile Picture Updated",
             message=f"{user.get('name', 'User')} updated their profile picture.",
             user_id=user["id"],
@@ -203,11 +212,11 @@ def upload_profile_picture(file: UploadFile = File(...), user = Depends(get_curr
         raise HTTPException(status_code=400, detail=str(e))
 
 @router.get("/users")
-def get_all_users(user = Depends(get_current_user)):
+async def get_all_users(user = Depends(get_current_user)):
     try:
         users_cursor = users_collection.find({})
         users = []
-        for u in users_cursor:
+        async for u in users_cursor:
             u["id"] = str(u["_id"])
             del u["_id"]
             if "hashed_password" in u:
@@ -222,7 +231,7 @@ class AdminUserUpdate(BaseModel):
     role: str = None
 
 @router.put("/users/{user_id}")
-def admin_update_user(user_id: str, update_data: AdminUserUpdate, user = Depends(get_current_user)):
+async def admin_update_user(user_id: str, update_data: AdminUserUpdate, user = Depends(get_current_user)):
     try:
         update_fields = {}
         if update_data.name is not None:
@@ -231,12 +240,14 @@ def admin_update_user(user_id: str, update_data: AdminUserUpdate, user = Depends
              update_fields["role"] = update_data.role
              
         if update_fields:
-            users_collection.update_one({"_id": ObjectId(user_id)}, {"$set": update_fields})
+            update_fields["updated_at"] = datetime.utcnow()
+            await users_collection.update_one({"_id": ObjectId(user_id)}, {"$set": update_fields})
+            await run_in_threadpool(vehicle_registry.invalidate_owner, user_id)
             
-            user_doc = users_collection.find_one({"_id": ObjectId(user_id)})
+            user_doc = await users_collection.find_one({"_id": ObjectId(user_id)})
             user_name = user_doc.get("name") if user_doc else "A user"
             
-            log_notification(
+            await log_notification(
                 title="Account Status Changed",
                 message=f"Admin updated {user_name}'s account details.",
                 user_id=user_id,
@@ -248,14 +259,15 @@ def admin_update_user(user_id: str, update_data: AdminUserUpdate, user = Depends
         raise HTTPException(status_code=400, detail=str(e))
 
 @router.delete("/users/{user_id}")
-def admin_delete_user(user_id: str, user = Depends(get_current_user)):
+async def admin_delete_user(user_id: str, user = Depends(get_current_user)):
     try:
-        user_doc = users_collection.find_one({"_id": ObjectId(user_id)})
+        user_doc = await users_collection.find_one({"_id": ObjectId(user_id)})
         user_name = user_doc.get("name") if user_doc else "A user"
         
-        users_collection.delete_one({"_id": ObjectId(user_id)})
+        await users_collection.delete_one({"_id": ObjectId(user_id)})
+        await run_in_threadpool(vehicle_registry.invalidate_owner, user_id)
         
-        log_notification(
+        await log_notification(
             title="Account Deleted",
             message=f"Admin deleted {user_name}'s account.",
             type="alert"
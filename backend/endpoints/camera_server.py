@@ -12,6 +12,9 @@ import time
 from datetime import datetime
 import os
 import json
+from model_registry import model_registry
+from utils.motion import MotionScheduler
+from utils.metrics import register_camera
 
 router = APIRouter()
 
@@ -21,6 +24,7 @@ class CameraManager:
         self.cameras = {}  # camera_id -> camera config
         self.scanning_threads = {}  # camera_id -> thread
         self.latest_results = {}  # camera_id -> latest detection
+        self.schedulers = {}  # camera_id -> MotionScheduler
         self.is_running = False
         self.lock = threading.Lock()
     
@@ -35,6 +39,7 @@ class CameraManager:
                 "last_detection": None,
                 "is_streaming": False
             }
+        register_camera(camera_id)
     
     def start_scanning(self, camera_id: str):
         """Start continuous scanning for a camera"""
@@ -64,7 +69,7 @@ class CameraManager:
     
     def _scan_camera_loop(self, camera_id: str):
         """Continuous scanning loop for a camera"""
-        from detection import detect_vehicle
+        from endpoints.detection import process_frame
         
         cap = None
         try:
@@ -76,6 +81,8 @@ class CameraManager:
                 return
             
             print(f"[CAMERA] Opened {camera_id} - scanning started")
+            scheduler = MotionScheduler(camera_id)
+            self.schedulers[camera_id] = scheduler
             
             while self.cameras[camera_id]["active"]:
                 ret, frame = cap.read()
@@ -90,29 +97,26 @@ class CameraManager:
                 # Resize for faster processing
                 frame = cv2.resize(frame, (640, 480))
                 
-                # Run detection every 30 frames (throttle)
-                if self.cameras[camera_id]["frame_count"] % 30 == 0:
+                # Run detection when the motion scheduler asks for it, once the shared models are warm
+                run_detection, reason = scheduler.should_detect(frame)
+                if run_detection:
                     try:
-                        # Encode frame to JPEG
-                        _, jpg_buffer = cv2.imencode('.jpg', frame)
-                        jpg_bytes = jpg_buffer.tobytes()
-                        
-                        # Create file-like object
-                        from io import BytesIO
-                        file_obj = BytesIO(jpg_bytes)
-                        
-                        # Mock UploadFile for detection
-                        class MockFile:
-                            async def read(self):
-                                return jpg_bytes
-                        
-                        # Run detection (you'll need to adapt this call)
-                        # For now, just save latest frame
-                        self.latest_results[camera_id] = {
-                            "timestamp": datetime.now().isoformat(),
-                            "frame_id": self.cameras[camera_id]["frame_count"],
-                            "status": "scanning"
-                        }
+                        if not model_registry.ready:
+                            self.latest_results[camera_id] = {
+                                "timestamp": datetime.now().isoformat(),
+                                "frame_id": self.cameras[camera_id]["frame_count"],
+                                "status": "models_loading"
+                            }
+                        else:
+                            result = process_frame(frame, camera_id=camera_id)
+                            result["timestamp"] = datetime.now().isoformat()
+                            result["frame_id"] = self.cameras[camera_id]["frame_count"]
+                            result["trigger"] = reason
+                            self.latest_results[camera_id] = result
+                            scheduler.report_vehicle(result.get("detected", False))
+                            if result.get("detected") and result.get("image_url"):
+                                with self.lock:
+                                    self.cameras[camera_id]["last_detection"] = result["timestamp"]
                         
                     except Exception as e:
                         print(f"[ERROR] Detection failed for {camera_id}: {e}")
@@ -214,7 +218,8 @@ async def get_camera_status(camera_id: str):
             "active": cam["active"],
             "frame_count": cam["frame_count"],
             "last_detection": cam["last_detection"],
-            "scanning": cam["active"]
+            "scanning": cam["active"],
+            "scheduler": camera_manager.schedulers[camera_id].stats() if camera_id in camera_manager.schedulers else None
         }
 
 @router.post("/cameras/add")
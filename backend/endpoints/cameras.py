@@ -1,7 +1,8 @@
 from fastapi import APIRouter, HTTPException, Depends
 from typing import Optional
 from .auth import get_current_user
-from mongo_client import cameras_collection
+from mongo_async import cameras_collection
+from utils.metrics import register_camera
 from pydantic import BaseModel
 from bson import ObjectId
 
@@ -14,13 +15,15 @@ class CameraModel(BaseModel):
 router = APIRouter()
 
 @router.get("")
-def get_all_cameras(user = Depends(get_current_user)):
+async def get_all_cameras(user = Depends(get_current_user)):
     """Get all camera feeds configured in the system"""
     try:
         cursor = cameras_collection.find().sort("id", 1)
         cameras = []
-        for c in cursor:
+        async for c in cursor:
             c["_id"] = str(c["_id"])
+            if "id" in c:
+                register_camera(c["id"])
             cameras.append(c)
             
         # If no cameras exist, initialize the default one since it's hardcoded currently
@@ -32,8 +35,9 @@ def get_all_cameras(user = Depends(get_current_user)):
                 "location": "Entrance A",
                 "url": "https://images.unsplash.com/photo-1563630423918-b58f07336ac9?q=80&w=800&auto=format&fit=crop"
             }
-            inserted = cameras_collection.insert_one(default_camera)
+            inserted = await cameras_collection.insert_one(default_camera)
             default_camera["_id"] = str(inserted.inserted_id)
+            register_camera(default_camera["id"])
             cameras.append(default_camera)
             
         return cameras
@@ -41,10 +45,10 @@ def get_all_cameras(user = Depends(get_current_user)):
         raise HTTPException(status_code=400, detail=str(e))
 
 @router.post("")
-def add_camera(camera: CameraModel, user = Depends(get_current_user)):
+async def add_camera(camera: CameraModel, user = Depends(get_current_user)):
     try:
         # Determine the next int ID (although MongoDB uses _id, the frontend currently expects 'id')
-        highest_cam = cameras_collection.find_one(sort=[("id", -1)])
+        highest_cam = await cameras_collection.find_one(sort=[("id", -1)])
         next_id = 1
         if highest_cam and "id" in highest_cam:
             next_id = highest_cam["id"] + 1
@@ -57,16 +61,17 @@ def add_camera(camera: CameraModel, user = Depends(get_current_user)):
             "status": camera.status
         }
         
-        result = cameras_collection.insert_one(new_camera)
+        result = await cameras_collection.insert_one(new_camera)
         new_camera["_id"] = str(result.inserted_id)
+        register_camera(next_id)
         return new_camera
     except Exception as e:
         raise HTTPException(status_code=400, detail=str(e))
 
 @router.delete("/{camera_id}")
-def delete_camera(camera_id: str, user = Depends(get_current_user)):
+async def delete_camera(camera_id: str, user = Depends(get_current_user)):
     try:
-        result = cameras_collection.delete_one({"_id": ObjectId(camera_id)})
+        result = await cameras_collection.delete_one({"_id": ObjectId(camera_id)})
         if result.deleted_count == 0:
             raise HTTPException(status_code=404, detail="Camera not found")
         return {"status": "success"}
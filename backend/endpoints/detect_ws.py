@@ -0,0 +1,128 @@
+"""
+WebSocket frame ingest for the browser scanner and edge devices.
+
+Instead of one multipart POST to /detect per frame, a scanner keeps one socket open
+to /detect/ws and sends binary messages:
+
+    [2-byte big-endian header length][UTF-8 JSON header][image bytes]
+
+The header carries at least {"camera_id": "...", "seq": 123}; it may also set
+"kind", "width" and "height" exactly like the /detect form fields. Each processed
+frame is answered on the same socket with a JSON message
+{"type": "result", "camera_id", "seq", "dropped", "latency_ms", ...detection result}.
+
+Backpressure: frames are not queued. Each socket holds only its newest unprocessed
+frame; a frame arriving while the previous one still waits replaces it (the stale
+frame is dropped and counted), so a scanner that sends faster than inference keeps
+up always gets an answer for its most recent view of the gate.
+"""
+
+import asyncio
+import json
+import time
+
+from fastapi import APIRouter, WebSocket, WebSocketDisconnect
+
+from endpoints.detection import _process_detection, AI_AVAILABLE, UPLOAD_KINDS
+from utils.inference_pool import inference_pool, InferencePoolFull, InferenceError
+from utils.metrics import count_frame
+
+router = APIRouter()
+
+class FrameDecodeError(ValueError):
+    pass
+
+def parse_frame(message: bytes, default_camera_id: str):
+    """Split a binary message into (header dict, image bytes)."""
+    if len(message) < 2:
+        raise FrameDecodeError("Frame too short")
+    header_length = int.from_bytes(message[:2], "big")
+    try:
+        header = json.loads(message[2:2 + header_length] or b"{}")
+    except ValueError as e:
+        raise FrameDecodeError(f"Invalid frame header: {e}")
+    if not isinstance(header, dict):
+        raise FrameDecodeError("Frame header must be a JSON object")
+    header.setdefault("camera_id", default_camera_id)
+    header.setdefault("kind", "frame")
+    if header["kind"] not in UPLOAD_KINDS:
+        raise FrameDecodeError(f"kind must be one of {', '.join(UPLOAD_KINDS)}")
+    return header, message[2 + header_length:]
+
+class LatestFrameSlot:
+    """Single-slot mailbox: `put` replaces a frame nobody has taken yet."""
+
+    def __init__(self):
+        self._frame = None
+        self._event = asyncio.Event()
+        self.dropped = 0
+
+    def put(self, frame) -> bool:
+        """Store `frame`; returns True when it replaced (dropped) an untaken one."""
+        replaced = self._frame is not None
+        if replaced:
+            self.dropped += 1
+        self._frame = frame
+        self._event.set()
+        return replaced
+
+    async def take(self):
+        await self._event.wait()
+        self._event.clear()
+        frame, self._frame = self._frame, None
+        return frame
+
+async def _send_json(websocket: WebSocket, message: dict):
+    await websocket.send_text(json.dumps(message, default=str))
+
+async def _process_frames(websocket: WebSocket, slot: LatestFrameSlot):
+    while True:
+        header, image, received_at = await slot.take()
+        reply = {"camera_id": header["camera_id"], "seq": header.get("seq"), "dropped": slot.dropped}
+        try:
+            result = await inference_pool.run(
+                _process_detection, image, header["kind"], header.get("width"), header.get("height"),
+                str(header["camera_id"]))
+            reply.update(result)
+            reply["type"] = "result"
+        except InferencePoolFull:
+            reply.update({"type": "busy", "detail": "Detection is busy, frame skipped"})
+        except InferenceError as e:
+            reply.update({"type": "error", "detail": e.detail})
+        except Exception as e:
+            print(f"[WS] Error processing frame {reply['seq']} from {reply['camera_id']}: {e}")
+            reply.update({"type": "error", "detail": str(e)})
+        reply["latency_ms"] = round((time.perf_counter() - received_at) * 1000, 2)
+        await _send_json(websocket, reply)
+
+@router.websocket("/detect/ws")
+async def detect_ws(websocket: WebSocket, camera_id: str = "browser"):
+    await websocket.accept()
+    if not AI_AVAILABLE:
+        await _send_json(websocket, {"type": "error", "detail": "AI Detection modules not installed on server."})
+        await websocket.close()
+        return
+
+    slot = LatestFrameSlot()
+    worker = asyncio.create_task(_process_frames(websocket, slot))
+    try:
+        while True:
+            message = await websocket.receive()
+            if message["type"] == "websocket.disconnect":
+                raise WebSocketDisconnect(message.get("code", 1000))
+            if message.get("bytes") is None:
+                # receive_bytes() would raise on a text frame and drop the scanner
+                await _send_json(websocket, {"type": "error", "detail": "Frames must be sent as binary messages"})
+                continue
+            try:
+                header, image = parse_frame(message["bytes"], camera_id)
+            except FrameDecodeError as e:
+                await _send_json(websocket, {"type": "error", "detail": str(e)})
+                continue
+            if slot.put((header, image, time.perf_counter())):
+                count_frame(str(header["camera_id"]), "dropped")
+    except WebSocketDisconnect:
+        pass
+    finally:
+        worker.cancel()
+        print(f"[WS] Scanner {camera_id} disconnected ({slot.dropped} stale frames dropped)")
@@ -1,7 +1,18 @@
-from fastapi import APIRouter, UploadFile, File, HTTPException
+from fastapi import APIRouter, UploadFile, File, Form, HTTPException
 import os
+import re
 import time
 from datetime import datetime
+from utils.plate_localizer import localize_plates
+from utils.ocr import recognize_plates, PLATE_ALLOWLIST
+from utils.ocr_cache import ocr_cache, box_scope
+from utils.ocr_variants import choose_variant, accept_first, variant_stats
+from utils.preprocess import preprocess_pipeline
+from utils.ingest import decode_upload, UploadDecodeError
+from utils.capture_writer import capture_writer, thumbnail_url
+from utils.metrics import observe_timings, count_frame
+from utils.inference_pool import inference_pool, InferencePoolFull, InferenceError
+from utils.batcher import MicroBatcher
 
 router = APIRouter()
 
@@ -9,29 +20,235 @@ router = APIRouter()
 try:
     import numpy as np
     import cv2
-    import easyocr
-    from ultralytics import YOLO
-    
-    # Initialize EasyOCR Reader (loads into memory once)
-    reader = easyocr.Reader(['en'], gpu=False)
-    
-    # Load YOLO model
-    model = YOLO("yolov8n.pt") 
-    
-    AI_AVAILABLE = True
+    OPENCV_AVAILABLE = True
 except Exception as e:
     print(f"AI Libraries failed to load: {e}. AI features disabled.")
-    AI_AVAILABLE = False
-    reader = None
-    model = None
+    OPENCV_AVAILABLE = False
+
+# YOLO and EasyOCR are loaded once per worker by the shared model registry
+from model_registry import model_registry, YOLO_AVAILABLE, OCR_AVAILABLE
+AI_AVAILABLE = OPENCV_AVAILABLE and YOLO_AVAILABLE and OCR_AVAILABLE
+
+# Cooldown: prevents the same plate from being captured/logged multiple times. Shared with
+# the live stream (and across workers with COOLDOWN_BACKEND=sqlite|mongo), see utils/cooldown.py
+from utils.cooldown import gate_cooldown
+from utils.outbox import outbox
+
+# Fraction of the vehicle box added on each side before cropping it for OCR
+ROI_PADDING = 0.1
+# Plate-shaped regions handed to OCR per frame, best first
+MAX_PLATE_CANDIDATES = 3
+
+# YOLO micro-batching: frames from concurrent /detect calls share one model call
+YOLO_MAX_BATCH = int(os.getenv("YOLO_MAX_BATCH", "8"))
+YOLO_MAX_WAIT_MS = float(os.getenv("YOLO_MAX_WAIT_MS", "5"))
+
+yolo_batcher = MicroBatcher(
+    lambda frames: model_registry.get_yolo()(frames, verbose=False),
+    max_batch_size=YOLO_MAX_BATCH,
+    max_wait_ms=YOLO_MAX_WAIT_MS,
+    name="yolo-batcher",
+)
+
+def _elapsed_ms(start: float) -> float:
+    return round((time.perf_counter() - start) * 1000, 2)
+
+def _pad_box(box, img_w: int, img_h: int, padding: float):
+    """Grow an (x1, y1, x2, y2) box by `padding` of its size per side, clamped to the image."""
+    x1, y1, x2, y2 = box
+    pad_x = int((x2 - x1) * padding)
+    pad_y = int((y2 - y1) * padding)
+    return (
+        max(0, x1 - pad_x),
+        max(0, y1 - pad_y),
+        min(img_w, x2 + pad_x),
+        min(img_h, y2 + pad_y),
+    )
+
+def _add_timing(timings: dict, key: str, start: float):
+    """Accumulate a stage that runs once per plate candidate."""
+    timings[key] = round(timings.get(key, 0.0) + _elapsed_ms(start), 2)
+
+def _enhance_region(region, timings: dict, slot: int = 0):
+    """Grayscale + CLAHE of a BGR region; returns (gray, enhanced) in pipeline buffers."""
+    stage_start = time.perf_counter()
+    gray, enhanced = preprocess_pipeline.enhance(region, slot)
+    _add_timing(timings, "preprocess_ms", stage_start)
+    return gray, enhanced
+
+def _threshold_variant(enhanced, timings: dict, slot: int = 0):
+    """3x-upscaled, denoised adaptive threshold of the CLAHE-enhanced region."""
+    stage_start = time.perf_counter()
+    thresh = preprocess_pipeline.threshold(enhanced, slot)
+    _add_timing(timings, "preprocess_ms", stage_start)
+    return thresh
+
+# Scale of each OCR variant relative to the region, used to map boxes back
+VARIANT_SCALE = {"enhanced": 1, "threshold": 3}
+
+def _build_variant(name: str, enhanced, timings: dict, slot: int = 0):
+    return enhanced if name == "enhanced" else _threshold_variant(enhanced, timings, slot)
+
+def _clean_plate_text(text: str) -> str:
+    """Strip non-alphanumerics and collapse consecutive repeats (e.g. "77" -> "7")."""
+    clean_text = re.sub(r'[^A-Z0-9]', '', text.upper())
+    dedup_text = ""
+    for i, char in enumerate(clean_text):
+        if i == 0 or char != clean_text[i-1]:
+            dedup_text += char
+    return dedup_text
+
+def _recognize_variants(reader, candidates, prepared, pass_index: int, offset_x: int, offset_y: int, timings: dict,
+                        camera_id: str = "upload"):
+    """
+    One batched `reader.recognize` call over one variant per candidate (the
+    selector's first choice for pass 0, the fallback for pass 1).
+    Returns (plate_text, conf, boxes, variant, candidate_index) of the best read.
+    """
+    crops = [_build_variant(p["order"][pass_index], p["enhanced"], timings, slot)
+             for slot, p in enumerate(prepared)]
+    # Cached reads are only reused for the same camera and plate position (grid cell)
+    scopes = [box_scope(camera_id, (cx1 + offset_x, cy1 + offset_y, cx2 + offset_x, cy2 + offset_y))
+              for cx1, cy1, cx2, cy2 in candidates]
+
+    stage_start = time.perf_counter()
+    reads = recognize_plates(reader, crops, PLATE_ALLOWLIST, cache=ocr_cache, scopes=scopes)
+    _add_timing(timings, "ocr_recognize_ms", stage_start)
+    timings["ocr_batch_size"] = timings.get("ocr_batch_size", 0) + len(crops)
+
+    best = ("", 0.0, [], "", 0)
+    for i, (text, conf) in enumerate(reads):
+        plate = _clean_plate_text(text)
+        if conf > 0.80 and 4 <= len(plate) <= 8 and conf > best[1]:
+            cx1, cy1, cx2, cy2 = candidates[i]
+            box = (cx1 + offset_x, cy1 + offset_y, cx2 + offset_x, cy2 + offset_y)
+            best = (plate, conf, [{'box': box, 'text': plate, 'conf': conf}], prepared[i]["order"][pass_index], i)
+    return best
+
+def _recognize_candidates(roi, candidates, offset_x: int, offset_y: int, timings: dict, camera_id: str = "upload"):
+    """
+    Recognition-only OCR for localized plate candidates. Each candidate is read in
+    the variant the selector prefers for it (one batched `reader.recognize` call);
+    the other variants are only read when no first-pass read is accepted.
+    Returns (plate_text, conf, boxes) for the best candidate/variant, with the
+    candidate box in full-frame coordinates, or ("", 0.0, []).
+    """
+    reader = model_registry.get_reader()
+    prepared = []
+    for slot, (cx1, cy1, cx2, cy2) in enumerate(candidates):
+        # One buffer slot per candidate: every candidate's variants stay alive until both passes ran
+        gray, enhanced = _enhance_region(roi[cy1:cy2, cx1:cx2], timings, slot)
+        first, second, stats = choose_variant(gray)
+        prepared.append({"enhanced": enhanced, "order": (first, second), "stats": stats})
+
+    plate, conf, boxes, variant, index = _recognize_variants(reader, candidates, prepared, 0, offset_x, offset_y,
+                                                             timings, camera_id)
+    second_pass = not accept_first(plate, conf)
+    if second_pass:
+        retry = _recognize_variants(reader, candidates, prepared, 1, offset_x, offset_y, timings, camera_id)
+        if retry[1] > conf:
+            plate, conf, boxes, variant, index = retry
+
+    _record_variant(prepared[index]["order"][0], variant, second_pass, prepared[index]["stats"], timings)
+    return plate, conf, boxes
+
+def _readtext_variant(reader, ocr_img, ocr_label: str, offset_x: int, offset_y: int, timings: dict):
+    """Full EasyOCR over one variant; returns (plate_text, avg_conf, boxes) or ("", 0.0, [])."""
+    ocr_scale = VARIANT_SCALE[ocr_label]
+    stage_start = time.perf_counter()
+    ocr_results = reader.readtext(ocr_img, detail=1, 
+                                   allowlist=PLATE_ALLOWLIST,
+                                   paragraph=False,
+                                   min_size=15,
+                                   text_threshold=0.80,
+                                   low_text=0.45)
+    _add_timing(timings, f"ocr_{ocr_label}_ms", stage_start)
+    
+    valid_texts = []
+    total_conf = 0.0
+    for bbox, text, ocr_conf in ocr_results:
+        if ocr_conf > 0.80 and len(text.strip()) >= 1:
+            # Scale bbox back from the upscaled image and translate onto the full frame
+            bx1 = int(min([pt[0] for pt in bbox]) / ocr_scale) + offset_x
+            by1 = int(min([pt[1] for pt in bbox]) / ocr_scale) + offset_y
+            bx2 = int(max([pt[0] for pt in bbox]) / ocr_scale) + offset_x
+            by2 = int(max([pt[1] for pt in bbox]) / ocr_scale) + offset_y
+            valid_texts.append({'box': (bx1, by1, bx2, by2), 'text': text.upper(), 'conf': ocr_conf})
+            total_conf += ocr_conf
+    
+    if valid_texts:
+        # Sort by x-coordinate (left to right)
+        valid_texts.sort(key=lambda item: item['box'][0])
+        
+        combined_text = "".join([item['text'] for item in valid_texts])
+        dedup_text = _clean_plate_text(combined_text)
+        
+        avg_conf = total_conf / len(valid_texts)
+        
+        # Must be 4-8 characters and high confidence
+        if 4 <= len(dedup_text) <= 8:
+            return dedup_text, avg_conf, valid_texts
+    return "", 0.0, []
+
+def _ocr_plate_region(region, offset_x: int, offset_y: int, timings: dict):
+    """
+    Full EasyOCR (text detection + recognition) over a region whose plate
+    position is unknown. The selector's preferred variant is read first; the
+    other one only when that read is low-confidence or not a valid plate.
+    Returns (plate_text, avg_conf, boxes) for the better pass, with boxes translated
+    to full-frame coordinates via the region offset, or ("", 0.0, []) if neither
+    pass produced a valid 4-8 character plate.
+    """
+    reader = model_registry.get_reader()
+    gray, enhanced = _enhance_region(region, timings)
+    first, second, stats = choose_variant(gray)
+
+    best_plate, best_conf, best_boxes = _readtext_variant(
+        reader, _build_variant(first, enhanced, timings), first, offset_x, offset_y, timings)
+    variant = first if best_plate else ""
+
+    second_pass = not accept_first(best_plate, best_conf)
+    if second_pass:
+        plate, conf, boxes = _readtext_variant(
+            reader, _build_variant(second, enhanced, timings), second, offset_x, offset_y, timings)
+        if plate and conf > best_conf:
+            best_plate, best_conf, best_boxes, variant = plate, conf, boxes, second
+
+    _record_variant(first, variant, second_pass, stats, timings)
+    return best_plate, best_conf, best_boxes
+
+def _record_variant(predicted: str, winner: str, second_pass: bool, stats: dict, timings: dict):
+    timings["ocr_variant"] = winner or None
+    timings["ocr_second_pass"] = second_pass
+    variant_stats.record(predicted, winner, second_pass, stats)
+
+def _init_inference_worker():
+    """Process-pool workers do not run the app lifespan; load their models and registry here."""
+    from utils.vehicle_registry import vehicle_registry
+    model_registry.start_background_load()
+    vehicle_registry.start()
 
-# Cooldown tracker: prevents the same plate from being captured/logged multiple times
-# Key = plate_text, Value = timestamp of last successful detection
-_plate_cooldown = {}
-COOLDOWN_SECONDS = 60  # Ignore same plate for 60 seconds after first detection
+if inference_pool.kind == "process":
+    inference_pool.initializer = _init_inference_worker
+
+# Upload kinds: a camera/phone frame, or a plate crop already isolated by a smart camera
+UPLOAD_KINDS = ("frame", "plate")
 
 @router.post("/detect")
-async def detect_vehicle(file: UploadFile = File(...)):
+async def detect_vehicle(
+    file: UploadFile = File(...),
+    kind: str = Form("frame"),
+    width: int = Form(None),
+    height: int = Form(None)
+):
+    """
+    Detect a vehicle and read its plate from an uploaded image.
+    `kind="plate"` marks a pre-cropped plate (vehicle detection and plate
+    localization are skipped); `width`/`height` mark a raw 8-bit grayscale or BGR
+    buffer instead of an encoded image.
+    """
+    if kind not in UPLOAD_KINDS:
+        raise HTTPException(status_code=400, detail=f"kind must be one of {', '.join(UPLOAD_KINDS)}")
     if not AI_AVAILABLE:
          return {
             "status": "warning", 
@@ -42,21 +259,84 @@ async def detect_vehicle(file: UploadFile = File(...)):
             "vehicle_type": "Unknown"
          }
          
+    # Read image file
+    contents = await file.read()
     try:
-        # Read image file
-        contents = await file.read()
-        nparr = np.frombuffer(contents, np.uint8)
-        img = cv2.imdecode(nparr, cv2.IMREAD_COLOR)
+        # Inference, capture writing and the DB decision all block; run them on the
+        # inference pool so this worker keeps serving other requests meanwhile
+        return await inference_pool.run(_process_detection, contents, kind, width, height)
+    except InferencePoolFull as e:
+        print(f"[AI] Rejecting /detect: {e}")
+        raise HTTPException(status_code=503, detail="Detection is busy, please retry shortly")
+    except InferenceError as e:
+        raise HTTPException(status_code=e.status_code, detail=e.detail)
+
+@router.get("/detect/batch-stats")
+async def get_batch_stats():
+    """Achieved YOLO batch sizes, queue wait, OCR cache, variant-selector, capture-writer and outbox counters for /detect."""
+    return {
+        "yolo": yolo_batcher.stats(),
+        "inference_pending": inference_pool.pending,
+        "ocr_cache": ocr_cache.stats(),
+        "ocr_variants": variant_stats.stats(),
+        "captures": capture_writer.stats(),
+        "outbox": outbox.stats()
+    }
+
+def _process_detection(contents: bytes, kind: str = "frame", width: int = None, height: int = None,
+                       camera_id: str = "upload"):
+    """Synchronous /detect pipeline for an uploaded image: size-aware decode, then process_frame."""
+    timings = {}
+    request_start = time.perf_counter()
+    try:
+        stage_start = time.perf_counter()
+        img, decode_info = decode_upload(contents, width, height)
+        timings["decode_ms"] = _elapsed_ms(stage_start)
+        timings["decode"] = decode_info
+    except UploadDecodeError as e:
+        raise InferenceError(400, str(e))
+    except Exception as e:
+        print(f"Error processing image: {e}")
+        raise InferenceError(500, str(e))
+    count_frame(camera_id, "processed")
+    return process_frame(img, timings, request_start, plate_crop=(kind == "plate"), camera_id=camera_id)
+
+def process_frame(img, timings: dict = None, request_start: float = None, plate_crop: bool = False,
+                  camera_id: str = "upload"):
+    """
+    Run YOLO, plate OCR, the access decision and logging on a decoded frame.
+    With `plate_crop` the whole image is taken as the plate: YOLO and plate
+    localization are skipped. `camera_id` names the capture file.
+    Shared by /detect and the backend camera scanner; returns the /detect response dict.
+    Failures raise InferenceError, which (unlike HTTPException) survives the trip
+    back from a process-pool worker; the handlers turn it into an HTTP error.
+    """
+    try:
+        timings = {} if timings is None else timings
+        request_start = request_start or time.perf_counter()
+        model = model_registry.get_yolo()
+        reader = model_registry.get_reader()
+        if model is None and not plate_crop:
+            # ultralytics is missing or the weights failed to load: every batch would fail
+            raise InferenceError(503, "Vehicle detection model is not available")
+
+        if img.ndim == 2:
+            # Raw grayscale uploads: YOLO, the annotations and the capture expect three channels
+            img = cv2.cvtColor(img, cv2.COLOR_GRAY2BGR)
         
-        # Run YOLO inference
-        results = model(img)
+        # Run YOLO inference (micro-batched with frames from concurrent requests)
+        results = []
+        if not plate_crop:
+            stage_start = time.perf_counter()
+            results = [yolo_batcher.submit(img)]
+            timings["yolo_ms"] = _elapsed_ms(stage_start)
         
         detected = False
         vehicle_type = "Unknown"
         confidence = 0.0
         plate_text = "Not Detected"
         plate_box = None
-        best_box = None
+        vehicle_box = None
 
         # YOLOv8 COCO Classes: 2=car, 3=motorcycle, 5=bus, 7=truck
         vehicle_classes = [2, 3, 5, 7]
@@ -72,100 +352,48 @@ async def detect_vehicle(file: UploadFile = File(...)):
                     confidence = conf
                     vehicle_type = model.names[cls]
                     
-                    x1, y1, x2, y2 = map(int, box.xyxy[0])
-                    # Draw YOLO box
-                    cv2.rectangle(img, (x1, y1), (x2, y2), (255, 0, 0), 2)
-                    cv2.putText(img, f"{vehicle_type} ({conf:.2f})", (x1, y1 - 10), cv2.FONT_HERSHEY_SIMPLEX, 0.5, (255, 0, 0), 2)
+                    vehicle_box = tuple(map(int, box.xyxy[0]))
                     break
             if detected:
                 break
 
-        # --- OCR Logic with Enhanced Preprocessing ---
-        import re
+        # Restrict OCR to the vehicle region (plus padding so plates at the bumper edge
+        # are not clipped). Without a vehicle, fall back to the full frame.
+        img_h, img_w = img.shape[:2]
+        if vehicle_box:
+            roi_x1, roi_y1, roi_x2, roi_y2 = _pad_box(vehicle_box, img_w, img_h, ROI_PADDING)
+        else:
+            roi_x1, roi_y1, roi_x2, roi_y2 = 0, 0, img_w, img_h
+        # Copy so the annotations drawn on img below never leak into the OCR input
+        roi = img[roi_y1:roi_y2, roi_x1:roi_x2].copy()
+        timings["roi_pixels"] = roi.shape[0] * roi.shape[1]
+
+        if vehicle_box:
+            # Draw YOLO box
+            x1, y1, x2, y2 = vehicle_box
+            cv2.rectangle(img, (x1, y1), (x2, y2), (255, 0, 0), 2)
+            cv2.putText(img, f"{vehicle_type} ({confidence:.2f})", (x1, y1 - 10), cv2.FONT_HERSHEY_SIMPLEX, 0.5, (255, 0, 0), 2)
+
+        # --- OCR Logic: localize plate candidates, then read each small patch ---
         try:
             if reader:
-                # Step 1: Preprocess image for better OCR accuracy
-                gray = cv2.cvtColor(img, cv2.COLOR_BGR2GRAY)
-                
-                # Step 2: Apply CLAHE (Contrast Limited Adaptive Histogram Equalization) - stronger
-                clahe = cv2.createCLAHE(clipLimit=5.0, tileGridSize=(6, 6))
-                enhanced = clahe.apply(gray)
-                
-                # Step 3: Upscale 3x for superior character recognition
-                h, w = enhanced.shape
-                upscaled = cv2.resize(enhanced, (w * 3, h * 3), interpolation=cv2.INTER_CUBIC)
-                
-                # Step 4: Morphological operations to clean up noise
-                kernel = cv2.getStructuringElement(cv2.MORPH_ELLIPSE, (3, 3))
-                morphed = cv2.morphologyEx(upscaled, cv2.MORPH_CLOSE, kernel, iterations=1)
-                morphed = cv2.morphologyEx(morphed, cv2.MORPH_OPEN, kernel, iterations=1)
-                
-                # Step 5: Bilateral filter to reduce noise while keeping edges
-                filtered = cv2.bilateralFilter(morphed, 13, 20, 20)
-                
-                # Step 6: Adaptive thresholding for clean black/white text
-                thresh = cv2.adaptiveThreshold(filtered, 255, cv2.ADAPTIVE_THRESH_GAUSSIAN_C, 
-                                                cv2.THRESH_BINARY, 15, 3)
-                
-                # Step 7: Additional morphological operations on threshold
-                thresh = cv2.morphologyEx(thresh, cv2.MORPH_CLOSE, kernel, iterations=1)
+                if plate_crop:
+                    candidates = [(0, 0, roi.shape[1], roi.shape[0])]
+                else:
+                    stage_start = time.perf_counter()
+                    candidates = localize_plates(roi, MAX_PLATE_CANDIDATES)
+                    timings["localize_ms"] = _elapsed_ms(stage_start)
+                timings["plate_candidates"] = len(candidates)
 
-                # Run OCR on multiple preprocessed versions and pick best result
-                best_plate = ""
-                best_conf = 0.0
-                best_boxes = []
-                
-                # Try OCR on: enhanced grayscale and thresholded (skip raw color for accuracy)
-                ocr_inputs = [enhanced, thresh]
-                ocr_labels = ["enhanced", "threshold"]
-                
-                for ocr_img in ocr_inputs:
-                    ocr_results = reader.readtext(ocr_img, detail=1, 
-                                                   allowlist="ABCDEFGHIJKLMNOPQRSTUVWXYZ0123456789",
-                                                   paragraph=False,
-                                                   min_size=15,
-                                                   text_threshold=0.80,
-                                                   low_text=0.45)
-                    
-                    valid_texts = []
-                    total_conf = 0.0
-                    for result in ocr_results:
-                        bbox, text, ocr_conf = result
-                        if ocr_conf > 0.80 and len(text.strip()) >= 1:
-                            # Scale bbox back if using upscaled image
-                            if ocr_img is thresh or ocr_img is morphed:
-                                bbox = [
-                                    [pt[0] / 3, pt[1] / 3] for pt in bbox
-                                ]
-                            bx1 = int(min([pt[0] for pt in bbox]))
-                            by1 = int(min([pt[1] for pt in bbox]))
-                            bx2 = int(max([pt[0] for pt in bbox]))
-                            by2 = int(max([pt[1] for pt in bbox]))
-                            valid_texts.append({'box': (bx1, by1, bx2, by2), 'text': text.upper(), 'conf': ocr_conf})
-                            total_conf += ocr_conf
-                    
-                    if valid_texts:
-                        # Sort by x-coordinate (left to right)
-                        valid_texts.sort(key=lambda item: item['box'][0])
-                        
-                        # Remove duplicate consecutive characters (e.g., "77" -> "7")
-                        combined_text = "".join([item['text'] for item in valid_texts])
-                        # Remove non-alphanumeric and duplicates
-                        clean_text = re.sub(r'[^A-Z0-9]', '', combined_text).upper()
-                        
-                        # Deduplicate consecutive identical characters
-                        dedup_text = ""
-                        for i, char in enumerate(clean_text):
-                            if i == 0 or char != clean_text[i-1]:
-                                dedup_text += char
-                        
-                        avg_conf = total_conf / len(valid_texts)
-                        
-                        # Must be 4-8 characters and high confidence
-                        if 4 <= len(dedup_text) <= 8 and avg_conf > best_conf:
-                            best_plate = dedup_text
-                            best_conf = avg_conf
-                            best_boxes = valid_texts
+                best_plate, best_conf, best_boxes = "", 0.0, []
+                if candidates:
+                    # Plate boxes are known: skip text detection and recognize all patches in one batch
+                    best_plate, best_conf, best_boxes = _recognize_candidates(roi, candidates, roi_x1, roi_y1, timings, camera_id)
+                if not best_plate or len(best_plate) < 4:
+                    # Localizer found nothing plate-shaped, or nothing readable in its candidates;
+                    # let EasyOCR search the whole ROI
+                    timings["full_roi_fallback"] = True
+                    best_plate, best_conf, best_boxes = _ocr_plate_region(roi, roi_x1, roi_y1, timings)
                 
                 # Use the best result found across all preprocessing methods
                 if best_plate and len(best_plate) >= 4:
@@ -208,10 +436,9 @@ async def detect_vehicle(file: UploadFile = File(...)):
         if detected and plate_text and plate_text not in ["Not Detected", "OCR Error"] and len(plate_text) >= 4:
             
             # Check cooldown BEFORE database logic, but only apply it if it's already in the cache
-            now = time.time()
-            if plate_text in _plate_cooldown and (now - _plate_cooldown[plate_text]) < COOLDOWN_SECONDS:
-                remaining = int(COOLDOWN_SECONDS - (now - _plate_cooldown[plate_text]))
-                return {
+            remaining = int(gate_cooldown.remaining(plate_text))
+            if remaining > 0:
+                response = {
                     "status": "success",
                     "detected": True,
                     "plate_number": plate_text,
@@ -222,47 +449,33 @@ async def detect_vehicle(file: UploadFile = File(...)):
                     "vehicle_info": None,
                     "image_url": None,
                     "plate_box": plate_box,
-                    "cooldown": True
+                    "cooldown": True,
+                    "timings": timings
                 }
+                observe_timings(timings)
+                return response
             
-            os.makedirs("static/captures", exist_ok=True)
-            filename = f"capture_{int(time.time())}.jpg"
-            filepath = os.path.join("static", "captures", filename)
-            cv2.imwrite(filepath, img)
-            image_url = f"/static/captures/{filename}"
+            # Encoding and writing happen on the capture writer thread; only the URL is needed here
+            stage_start = time.perf_counter()
+            image_url = capture_writer.save(img, camera_id)
+            timings["capture_queue_ms"] = _elapsed_ms(stage_start)
             
-            from mongo_client import vehicles_collection, access_logs_collection, denied_logs_collection, users_collection, log_notification
+            from mongo_client import notification_doc
+            from utils.vehicle_registry import vehicle_registry
+            from utils.access_state import last_actions
+            from utils.outbox import new_id
+            from utils.sms import access_sms_message
             
+            stage_start = time.perf_counter()
             try:
-                # 1. Query the vehicles collection with regex
-                search_plate = plate_text.replace(" ", "").replace("-", "")
-                regex_pattern = "^" + "[\\s\\-]*".join(list(search_plate)) + "$"
-                vehicle = vehicles_collection.find_one({"plate_number": {"$regex": regex_pattern, "$options": "i"}})
-                
-                if not vehicle:
-                     loose_regex = "[\\s\\-]*".join(list(search_plate))
-                     vehicle = vehicles_collection.find_one({"plate_number": {"$regex": loose_regex, "$options": "i"}})
+                # 1. Resolve vehicle + owner from the in-memory registry (no DB round trip)
+                lookup_start = time.perf_counter()
+                vehicle, owner_phone = vehicle_registry.resolve(plate_text)
+                timings["plate_lookup_ms"] = _elapsed_ms(lookup_start)
                 
-                owner_phone = None
                 if vehicle:
-                    vehicle["id"] = str(vehicle["_id"])
-                    del vehicle["_id"]
                     vehicle_info = vehicle
                     
-                    # Always fetch owner details if owner_id exists
-                    if vehicle.get("owner_id"):
-                        from bson import ObjectId
-                        try:
-                            owner_record = users_collection.find_one({"_id": ObjectId(vehicle["owner_id"])})
-                            if owner_record:
-                                # Get all owner details
-                                vehicle_info["owner_name"] = owner_record.get("name", "Unknown")
-                                vehicle_info["owner_role"] = owner_record.get("role", "GUEST")
-                                owner_phone = owner_record.get("phone")
-                                print(f"[SMS] Owner found: {vehicle_info['owner_name']}, Phone: {owner_phone}")
-                        except Exception as owner_e:
-                            print(f"[SMS] Error fetching owner: {owner_e}")
-                    
                     # 2. Check status
                     v_status = vehicle.get("status", "").strip().upper()
                     if v_status == "ACTIVE":
@@ -276,63 +489,60 @@ async def detect_vehicle(file: UploadFile = File(...)):
                     # Vehicle not found in database
                     access_status = "DENIED (Unregistered)"
                     
-                # Action Entry/Exit Check
+                # Action Entry/Exit Check (last granted action is cached per vehicle)
                 action = "Entry"
                 if vehicle_info:
-                    last_log = access_logs_collection.find_one(
-                        {"vehicle_id": vehicle_info.get("id")},
-                        sort=[("timestamp", -1)]
-                    )
-                    if last_log and last_log.get("action") == "Entry":
+                    last_action = last_actions.get(vehicle_info.get("id"))
+                    if last_action and last_action[0] == "Entry":
                          action = "Exit"
                          
-                # 3. Log the access event
+                # 3. Queue the access log, notification and SMS together; the dispatcher writes them
+                now = datetime.now()
                 log_entry = {
+                    "_id": new_id(),
                     "plate_detected": plate_text,
                     "action": action,
                     "status": "GRANTED" if access_granted else "DENIED",
                     "gate": "Main Gate",
-                    "timestamp": datetime.now().isoformat(),
-                    "image_url": image_url
+                    "timestamp": now.isoformat(),
+                    "image_url": image_url,
+                    "thumbnail_url": thumbnail_url(image_url)
                 }
                 if vehicle_info:
                     log_entry["vehicle_id"] = vehicle_info["id"]
+                
+                notification = sms = None
+                if access_granted and owner_phone and vehicle_info:
+                    current_time_str = now.strftime("%I:%M %p")
+                    notification = notification_doc(
+                        title=f"Vehicle {action}",
+                        message=f"Your vehicle {plate_text} {action.lower()}ed at {current_time_str}.",
+                        user_id=vehicle_info.get("owner_id"),
+                        type="alert"
+                    )
+                    sms = {
+                        "phone_number": owner_phone,
+                        "message": access_sms_message(vehicle_info.get("owner_name", "Unknown"), plate_text,
+                                                      current_time_str, action)
+                    }
                     
+                outbox_start = time.perf_counter()
+                outbox.enqueue_access_event(
+                    "access_logs" if access_granted else "denied_logs", log_entry, notification, sms,
+                    last_action=(vehicle_info["id"], action, log_entry["timestamp"]) if access_granted else None)
+                timings["outbox_ms"] = _elapsed_ms(outbox_start)
+                
                 if access_granted:
-                    access_logs_collection.insert_one(log_entry)
                     # Add to cooldown ONLY if granted, so denied/misread plates can be retried immediately
-                    _plate_cooldown[plate_text] = time.time()
-                else:
-                    denied_logs_collection.insert_one(log_entry)
-                    
-                # 4. SMS Notification
-                if access_granted and owner_phone and vehicle_info:
-                    try:
-                        from utils.sms import send_access_sms
-                        owner_name = vehicle_info.get("owner_name", "Unknown")
-                        current_time_str = datetime.now().strftime("%I:%M %p")
-                        
-                        log_notification(
-                            title=f"Vehicle {action}",
-                            message=f"Your vehicle {plate_text} {action.lower()}ed at {current_time_str}.",
-                            user_id=vehicle_info.get("owner_id"),
-                            type="alert"
-                        )
-                        
-                        send_access_sms(
-                            phone_number=owner_phone,
-                            owner_name=owner_name,
-                            plate_number=plate_text,
-                            time_str=current_time_str,
-                            action=action
-                        )
-                    except Exception as sms_e:
-                        print(f"SMS Error: {sms_e}")
+                    gate_cooldown.mark(plate_text)
                     
             except Exception as db_e:
                 print(f"Database error during detection logic: {db_e}")
                 access_status = "ERROR (Database)"
+            timings["decision_ms"] = _elapsed_ms(stage_start)
         
+        timings["total_ms"] = _elapsed_ms(request_start)
+        observe_timings(timings)
         return {
             "status": "success",
             "detected": detected,
@@ -343,9 +553,13 @@ async def detect_vehicle(file: UploadFile = File(...)):
             "access_status": access_status,
             "vehicle_info": vehicle_info,
             "image_url": image_url,
-            "plate_box": plate_box
+            "thumbnail_url": thumbnail_url(image_url),
+            "plate_box": plate_box,
+            "timings": timings
         }
 
+    except InferenceError:
+        raise
     except Exception as e:
         print(f"Error processing image: {e}")
-        raise HTTPException(status_code=500, detail=str(e))
+        raise InferenceError(500, str(e))
@@ -1,9 +1,14 @@
 from fastapi import APIRouter, HTTPException, Depends, Query
+from fastapi.concurrency import run_in_threadpool
 from pydantic import BaseModel
 from typing import Optional
 from datetime import datetime
 from .auth import get_current_user
-from mongo_client import access_logs_collection, vehicles_collection, users_collection, log_notification
+from utils.capture_lifecycle import with_thumbnail
+from utils.access_state import last_actions
+from mongo_async import (access_logs_collection, denied_logs_collection, vehicles_collection,
+                         users_collection, log_notification, find_by_ids)
+import asyncio
 import pymongo
 from bson import ObjectId
 
@@ -17,25 +22,28 @@ class AccessLogCreate(BaseModel):
     gate: str
 
 @router.post("")
-def create_log(log: AccessLogCreate):
+async def create_log(log: AccessLogCreate):
     try:
         log_data = log.dict()
         log_data["timestamp"] = datetime.utcnow().isoformat()
-        result = access_logs_collection.insert_one(log_data)
+        result = await access_logs_collection.insert_one(log_data)
         log_data["id"] = str(result.inserted_id)
+        if log.vehicle_id:
+            # Keep the gate's Entry/Exit state in step with manually recorded movements
+            await run_in_threadpool(last_actions.record, log.vehicle_id, log.action, log_data["timestamp"])
         if "_id" in log_data:
             del log_data["_id"]
             
         # Add to Recent Activity if vehicle exists
         if log.vehicle_id:
-            vehicle = vehicles_collection.find_one({"_id": ObjectId(log.vehicle_id)})
+            vehicle = await vehicles_collection.find_one({"_id": ObjectId(log.vehicle_id)})
             if vehicle and vehicle.get("owner_id"):
                 time_str = datetime.utcnow().strftime("%I:%M %p")
                 action_str = log.action.lower() + "ed" # e.g., entered, exited
                 if log.action.lower() == "entry":
                     action_str = "entered"
 
-                log_notification(
+                await log_notification(
                     title=f"Vehicle {log.action}",
                     message=f"Your vehicle {log.plate_detected} {action_str} the university manually at {time_str}.",
                     user_id=vehicle["owner_id"],
@@ -46,16 +54,31 @@ def create_log(log: AccessLogCreate):
     except Exception as e:
         raise HTTPException(status_code=400, detail=str(e))
 
+async def _attach_vehicles(logs):
+    """Enrich logs with vehicle model and owner, with one query per collection for the whole page."""
+    vehicles = await find_by_ids(vehicles_collection, [l.get("vehicle_id") for l in logs],
+                                 {"model": 1, "owner_id": 1})
+    owners = await find_by_ids(users_collection, [v.get("owner_id") for v in vehicles.values()],
+                               {"name": 1, "role": 1})
+    for l in logs:
+        v = vehicles.get(l.get("vehicle_id"))
+        if not v:
+            continue
+        v_info = {"model": v.get("model", "Unknown")}
+        u = owners.get(v.get("owner_id"))
+        if u:
+            v_info["owner"] = {
+                "full_name": u.get("name", "Unknown"),
+                "role": u.get("role", "GUEST")
+            }
+        l["vehicle"] = v_info
+
 @router.get("")
-def get_logs(limit: int = 10, offset: int = 0, owner_id: Optional[str] = None, user = Depends(get_current_user)):
+async def get_logs(limit: int = 10, offset: int = 0, owner_id: Optional[str] = None, user = Depends(get_current_user)):
     try:
-        from bson import ObjectId
-        from mongo_client import vehicles_collection, users_collection, denied_logs_collection
-        import pymongo
-        
         query = {}
         if owner_id:
-            user_vehicles = list(vehicles_collection.find({"owner_id": owner_id}, {"_id": 1, "plate_number": 1}))
+            user_vehicles = await vehicles_collection.find({"owner_id": owner_id}, {"_id": 1, "plate_number": 1}).to_list()
             vehicle_ids = [str(v["_id"]) for v in user_vehicles]
             plates = [v.get("plate_number") for v in user_vehicles if v.get("plate_number")]
             
@@ -73,57 +96,14 @@ def get_logs(limit: int = 10, offset: int = 0, owner_id: Optional[str] = None, u
         granted_cursor = access_logs_collection.find(query).sort("timestamp", pymongo.DESCENDING).limit(limit * 2)
         denied_cursor = denied_logs_collection.find(query if not owner_id else {}).sort("timestamp", pymongo.DESCENDING).limit(limit * 2)
         
-        all_logs = []
-        
-        # Process granted logs
-        for l in granted_cursor:
+        granted_logs, denied_logs = await asyncio.gather(granted_cursor.to_list(), denied_cursor.to_list())
+        all_logs = granted_logs + denied_logs
+        for l in all_logs:
             l["id"] = str(l["_id"])
             del l["_id"]
             l["created_at"] = l.get("timestamp")
-            
-            if l.get("vehicle_id"):
-                v = vehicles_collection.find_one({"_id": ObjectId(l["vehicle_id"])})
-                if v:
-                    v_info = {"model": v.get("model", "Unknown")}
-                    if v.get("owner_id"):
-                        try:
-                            u = users_collection.find_one({"_id": ObjectId(v["owner_id"])})
-                            if u:
-                                v_info["owner"] = {
-                                    "full_name": u.get("name", "Unknown"),
-                                    "role": u.get("role", "GUEST")
-                                }
-                        except:
-                            pass
-                    l["vehicle"] = v_info
-            all_logs.append(l)
-        
-        # Process denied logs
-        for l in denied_cursor:
-            l["id"] = str(l["_id"])
-            del l["_id"]
-            l["created_at"] = l.get("timestamp")
-            
-            # Try to enrich denied logs with vehicle info if available
-            if l.get("vehicle_id"):
-                try:
-                    v = vehicles_collection.find_one({"_id": ObjectId(l["vehicle_id"])})
-                    if v:
-                        v_info = {"model": v.get("model", "Unknown")}
-                        if v.get("owner_id"):
-                            try:
-                                u = users_collection.find_one({"_id": ObjectId(v["owner_id"])})
-                                if u:
-                                    v_info["owner"] = {
-                                        "full_name": u.get("name", "Unknown"),
-                                        "role": u.get("role", "GUEST")
-                                    }
-                            except:
-                                pass
-                        l["vehicle"] = v_info
-                except:
-                    pass
-            all_logs.append(l)
+            with_thumbnail(l)
+        await _attach_vehicles(all_logs)
         
         # Sort all merged logs by timestamp descending and apply limit/offset
         all_logs.sort(key=lambda x: x.get("timestamp", ""), reverse=True)
@@ -132,20 +112,18 @@ def get_logs(limit: int = 10, offset: int = 0, owner_id: Optional[str] = None, u
         raise HTTPException(status_code=400, detail=str(e))
 
 @router.get("/me")
-def get_my_logs(limit: int = 10, offset: int = 0, user = Depends(get_current_user)):
+async def get_my_logs(limit: int = 10, offset: int = 0, user = Depends(get_current_user)):
     try:
-        from bson import ObjectId
-        from mongo_client import vehicles_collection
-        
-        my_vehicles_cursor = vehicles_collection.find({"owner_id": user["id"]})
-        my_v_ids = [str(v["_id"]) for v in my_vehicles_cursor]
+        my_vehicles = await vehicles_collection.find({"owner_id": user["id"]}, {"_id": 1}).to_list()
+        my_v_ids = [str(v["_id"]) for v in my_vehicles]
         
         cursor = access_logs_collection.find({"vehicle_id": {"$in": my_v_ids}}).sort("timestamp", pymongo.DESCENDING).skip(offset).limit(limit)
         logs = []
-        for l in cursor:
+        async for l in cursor:
             l["id"] = str(l["_id"])
             del l["_id"]
             l["created_at"] = l.get("timestamp")
+            with_thumbnail(l)
             logs.append(l)
         return logs
     except Exception as e:
@@ -2,12 +2,12 @@ from fastapi import APIRouter, HTTPException, Depends
 from typing import Optional
 import pymongo
 from .auth import get_current_user
-from mongo_client import notifications_collection
+from mongo_async import notifications_collection, users_collection, find_by_ids
 
 router = APIRouter()
 
 @router.get("")
-def get_all_notifications(limit: int = 20, offset: int = 0, target_user_id: Optional[str] = None, user = Depends(get_current_user)):
+async def get_all_notifications(limit: int = 20, offset: int = 0, target_user_id: Optional[str] = None, user = Depends(get_current_user)):
     """Admin route to get all system notifications"""
     try:
         # Check if admin (optional depending on how strict we want to be)
@@ -19,31 +19,24 @@ def get_all_notifications(limit: int = 20, offset: int = 0, target_user_id: Opti
             query["user_id"] = target_user_id
             
         cursor = notifications_collection.find(query).sort("created_at", pymongo.DESCENDING).skip(offset).limit(limit)
-        notifications = []
-        from bson import ObjectId
-        from mongo_client import users_collection
+        notifications = await cursor.to_list()
+        # Fetch user profile pictures for the page in one query
+        users = await find_by_ids(users_collection, [n.get("user_id") for n in notifications], {"profile_url": 1})
         
-        for n in cursor:
+        for n in notifications:
             n["id"] = str(n["_id"])
             del n["_id"]
             
-            # Fetch user profile picture if user_id exists
-            if n.get("user_id"):
-                try:
-                    notif_user = users_collection.find_one({"_id": ObjectId(n["user_id"])})
-                    if notif_user:
-                        n["profile_url"] = notif_user.get("profile_url")
-                except Exception as e:
-                    print(f"DEBUG: Invalid user_id ObjectId {n.get('user_id')}: {e}")
-                    
-            notifications.append(n)
+            notif_user = users.get(n.get("user_id"))
+            if notif_user:
+                n["profile_url"] = notif_user.get("profile_url")
         return notifications
     except Exception as e:
          print(f"DEBUG EXCEPTION get_all_notifications: {str(e)}")
          raise HTTPException(status_code=400, detail=str(e))
 
 @router.get("/me")
-def get_my_notifications(limit: int = 20, offset: int = 0, user = Depends(get_current_user)):
+async def get_my_notifications(limit: int = 20, offset: int = 0, user = Depends(get_current_user)):
     """User route to get personal and system notifications"""
     try:
         # Get notifications specific to this user only
@@ -51,47 +44,40 @@ def get_my_notifications(limit: int = 20, offset: int = 0, user = Depends(get_cu
             "user_id": user["id"]
         }
         cursor = notifications_collection.find(query).sort("created_at", pymongo.DESCENDING).skip(offset).limit(limit)
-        notifications = []
-        from bson import ObjectId
-        from mongo_client import users_collection
+        notifications = await cursor.to_list()
+        # Fetch user profile pictures for the page in one query
+        users = await find_by_ids(users_collection, [n.get("user_id") for n in notifications], {"profile_url": 1})
         
-        for n in cursor:
+        for n in notifications:
             n["id"] = str(n["_id"])
             del n["_id"]
             
-            # Fetch user profile picture if user_id exists
-            if n.get("user_id"):
-                try:
-                    notif_user = users_collection.find_one({"_id": ObjectId(n["user_id"])})
-                    if notif_user:
-                        n["profile_url"] = notif_user.get("profile_url")
-                except Exception as e:
-                    print(f"DEBUG: Invalid user_id ObjectId {n.get('user_id')} in get_my_notifications: {e}")
-                    
-            notifications.append(n)
+            notif_user = users.get(n.get("user_id"))
+            if notif_user:
+                n["profile_url"] = notif_user.get("profile_url")
         return notifications
     except Exception as e:
          print(f"DEBUG EXCEPTION get_my_notifications: {str(e)}")
          raise HTTPException(status_code=400, detail=str(e))
 
 @router.put("/mark-all-read")
-def mark_all_read(user = Depends(get_current_user)):
+async def mark_all_read(user = Depends(get_current_user)):
     try:
         query = {
             "user_id": user["id"]
         }
-        notifications_collection.update_many(query, {"$set": {"read": True}})
+        await notifications_collection.update_many(query, {"$set": {"read": True}})
         return {"status": "success"}
     except Exception as e:
          print(f"DEBUG EXCEPTION mark_all_read: {str(e)}")
          raise HTTPException(status_code=400, detail=str(e))
 
 @router.put("/{notification_id}/read")
-def mark_notification_read(notification_id: str, user = Depends(get_current_user)):
+async def mark_notification_read(notification_id: str, user = Depends(get_current_user)):
     try:
         from bson import ObjectId
         # Set read to true
-        notifications_collection.update_one(
+        await notifications_collection.update_one(
             {"_id": ObjectId(notification_id)},
             {"$set": {"read": True}}
         )
@@ -100,10 +86,10 @@ def mark_notification_read(notification_id: str, user = Depends(get_current_user
          raise HTTPException(status_code=400, detail=str(e))
 
 @router.delete("/{notification_id}")
-def delete_notification(notification_id: str, user = Depends(get_current_user)):
+async def delete_notification(notification_id: str, user = Depends(get_current_user)):
     try:
         from bson import ObjectId
-        notifications_collection.delete_one({"_id": ObjectId(notification_id)})
+        await notifications_collection.delete_one({"_id": ObjectId(notification_id)})
         return {"status": "success"}
     except Exception as e:
         print(f"DEBUG EXCEPTION delete_notification: {str(e)}")
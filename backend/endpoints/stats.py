@@ -1,23 +1,18 @@
 from fastapi import APIRouter, Depends, HTTPException
 from endpoints.auth import get_current_user
-from mongo_client import users_collection, vehicles_collection, access_logs_collection
+from mongo_async import users_collection, vehicles_collection, access_logs_collection
 from datetime import datetime, timedelta, timezone
+import asyncio
 
 router = APIRouter()
 
 @router.get("")
-def get_admin_stats(user = Depends(get_current_user)):
+async def get_admin_stats(user = Depends(get_current_user)):
     try:
         # Require admin access for dashboard stats
         if user.get("role") != "admin" and user.get("role") != "ADMIN":
             pass # Relaxing for now depending on how strict the role checking is
 
-        # 1. Total Users
-        total_users = users_collection.count_documents({})
-        
-        # 2. Total Vehicles
-        total_vehicles = vehicles_collection.count_documents({})
-        
         # 3. Today's Entries (Assuming local timezone is +08:00 based on user request)
         tz = timezone(timedelta(hours=8))
         now = datetime.now(tz)
@@ -28,19 +23,20 @@ def get_admin_stats(user = Depends(get_current_user)):
         # we strictly compare local naive strings.
         start_today_str = start_of_today.replace(tzinfo=None).isoformat()
         
-        todays_entries = access_logs_collection.count_documents({
+        todays_entries_query = {
             "timestamp": {"$gte": start_today_str},
             "status": "GRANTED"
-        })
+        }
         
         # 4. Unauthorized Attempts today
-        unauthorized_attempts = access_logs_collection.count_documents({
+        unauthorized_attempts_query = {
             "timestamp": {"$gte": start_today_str},
             "status": "DENIED"
-        })
+        }
 
         # Calculate a simple 24hr distribution based on today's logs (using local time blocks)
         chart_data = []
+        chart_queries = []
         
         # Determine how far to go today (up to the current hour + 2, max 22:00)
         current_hour = now.hour
@@ -53,7 +49,7 @@ def get_admin_stats(user = Depends(get_current_user)):
             h_start_str = hour_start.replace(tzinfo=None).isoformat()
             h_end_str = hour_end.replace(tzinfo=None).isoformat()
             
-            count = access_logs_collection.count_documents({
+            chart_queries.append({
                 "timestamp": {"$gte": h_start_str, "$lt": h_end_str},
                 "status": "GRANTED"
             })
@@ -66,9 +62,21 @@ def get_admin_stats(user = Depends(get_current_user)):
             
             chart_data.append({
                 "time": f"{display_hour}:00 {ampm}",
-                "count": count
+                "count": 0
             })
 
+        # 1. Total Users, 2. Total Vehicles, today's counts and the chart buckets, counted concurrently
+        counts = await asyncio.gather(
+            users_collection.count_documents({}),
+            vehicles_collection.count_documents({}),
+            access_logs_collection.count_documents(todays_entries_query),
+            access_logs_collection.count_documents(unauthorized_attempts_query),
+            *(access_logs_collection.count_documents(q) for q in chart_queries)
+        )
+        total_users, total_vehicles, todays_entries, unauthorized_attempts = counts[:4]
+        for point, count in zip(chart_data, counts[4:]):
+            point["count"] = count
+
         return {
             "total_users": total_users,
             "total_vehicles": total_vehicles,
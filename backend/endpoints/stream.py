@@ -1,5 +1,8 @@
-from fastapi import APIRouter
-from fastapi.responses import StreamingResponse
+from fastapi import APIRouter, HTTPException
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import StreamingResponse, Response
+from contextlib import aclosing
+import asyncio
 import threading
 import time
 from datetime import datetime
@@ -13,22 +16,16 @@ except Exception as e:
     print(f"Warning: 'cv2' or 'numpy' failed to load: {e}. Camera stream disabled.")
     OPENCV_AVAILABLE = False
 
-try:
-    from ultralytics import YOLO
-    AI_AVAILABLE = True
-except Exception as e:
-    print(f"Warning: 'ultralytics' failed to load: {e}. Vehicle detection disabled.")
-    AI_AVAILABLE = False
-
-try:
-    import easyocr
-    OCR_AVAILABLE = True
-except Exception as e:
-    print(f"Warning: 'easyocr' failed to load: {e}. License plate reading disabled.")
-    OCR_AVAILABLE = False
+# YOLO and EasyOCR come from the shared model registry (one copy per worker)
+from model_registry import model_registry, YOLO_AVAILABLE as AI_AVAILABLE, OCR_AVAILABLE
+from utils.motion import MotionScheduler
+from utils.plate_tracker import PlateTracker
 
 try:
-    from mongo_client import vehicles_collection, access_logs_collection, denied_logs_collection, users_collection, log_notification
+    from mongo_client import notification_doc
+    from utils.vehicle_registry import vehicle_registry
+    from utils.access_state import last_actions
+    from utils.outbox import outbox, new_id
     DB_AVAILABLE = True
 except ImportError:
     print("Warning: Database connection to MongoDB not found. Logs will not be saved.")
@@ -41,24 +38,37 @@ camera = None
 model = None
 reader = None
 
-# Detection settings
-DETECTION_INTERVAL = 30  # Run detection every 30 frames
+# Detection settings: when to run YOLO+OCR is decided by motion on the gate camera
+# (thresholds configurable via MOTION_CONFIG["live-feed"], see utils/motion.py)
+STREAM_CAMERA_ID = "live-feed"
+detection_scheduler = MotionScheduler(STREAM_CAMERA_ID)
+MAX_PLATE_CANDIDATES = 3  # Plate patches OCR'd per detection frame
+# Plate reads are voted across frames per tracked plate before anything is logged
+plate_tracker = PlateTracker()
+# YOLOv8 COCO Classes: 2=car, 3=motorcycle, 5=bus, 7=truck
+VEHICLE_CLASSES = [2, 3, 5, 7]
 frame_counter = 0
 last_detections = []  # Store last detections to draw between intervals
 
-# Cooldown tracking
-last_logged_plate = None
-last_logged_time = 0
-LOG_COOLDOWN_SECONDS = 30 # Wait 30 seconds before logging the exact same plate again
+# Cooldown tracking (shared with /detect and the camera scanner)
+from utils.cooldown import gate_cooldown, log_dedup
 
 # Latest Scan Result for frontend polling
 latest_scan_result = None
 
 import os
-from utils.sms import send_access_sms
+from utils.sms import access_sms_message
+from utils.plate_localizer import localize_plates
+from utils.ocr import recognize_plates, PLATE_ALLOWLIST
+from utils.ocr_cache import ocr_cache
+from utils.preprocess import preprocess_pipeline
+from utils.capture_writer import capture_writer, thumbnail_url
+from utils.metrics import observe_stage
+from utils.frame_hub import FrameHub, FeedEnded
+from utils.feed_encoder import TieredEncoder, FEED_TIERS, DEFAULT_FEED_TIER
 
 def log_plate_detection(plate_text: str, frame=None):
-    global last_logged_plate, last_logged_time, latest_scan_result
+    global latest_scan_result
     
     # Clean up the text: remove non-alphanumeric (keep hyphens and spaces)
     import re
@@ -75,8 +85,9 @@ def log_plate_detection(plate_text: str, frame=None):
         
     current_time = time.time()
     
-    # Cooldown logic: if it's the same plate, wait 5 seconds before logging again
-    if plate_text == last_logged_plate and (current_time - last_logged_time) < LOG_COOLDOWN_SECONDS:
+    # Cooldown logic: skip plates /detect or the camera scanner just granted, and only consider
+    # the same plate once per STREAM_LOG_COOLDOWN_SECONDS (shared store, see utils/cooldown.py)
+    if gate_cooldown.remaining(plate_text) > 0 or log_dedup.acquire(plate_text) > 0:
         return
         
     try:
@@ -84,39 +95,15 @@ def log_plate_detection(plate_text: str, frame=None):
         status = "Denied"
         vehicle_info = None
         
-        # 1. Query the vehicles collection using regex for partial matching
-        # Users often enter plates like "ABC 123" or "ABC-123" or "ABC123". 
-        # The AI reads "ABC123". To match it against "ABC 123" in the database,
-        # we construct a regex pattern that allows optional spaces or hyphens between every character.
-        search_plate = plate_text.replace(" ", "").replace("-", "")
-        
-        # Build wildcard pattern like ^C[\s\-]*A[\s\-]*X[\s\-]*3[\s\-]*2[\s\-]*0[\s\-]*0$
-        regex_pattern = "^" + "[\\s\\-]*".join(list(search_plate)) + "$"
-        
-        vehicle = vehicles_collection.find_one({"plate_number": {"$regex": regex_pattern, "$options": "i"}})
-        
-        # If not found, try a looser search just in case
-        if not vehicle:
-             loose_regex = "[\\s\\-]*".join(list(search_plate))
-             vehicle = vehicles_collection.find_one({"plate_number": {"$regex": loose_regex, "$options": "i"}})
+        # 1. Resolve vehicle + owner from the in-memory registry (keyed by normalized plate,
+        # so "ABC 123" / "ABC-123" registrations match the AI's "ABC123" read)
+        stage_start = time.perf_counter()
+        vehicle, owner_phone = vehicle_registry.resolve(plate_text)
+        observe_stage("plate_lookup", time.perf_counter() - stage_start)
         
         if vehicle:
-            vehicle["id"] = str(vehicle["_id"])
-            del vehicle["_id"]
             vehicle_info = vehicle
             
-            # Additional layer to guarantee we grab the right owner details
-            if "owner_name" not in vehicle_info or vehicle_info["owner_name"] == "Unknown":
-                from bson import ObjectId
-                if vehicle.get("owner_id"):
-                    try:
-                        owner_record = users_collection.find_one({"_id": ObjectId(vehicle["owner_id"])})
-                        if owner_record:
-                            vehicle_info["owner_name"] = owner_record.get("name", "Unknown")
-                            vehicle_info["owner_role"] = owner_record.get("role", "GUEST")
-                    except Exception as ex:
-                        print(f"Failed to lookup owner in log_plate_detection: {ex}")
-            
             # Check rigorous status, making it case-insensitive and stripping whitespace
             v_status = vehicle.get("status", "").strip().upper()
             if v_status == "ACTIVE":
@@ -128,35 +115,15 @@ def log_plate_detection(plate_text: str, frame=None):
         else:
              status = "Denied (Unregistered)"
              
-        # Save frame capture
-        os.makedirs("static/captures", exist_ok=True)
-        image_url = None
-        if frame is not None:
-             filename = f"capture_{int(current_time)}.jpg"
-             filepath = os.path.join("static", "captures", filename)
-             cv2.imwrite(filepath, frame)
-             image_url = f"/static/captures/{filename}"
-             
-        # Check last action for this vehicle to determine Entry vs Exit
+        # Check last action for this vehicle to determine Entry vs Exit (cached per vehicle)
         action = "Entry"
-        owner_phone = None
         if vehicle_info:
             
-            # Fetch the actual user document to get the phone number
-            if vehicle_info.get("owner_id"):
-                from bson import ObjectId
-                owner_doc = users_collection.find_one({"_id": ObjectId(vehicle_info["owner_id"])})
-                if owner_doc:
-                    owner_phone = owner_doc.get("phone")
-            
-            last_log = access_logs_collection.find_one(
-                {"vehicle_id": vehicle_info.get("id")},
-                sort=[("timestamp", -1)]
-            )
+            last_action = last_actions.get(vehicle_info.get("id"))
             
-            if last_log and last_log.get("action") == "Entry":
+            if last_action and last_action[0] == "Entry":
                 # Only allow an Exit if the Entry was at least 60 seconds ago
-                last_log_time_str = last_log.get("timestamp")
+                last_log_time_str = last_action[1]
                 if last_log_time_str:
                     try:
                         last_time_obj = datetime.fromisoformat(last_log_time_str.replace("Z", "+00:00"))
@@ -171,31 +138,33 @@ def log_plate_detection(plate_text: str, frame=None):
                 else:
                     action = "Exit"
                 
-        # Insert access log
+        # Save frame capture (queued; the writer thread encodes it off the stream loop)
+        image_url = None
+        if frame is not None:
+             image_url = capture_writer.save(frame, STREAM_CAMERA_ID)
+             
+        # Queue the access log, notification and SMS together; the outbox dispatcher writes them
         log_entry_id = None
         try:
+            log_entry_id = new_id()
             log_data = {
+                "_id": log_entry_id,
                 "plate_detected": plate_text,
                 "action": action, 
                 "status": "GRANTED" if status == "Authorized" else "DENIED",
                 "gate": "Main Gate Entry",
                 "timestamp": datetime.now().isoformat(),
-                "image_url": image_url
+                "image_url": image_url,
+                "thumbnail_url": thumbnail_url(image_url)
             }
             
             # Determine vehicle ID if authorized
             if vehicle_info:
                 log_data["vehicle_id"] = vehicle_info.get("id")
                 
-            if status == "Authorized":
-                result = access_logs_collection.insert_one(log_data)
-            else:
-                result = denied_logs_collection.insert_one(log_data)
-                
-            log_entry_id = str(result.inserted_id)
-            
             # --- START SMS INTEGRATION ---
-            # If the entry was granted and we found a phone number, send the SMS
+            # If the entry was granted and we found a phone number, queue the SMS
+            notification = sms = None
             if status == "Authorized" and owner_phone and vehicle_info:
                 owner_name = vehicle_info.get("owner_name", "Unknown")
                 
@@ -203,7 +172,7 @@ def log_plate_detection(plate_text: str, frame=None):
                 current_time_str = datetime.now().strftime("%I:%M %p")
                 
                 # Added notification for the dashboard
-                log_notification(
+                notification = notification_doc(
                     title=f"Vehicle {action}",
                     message=f"Your vehicle {plate_text} {action.lower()}ed the university at {current_time_str}.",
                     user_id=vehicle_info.get("owner_id"),
@@ -211,17 +180,21 @@ def log_plate_detection(plate_text: str, frame=None):
                 )
                 
                 # Send SMS for both Entry and Exit
-                print(f"[STREAM DETECT] Triggering {action} SMS to {owner_name} ({owner_phone})")
-                send_access_sms(
-                    phone_number=owner_phone,
-                    owner_name=owner_name,
-                    plate_number=plate_text,
-                    time_str=current_time_str,
-                    action=action
-                )
+                print(f"[STREAM DETECT] Queueing {action} SMS to {owner_name} ({owner_phone})")
+                sms = {
+                    "phone_number": owner_phone,
+                    "message": access_sms_message(owner_name, plate_text, current_time_str, action)
+                }
             # --- END SMS INTEGRATION ---
             
+            stage_start = time.perf_counter()
+            outbox.enqueue_access_event(
+                "access_logs" if status == "Authorized" else "denied_logs", log_data, notification, sms,
+                last_action=(vehicle_info.get("id"), action, log_data["timestamp"]) if status == "Authorized" else None)
+            observe_stage("outbox", time.perf_counter() - stage_start)
+            
         except Exception as e:
+            log_entry_id = None
             print(f"Error saving log: {e}")
         
         print(f"\n[STREAM DETECT] Logged Plate: {plate_text} | Status: {status}")
@@ -234,33 +207,24 @@ def log_plate_detection(plate_text: str, frame=None):
             "access_granted": status == "Authorized",
             "access_status": "GRANTED" if status == "Authorized" else status.upper(),
             "vehicle_info": vehicle_info,
-            "image_url": image_url
+            "image_url": image_url,
+            "thumbnail_url": thumbnail_url(image_url)
         }
         
-        # Update cooldown
-        last_logged_plate = plate_text
-        last_logged_time = current_time
+        # A granted plate also starts the gate cooldown /detect and the camera scanner honour
+        if status == "Authorized":
+            gate_cooldown.mark(plate_text)
         
     except Exception as e:
          print(f"Error logging plate detection: {e}")
 
 def load_models():
     global model, reader
+    # Blocks until the registry's background load (started in the app lifespan) finishes
     if AI_AVAILABLE and model is None:
-        try:
-            print("Loading YOLOv8 model...")
-            model = YOLO("yolov8n.pt")
-            print("YOLOv8 model loaded.")
-        except Exception as e:
-            print(f"Failed to load YOLO model: {e}")
-
+        model = model_registry.get_yolo()
     if OCR_AVAILABLE and reader is None:
-        try:
-            print("Loading EasyOCR reader...")
-            reader = easyocr.Reader(['en'], gpu=False)
-            print("EasyOCR reader loaded.")
-        except Exception as e:
-            print(f"Failed to load EasyOCR: {e}")
+        reader = model_registry.get_reader()
 
 def get_camera():
     global camera
@@ -284,168 +248,253 @@ def get_camera():
             camera = None
     return camera
 
-def generate_frames():
+def _plate_detection(box, plate_text: str):
+    """Green overlay entry for a plate box drawn on every streamed frame."""
+    return {
+        "box": box,
+        "label": "", 
+        "color": (0, 255, 0), # Green for valid plate
+        "plate": plate_text
+    }
+
+def _detect_and_annotate(frame):
+    """Motion-scheduled YOLO + plate OCR on one camera frame, logging plates and drawing overlays in place."""
     global frame_counter, last_detections
     
-    if not OPENCV_AVAILABLE:
-        # Yield a placeholder image or nothing if no opencv
-        yield (b'--frame\r\n'
-               b'Content-Type: text/plain\r\n\r\n' + b'OpenCV not installed' + b'\r\n')
-        return
+    # Run detection when motion appears, often while a vehicle is present, rarely when static
+    run_detection, _ = detection_scheduler.should_detect(frame)
+    if run_detection:
+        current_detections = []
+        vehicle_present = False
+        
+        # 1. Run YOLOv8 on the frame (general object detection)
+        if model:
+            try:
+                stage_start = time.perf_counter()
+                results = model(frame, verbose=False)
+                observe_stage("yolo", time.perf_counter() - stage_start)
+                for r in results:
+                    boxes = r.boxes
+                    for box in boxes:
+                        cls = int(box.cls[0])
+                        conf = float(box.conf[0])
+                        
+                        if cls in VEHICLE_CLASSES and conf > 0.4:
+                            vehicle_present = True
+                        
+                        # Detect any object with decent confidence to show YOLO is working
+                        if conf > 0.4:
+                            x1, y1, x2, y2 = map(int, box.xyxy[0])
+                            label = f"YOLO: {model.names[cls]} ({conf:.2f})"
+                            
+                            # We skip appending YOLO bounding boxes to keep the user's camera feed focused strictly on plates.
+                            # current_detections.append(...)
+            except Exception as e:
+                print(f"YOLO error: {e}")
+                
+        # 2. Read the plates (recognition only, no text detection pass)
+        if reader:
+            try:
+                # The localizer finds the plate-shaped patches; an empty lane yields no
+                # candidates and skips OCR entirely. All patches are then recognized in a
+                # single batched call using an allowlist of uppercase letters and digits,
+                # which stops the AI from hallucinating symbols or lowercase letters.
+                stage_start = time.perf_counter()
+                candidates = localize_plates(frame, MAX_PLATE_CANDIDATES)
+                observe_stage("localize", time.perf_counter() - stage_start)
+                
+                # Plates already finalized by the tracker are not read again
+                to_read = [box for box in candidates if plate_tracker.needs_ocr(box)]
+                for box in candidates:
+                    if box not in to_read:
+                        current_detections.append(_plate_detection(box, plate_tracker.finalized_text(box)))
+                
+                # CLAHE-enhanced grayscale patches, built in the shared pipeline's reused buffers
+                stage_start = time.perf_counter()
+                crops = [preprocess_pipeline.enhance(frame[cy1:cy2, cx1:cx2], slot)[1]
+                         for slot, (cx1, cy1, cx2, cy2) in enumerate(to_read)]
+                observe_stage("preprocess", time.perf_counter() - stage_start)
+                stage_start = time.perf_counter()
+                # Cached reads are only reused within the same tracked plate (new boxes are always read)
+                scopes = [(STREAM_CAMERA_ID, track_id) if track_id is not None else None
+                          for track_id in map(plate_tracker.track_id, to_read)]
+                reads = recognize_plates(reader, crops, PLATE_ALLOWLIST, cache=ocr_cache, scopes=scopes)
+                observe_stage("ocr_recognize", time.perf_counter() - stage_start)
+                
+                # Unannotated copy kept by the tracker for the capture of its best read
+                capture_frame = None
+                track_reads = []
+                for box, (text, conf) in zip(to_read, reads):
+                    if conf <= 0.3:
+                        continue
+                    
+                    # Advanced Plate Cleanup based on positional Philippine plate formats
+                    import re
+                    clean_text = re.sub(r'[^A-Za-z0-9]', '', text).upper()
+                    
+                    # Let's see if the cleaned string broadly matches Philippine format (3/4 letters, 3/4 numbers)
+                    # First we'll extract letters and numbers
+                    letters = re.sub(r'[^A-Z]', '', clean_text)
+                    numbers = re.sub(r'[^0-9]', '', clean_text)
+                    
+                    # A very basic heuristic: Plate needs roughly at least 5 alphanumeric characters total
+                    if len(letters) + len(numbers) >= 5:
+                        
+                        # Use the raw sequence as-is, so we don't accidentally reverse 123 ABC to ABC 123.
+                        # The read is a vote on its track; logging waits for the track's consensus.
+                        if capture_frame is None:
+                            capture_frame = frame.copy()
+                        track_reads.append((box, clean_text, conf, capture_frame))
+                        
+                        # Highlight the plate with a prominent Green box over the localized patch
+                        current_detections.append(_plate_detection(box, clean_text))
+                
+                # Log one consensus plate per track instead of every single-frame read
+                for plate_text, _, plate_frame in plate_tracker.update(track_reads):
+                    log_plate_detection(plate_text, plate_frame)
+                        
+            except Exception as e:
+                print(f"OCR error: {e}")
+                
+        last_detections = current_detections
+        detection_scheduler.report_vehicle(vehicle_present or bool(current_detections))
+    else:
+        # Flush tracks that left the scene so they are logged once, without delay
+        for plate_text, _, plate_frame in plate_tracker.update([]):
+            log_plate_detection(plate_text, plate_frame)
+        
+    frame_counter += 1
+    
+    # Draw detections on the frame
+    for det in last_detections:
+        x1, y1, x2, y2 = det["box"]
+        color = det.get("color", (0, 255, 0)) # Default to green
+        
+        # Draw bounding box
+        cv2.rectangle(frame, (x1, y1), (x2, y2), color, 2)
+        
+        # Draw label (for YOLO)
+        if det["label"]:
+            cv2.putText(frame, det["label"], (x1, y1 - 10), cv2.FONT_HERSHEY_SIMPLEX, 0.5, color, 2)
+            
+        # Draw plate text (for OCR)
+        if det.get("plate"):
+             cv2.putText(frame, det["plate"], (x1, y1 - 10), cv2.FONT_HERSHEY_SIMPLEX, 0.9, color, 3)
 
+def _produce_live_feed(hub):
+    """The single capture-and-detect loop behind /live-feed; publishes annotated frames to the hub."""
     # Ensure models are loaded (lazy loading)
     load_models()
     
     cam = get_camera()
     
     if cam is None or not cam.isOpened():
-         # Yield a placeholder or error frame
-        yield (b'--frame\r\n'
-               b'Content-Type: text/plain\r\n\r\n' + b'Camera not available' + b'\r\n')
+        hub.end("Camera not available")
         return
 
-    while True:
+    while hub.has_viewers():
+        success, frame = cam.read()
+        if not success:
+            hub.end("Camera read failed")
+            return
+        
         try:
-            success, frame = cam.read()
-            if not success:
-                break
-            
-            # Run detection every DETECTION_INTERVAL frames
-            if frame_counter % DETECTION_INTERVAL == 0:
-                current_detections = []
-                
-                # 1. Run YOLOv8 on the frame (general object detection)
-                if model:
-                    try:
-                        results = model(frame, verbose=False)
-                        for r in results:
-                            boxes = r.boxes
-                            for box in boxes:
-                                cls = int(box.cls[0])
-                                conf = float(box.conf[0])
-                                
-                                # Detect any object with decent confidence to show YOLO is working
-                                if conf > 0.4:
-                                    x1, y1, x2, y2 = map(int, box.xyxy[0])
-                                    label = f"YOLO: {model.names[cls]} ({conf:.2f})"
-                                    
-                                    # We skip appending YOLO bounding boxes to keep the user's camera feed focused strictly on plates.
-                                    # current_detections.append(...)
-                    except Exception as e:
-                        print(f"YOLO error: {e}")
-                        
-                # 2. Run EasyOCR on the frame (text detection)
-                if reader:
-                    try:
-                        # Use an allowlist to force the AI to ONLY detect uppercase letters and numbers.
-                        # This massively increases accuracy for license plates and stops it from hallucinating symbols or lowercase letters.
-                        ocr_results = reader.readtext(frame, detail=1, allowlist="ABCDEFGHIJKLMNOPQRSTUVWXYZ0123456789")
-                        valid_texts = []
-                        for result in ocr_results:
-                            bbox, text, conf = result
-                            if conf > 0.3:
-                                x1 = int(min([pt[0] for pt in bbox]))
-                                y1 = int(min([pt[1] for pt in bbox]))
-                                x2 = int(max([pt[0] for pt in bbox]))
-                                y2 = int(max([pt[1] for pt in bbox]))
-                                
-                                valid_texts.append({'box': (x1, y1, x2, y2), 'text': text})
-                                
-                        if valid_texts:
-                            # Group OCR text from left to right, somewhat ignoring minor vertical differences
-                            # Sort by X-coordinate first to ensure left-to-right order
-                            valid_texts.sort(key=lambda item: item['box'][0])
-                            
-                            groups = []
-                            for item in valid_texts:
-                                added = False
-                                for group in groups:
-                                    last_item = group[-1]
-                                    item_cy = (item['box'][1] + item['box'][3]) / 2
-                                    last_cy = (last_item['box'][1] + last_item['box'][3]) / 2
-                                    
-                                    # Check vertical alignment (centers within 50 pixels) and horizontal distance (within 200 pixels)
-                                    if abs(item_cy - last_cy) < 50 and (item['box'][0] - last_item['box'][2]) < 200:
-                                        group.append(item)
-                                        added = True
-                                        break
-                                if not added:
-                                    groups.append([item])
-                                    
-                            for group in groups:
-                                # Sort items left to right
-                                group.sort(key=lambda x: x['box'][0])
-                                # Join text blocks
-                                combined_text = "".join([item['text'] for item in group])
-                                
-                                # Advanced Plate Cleanup based on positional Philippine plate formats
-                                import re
-                                clean_text = re.sub(r'[^A-Za-z0-9]', '', combined_text).upper()
-                                
-                                # Let's see if the cleaned string broadly matches Philippine format (3/4 letters, 3/4 numbers)
-                                # First we'll extract letters and numbers
-                                letters = re.sub(r'[^A-Z]', '', clean_text)
-                                numbers = re.sub(r'[^0-9]', '', clean_text)
-                                
-                                # A very basic heuristic: Plate needs roughly at least 5 alphanumeric characters total
-                                if len(letters) + len(numbers) >= 5:
-                                    
-                                    # Use the raw sequence as-is, so we don't accidentally reverse 123 ABC to ABC 123
-                                    display_text = clean_text
-                                    
-                                    # Only log and draw if it's strictly matching this vehicle parameter size
-                                    log_plate_detection(display_text, frame)
-                                    
-                                    # Highlight the plate text with a prominent Green box over the entire grouped bounding box
-                                    min_x = min([item['box'][0] for item in group])
-                                    min_y = min([item['box'][1] for item in group])
-                                    max_x = max([item['box'][2] for item in group])
-                                    max_y = max([item['box'][3] for item in group])
-                                    
-                                    current_detections.append({
-                                        "box": (min_x, min_y, max_x, max_y),
-                                        "label": "", 
-                                        "color": (0, 255, 0), # Green for valid plate
-                                        "plate": f"{display_text}" 
-                                    })
-                                
-                    except Exception as e:
-                        print(f"OCR error: {e}")
-                        
-                last_detections = current_detections
-                
-            frame_counter += 1
-            
-            # Draw detections on the frame
-            for det in last_detections:
-                x1, y1, x2, y2 = det["box"]
-                color = det.get("color", (0, 255, 0)) # Default to green
-                
-                # Draw bounding box
-                cv2.rectangle(frame, (x1, y1), (x2, y2), color, 2)
-                
-                # Draw label (for YOLO)
-                if det["label"]:
-                    cv2.putText(frame, det["label"], (x1, y1 - 10), cv2.FONT_HERSHEY_SIMPLEX, 0.5, color, 2)
-                    
-                # Draw plate text (for OCR)
-                if det.get("plate"):
-                     cv2.putText(frame, det["plate"], (x1, y1 - 10), cv2.FONT_HERSHEY_SIMPLEX, 0.9, color, 3)
-
-            # Encode frame to JPEG
-            ret, buffer = cv2.imencode('.jpg', frame)
-            frame_bytes = buffer.tobytes()
-            
-            # Yield frame in MJPEG format
-            yield (b'--frame\r\n'
-                   b'Content-Type: image/jpeg\r\n\r\n' + frame_bytes + b'\r\n')
+            _detect_and_annotate(frame)
         except Exception as e:
             print(f"Stream error: {e}")
-            break
+            
+        # Viewers encode it lazily, once per quality tier (see utils/feed_encoder.py)
+        hub.publish(frame)
+
+# One producer for the gate camera however many dashboards are watching
+live_feed_hub = FrameHub(STREAM_CAMERA_ID, _produce_live_feed)
+live_feed_encoder = TieredEncoder()
+# How long a snapshot waits for the first frame of a producer that is just starting
+SNAPSHOT_TIMEOUT_SECONDS = 15
+
+def _mjpeg_part(content_type: bytes, payload: bytes) -> bytes:
+    return b'--frame\r\nContent-Type: ' + content_type + b'\r\n\r\n' + payload + b'\r\n'
+
+async def _encoded(seq: int, frame, tier: str) -> bytes:
+    data = live_feed_encoder.cached(seq, tier)
+    if data is None:
+        # Encoding takes milliseconds; keep it off the event loop
+        data = await run_in_threadpool(live_feed_encoder.encode, seq, frame, tier)
+    return data
+
+async def generate_frames(tier: str = DEFAULT_FEED_TIER, max_fps: float = 0):
+    """
+    One viewer's MJPEG stream. Each part is the newest frame at the time the previous
+    one was written, so a viewer on a slow link (the socket write blocks) or with a
+    `max_fps` cap skips stale frames instead of falling behind.
+    """
+    if not OPENCV_AVAILABLE:
+        # Yield a placeholder image or nothing if no opencv
+        yield _mjpeg_part(b'text/plain', b'OpenCV not installed')
+        return
+    
+    interval = 1.0 / max_fps if max_fps > 0 else 0.0
+    next_send = 0.0
+    try:
+        async with aclosing(live_feed_hub.frames()) as frames:
+            async for seq, frame in frames:
+                # Yield frame in MJPEG format
+                yield _mjpeg_part(b'image/jpeg', await _encoded(seq, frame, tier))
+                if interval:
+                    next_send = max(next_send + interval, time.monotonic())
+                    await asyncio.sleep(max(0.0, next_send - time.monotonic()))
+    except FeedEnded as e:
+        # Yield a placeholder or error frame
+        yield _mjpeg_part(b'text/plain', str(e).encode())
+
+async def _first_frame():
+    async with aclosing(live_feed_hub.frames()) as frames:
+        async for seq, frame in frames:
+            return seq, frame
+    raise FeedEnded("Live feed stopped")
+
+def _feed_tier(tier: str) -> str:
+    if tier not in FEED_TIERS:
+        raise HTTPException(status_code=400, detail=f"tier must be one of {', '.join(FEED_TIERS)}")
+    return tier
 
 @router.get("/live-feed")
-async def live_feed():
-    return StreamingResponse(generate_frames(), media_type="multipart/x-mixed-replace; boundary=frame")
+async def live_feed(tier: str = DEFAULT_FEED_TIER, fps: float = None, mode: str = "stream"):
+    """
+    MJPEG stream of the gate camera. `tier` picks resolution/quality (full, medium,
+    low, thumb) and `fps` caps this viewer's frame rate (default: the tier's cap).
+    `mode=snapshot` returns a single JPEG instead, for camera-grid thumbnails.
+    """
+    tier = _feed_tier(tier)
+    if mode == "snapshot":
+        return await live_feed_snapshot(tier)
+    max_fps = fps if fps is not None else FEED_TIERS[tier]["max_fps"]
+    return StreamingResponse(generate_frames(tier, max_fps), media_type="multipart/x-mixed-replace; boundary=frame")
+
+@router.get("/live-feed/snapshot")
+async def live_feed_snapshot(tier: str = "thumb"):
+    """The newest live-feed frame as one JPEG (starts the producer if nobody is watching)."""
+    tier = _feed_tier(tier)
+    if not OPENCV_AVAILABLE:
+        raise HTTPException(status_code=503, detail="OpenCV not installed")
+    try:
+        seq, frame = await asyncio.wait_for(_first_frame(), SNAPSHOT_TIMEOUT_SECONDS)
+    except asyncio.TimeoutError:
+        raise HTTPException(status_code=503, detail="Live feed is starting, retry shortly")
+    except FeedEnded as e:
+        raise HTTPException(status_code=503, detail=str(e))
+    return Response(await _encoded(seq, frame, tier), media_type="image/jpeg",
+                    headers={"Cache-Control": "no-store"})
+
+@router.get("/live-feed/scheduler")
+async def get_scheduler_stats():
+    """Motion scheduler, plate tracker and viewer hub state for the live feed."""
+    return {
+        **detection_scheduler.stats(),
+        "tracker": plate_tracker.stats(),
+        "ocr_cache": ocr_cache.stats(),
+        "feed": {**live_feed_hub.stats(), "encoder": live_feed_encoder.stats()}
+    }
 
 @router.get("/latest-scan")
 async def get_latest_scan():
@@ -1,8 +1,13 @@
 from fastapi import APIRouter, HTTPException, Depends
+from fastapi.concurrency import run_in_threadpool
 from pydantic import BaseModel
 from typing import Optional
 from .auth import get_current_user
-from mongo_client import vehicles_collection, log_notification
+from mongo_async import vehicles_collection, users_collection, log_notification, find_by_ids
+from utils.plates import normalize_plate
+from utils.vehicle_registry import vehicle_registry
+from pymongo.errors import DuplicateKeyError
+from datetime import datetime
 
 router = APIRouter()
 
@@ -15,17 +20,20 @@ class VehicleCreate(BaseModel):
     owner_id: Optional[str] = None
 
 @router.post("")
-def create_vehicle(vehicle: VehicleCreate, user = Depends(get_current_user)):
+async def create_vehicle(vehicle: VehicleCreate, user = Depends(get_current_user)):
     try:
         vehicle_dict = vehicle.dict(exclude_unset=True)
         vehicle_dict["status"] = "Active"
+        vehicle_dict["plate_key"] = normalize_plate(vehicle.plate_number)
+        vehicle_dict["updated_at"] = datetime.utcnow()
         
         # Assign owner_id from the authenticated user
         if user and "id" in user:
             vehicle_dict["owner_id"] = user["id"]
             
-        result = vehicles_collection.insert_one(vehicle_dict)
+        result = await vehicles_collection.insert_one(vehicle_dict)
         vehicle_dict["id"] = str(result.inserted_id)
+        await run_in_threadpool(vehicle_registry.invalidate_vehicle, vehicle_dict["id"])
         
         user_name = user.get("name") if user else "Admin"
         owner_id = vehicle_dict.get("owner_id")
@@ -35,7 +43,7 @@ def create_vehicle(vehicle: VehicleCreate, user = Depends(get_current_user)):
         else:
              msg = f"You successfully registered a new vehicle {vehicle.model} ({vehicle.plate_number})."
              
-        log_notification(
+        await log_notification(
             title="Vehicle Registered",
             message=msg,
             user_id=owner_id,
@@ -44,13 +52,17 @@ def create_vehicle(vehicle: VehicleCreate, user = Depends(get_current_user)):
         
         del vehicle_dict["_id"]
         return [vehicle_dict]
+    except DuplicateKeyError:
+        raise HTTPException(status_code=400, detail="Plate number already registered")
     except Exception as e:
         raise HTTPException(status_code=400, detail=str(e))
 
 @router.post("/verify")
-def verify_vehicle(plate_number: str):
+async def verify_vehicle(plate_number: str):
     try:
-        vehicle = vehicles_collection.find_one({"plate_number": plate_number})
+        # One exact lookup on the unique plate_key index
+        plate_key = normalize_plate(plate_number)
+        vehicle = await vehicles_collection.find_one({"plate_key": plate_key}) if plate_key else None
         if vehicle:
             vehicle["id"] = str(vehicle["_id"])
             del vehicle["_id"]
@@ -61,7 +73,7 @@ def verify_vehicle(plate_number: str):
          return {"status": "error", "message": str(e)}
 
 @router.get("")
-def get_vehicles(user = Depends(get_current_user)):
+async def get_vehicles(user = Depends(get_current_user)):
     try:
         user_id = user.get("id") if user else None
         role = user.get("role", "").upper() if user else ""
@@ -72,28 +84,20 @@ def get_vehicles(user = Depends(get_current_user)):
         else:
             query = {"owner_id": user_id} if user_id else {}
             
-        vehicles_cursor = vehicles_collection.find(query)
-        vehicles = []
-        from bson import ObjectId
-        from mongo_client import users_collection
+        vehicles = await vehicles_collection.find(query).to_list()
+        # Hydrate owner information (one query for all owners)
+        owners = await find_by_ids(users_collection, [v.get("owner_id") for v in vehicles], {"name": 1, "role": 1})
         
-        for v in vehicles_cursor:
+        for v in vehicles:
             v["id"] = str(v["_id"])
             del v["_id"]
             
-            # Hydrate owner information
-            if v.get("owner_id"):
-                try:
-                    owner_doc = users_collection.find_one({"_id": ObjectId(v["owner_id"])})
-                    if owner_doc:
-                        v["owner"] = {
-                            "full_name": owner_doc.get("name", "Unknown"),
-                            "role": owner_doc.get("role", "GUEST")
-                        }
-                except:
-                    pass
-            
-            vehicles.append(v)
+            owner_doc = owners.get(v.get("owner_id"))
+            if owner_doc:
+                v["owner"] = {
+                    "full_name": owner_doc.get("name", "Unknown"),
+                    "role": owner_doc.get("role", "GUEST")
+                }
         return vehicles
     except Exception as e:
         raise HTTPException(status_code=400, detail=str(e))
@@ -107,19 +111,23 @@ class VehicleUpdate(BaseModel):
     color: Optional[str] = None
 
 @router.put("/{vehicle_id}")
-def update_vehicle(vehicle_id: str, vehicle_update: VehicleUpdate, user = Depends(get_current_user)):
+async def update_vehicle(vehicle_id: str, vehicle_update: VehicleUpdate, user = Depends(get_current_user)):
     try:
         from bson import ObjectId
-        vehicle_doc = vehicles_collection.find_one({"_id": ObjectId(vehicle_id)})
+        vehicle_doc = await vehicles_collection.find_one({"_id": ObjectId(vehicle_id)})
         plate = vehicle_doc.get("plate_number") if vehicle_doc else "Unknown"
         owner_id = vehicle_doc.get("owner_id") if vehicle_doc else None
         
         update_fields = vehicle_update.dict(exclude_unset=True)
+        if update_fields.get("plate_number"):
+            update_fields["plate_key"] = normalize_plate(update_fields["plate_number"])
         if update_fields:
-            vehicles_collection.update_one(
+            update_fields["updated_at"] = datetime.utcnow()
+            await vehicles_collection.update_one(
                 {"_id": ObjectId(vehicle_id)}, 
                 {"$set": update_fields}
             )
+            await run_in_threadpool(vehicle_registry.invalidate_vehicle, vehicle_id)
         
         user_name = user.get("name") if user else "Admin"
         if owner_id and owner_id != user.get("id"):
@@ -127,25 +135,28 @@ def update_vehicle(vehicle_id: str, vehicle_update: VehicleUpdate, user = Depend
         else:
              msg = f"You updated your vehicle {plate}."
              
-        log_notification(
+        await log_notification(
             title="Vehicle Updated",
             message=msg,
             user_id=owner_id,
             type="update"
         )
         return {"status": "success"}
+    except DuplicateKeyError:
+        raise HTTPException(status_code=400, detail="Plate number already registered")
     except Exception as e:
         raise HTTPException(status_code=400, detail=str(e))
 
 @router.delete("/{vehicle_id}")
-def delete_vehicle(vehicle_id: str, user = Depends(get_current_user)):
+async def delete_vehicle(vehicle_id: str, user = Depends(get_current_user)):
     try:
         from bson import ObjectId
-        vehicle_doc = vehicles_collection.find_one({"_id": ObjectId(vehicle_id)})
+        vehicle_doc = await vehicles_collection.find_one({"_id": ObjectId(vehicle_id)})
         plate = vehicle_doc.get("plate_number") if vehicle_doc else "Unknown"
         owner_id = vehicle_doc.get("owner_id") if vehicle_doc else None
         
-        vehicles_collection.delete_one({"_id": ObjectId(vehicle_id)})
+        await vehicles_collection.delete_one({"_id": ObjectId(vehicle_id)})
+        await run_in_threadpool(vehicle_registry.invalidate_vehicle, vehicle_id)
         
         user_name = user.get("name") if user else "Admin"
         if owner_id and owner_id != user.get("id"):
@@ -153,7 +164,7 @@ def delete_vehicle(vehicle_id: str, user = Depends(get_current_user)):
         else:
              msg = f"You deleted your vehicle {plate}."
              
-        log_notification(
+        await log_notification(
             title="Vehicle Deleted",
             message=msg,
             user_id=owner_id,
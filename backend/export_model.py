@@ -0,0 +1,126 @@
+"""
+Export the YOLO vehicle detector for a CPU inference backend and verify it.
+
+Usage (from the backend directory):
+    python export_model.py --backend onnx
+    python export_model.py --backend onnx-int8 --verify path/to/frames/
+    python export_model.py --backend openvino --verify car.jpg
+
+Verification runs the PyTorch model and the exported model on the same images and
+reports per-image vehicle agreement (class + box IoU) and mean latency for both.
+Select the export at runtime with YOLO_BACKEND=<backend>.
+"""
+
+import argparse
+import glob
+import os
+import shutil
+import time
+
+from utils.yolo_backends import BACKENDS, backend_weights, load_detector
+
+# YOLOv8 COCO Classes: 2=car, 3=motorcycle, 5=bus, 7=truck
+VEHICLE_CLASSES = [2, 3, 5, 7]
+
+def export(base_weights: str, backend: str, imgsz: int) -> str:
+    from ultralytics import YOLO
+
+    target = backend_weights(backend, base_weights)
+    model = YOLO(base_weights)
+
+    if backend in ("onnx", "onnx-int8"):
+        # Dynamic axes keep batched inference (the /detect micro-batcher) working
+        onnx_path = model.export(format="onnx", imgsz=imgsz, dynamic=True, simplify=True)
+        if backend == "onnx-int8":
+            from onnxruntime.quantization import quantize_dynamic, QuantType
+            quantize_dynamic(onnx_path, target, weight_type=QuantType.QUInt8)
+        elif os.path.abspath(onnx_path) != os.path.abspath(target):
+            shutil.move(onnx_path, target)
+    elif backend == "openvino":
+        exported = model.export(format="openvino", imgsz=imgsz, dynamic=True)
+        if os.path.abspath(exported) != os.path.abspath(target):
+            shutil.move(exported, target)
+    else:
+        raise SystemExit("pytorch needs no export")
+
+    print(f"Exported {base_weights} -> {target}")
+    return target
+
+def _vehicles(results):
+    found = []
+    for r in results:
+        for box in r.boxes:
+            cls = int(box.cls[0])
+            conf = float(box.conf[0])
+            if cls in VEHICLE_CLASSES and conf > 0.4:
+                found.append((cls, tuple(map(float, box.xyxy[0]))))
+    return found
+
+def _iou(a, b):
+    ix1, iy1 = max(a[0], b[0]), max(a[1], b[1])
+    ix2, iy2 = min(a[2], b[2]), min(a[3], b[3])
+    inter = max(0.0, ix2 - ix1) * max(0.0, iy2 - iy1)
+    union = (a[2] - a[0]) * (a[3] - a[1]) + (b[2] - b[0]) * (b[3] - b[1]) - inter
+    return inter / union if union > 0 else 0.0
+
+def verify(base_weights: str, backend: str, sources, min_iou: float = 0.7) -> bool:
+    import cv2
+    import numpy as np
+
+    reference, _, _ = load_detector(base_weights, "pytorch")
+    candidate, used, _ = load_detector(base_weights, backend)
+    if used != backend:
+        raise SystemExit(f"Export for {backend} not found; run the export first.")
+
+    images = []
+    for source in sources:
+        paths = sorted(glob.glob(os.path.join(source, "*"))) if os.path.isdir(source) else [source]
+        for path in paths:
+            img = cv2.imread(path)
+            if img is not None:
+                images.append((path, img))
+    if not images:
+        print("No images given; verifying on a blank frame only (latency check).")
+        images = [("blank", np.zeros((640, 640, 3), dtype=np.uint8))]
+
+    # Warm both models so the first image does not skew latency
+    reference(images[0][1], verbose=False)
+    candidate(images[0][1], verbose=False)
+
+    ref_ms, cand_ms, mismatches = [], [], 0
+    for path, img in images:
+        start = time.perf_counter()
+        ref = _vehicles(reference(img, verbose=False))
+        ref_ms.append((time.perf_counter() - start) * 1000)
+
+        start = time.perf_counter()
+        cand = _vehicles(candidate(img, verbose=False))
+        cand_ms.append((time.perf_counter() - start) * 1000)
+
+        ok = len(ref) == len(cand) and all(
+            rc == cc and _iou(rb, cb) >= min_iou for (rc, rb), (cc, cb) in zip(ref, cand)
+        )
+        if not ok:
+            mismatches += 1
+            print(f"[MISMATCH] {path}: pytorch={ref} {backend}={cand}")
+
+    print(f"Images: {len(images)} | mismatches: {mismatches}")
+    print(f"pytorch mean latency: {sum(ref_ms) / len(ref_ms):.1f} ms")
+    print(f"{backend} mean latency: {sum(cand_ms) / len(cand_ms):.1f} ms")
+    return mismatches == 0
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Export and verify the YOLO vehicle detector for a CPU backend.")
+    parser.add_argument("--weights", default=os.getenv("YOLO_WEIGHTS", "yolov8n.pt"))
+    parser.add_argument("--backend", choices=[b for b in BACKENDS if b != "pytorch"], default="onnx")
+    parser.add_argument("--imgsz", type=int, default=640)
+    parser.add_argument("--verify", nargs="*", metavar="IMAGE_OR_DIR",
+                        help="compare against PyTorch on these images (omit paths for a blank-frame check)")
+    parser.add_argument("--skip-export", action="store_true", help="only verify an existing export")
+    args = parser.parse_args()
+
+    if not args.skip_export:
+        export(args.weights, args.backend, args.imgsz)
+    if args.verify is not None:
+        if not verify(args.weights, args.backend, args.verify):
+            raise SystemExit(1)
@@ -1,17 +1,45 @@
 from fastapi import FastAPI, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.staticfiles import StaticFiles
+from fastapi.responses import JSONResponse, PlainTextResponse
+from contextlib import asynccontextmanager
 from dotenv import load_dotenv
 import os
 import sys
+import time
 import os
 # Add the current directory to sys.path locally
 sys.path.append(os.path.dirname(os.path.abspath(__file__)))
-from endpoints import auth, vehicles, logs, notifications, stats, cameras, stream, detection, camera_server
+from endpoints import auth, vehicles, logs, notifications, stats, cameras, stream, detection, detect_ws, camera_server
+from utils.capture_lifecycle import ImmutableStaticFiles
 
 load_dotenv()
 
-app = FastAPI()
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    from mongo_client import ensure_indexes
+    import mongo_async
+    from model_registry import model_registry
+    from utils.vehicle_registry import vehicle_registry
+    from utils.inference_pool import inference_pool
+    from utils.capture_writer import capture_writer
+    from utils.capture_lifecycle import capture_pruner
+    from utils.outbox import outbox
+
+    ensure_indexes()
+    await mongo_async.connect()
+    # Models load (and warm up) in the background so the API is served immediately
+    model_registry.start_background_load()
+    vehicle_registry.start()
+    capture_pruner.start()
+    outbox.start()
+    yield
+    inference_pool.shutdown()
+    capture_writer.shutdown()
+    outbox.shutdown()
+    await mongo_async.close()
+
+app = FastAPI(lifespan=lifespan)
 
 app.add_middleware(
     CORSMiddleware,
@@ -39,7 +67,32 @@ class LimitUploadSize(BaseHTTPMiddleware):
 
 app.add_middleware(LimitUploadSize, max_upload_size=50_000_000) # 50MB
 
+class RequestMetrics(BaseHTTPMiddleware):
+    """Per-route HTTP latency histogram; labels use the route template, not the raw path."""
+
+    async def dispatch(self, request: Request, call_next):
+        from utils.metrics import http_request_seconds
+        start = time.perf_counter()
+        status = 500
+        try:
+            response = await call_next(request)
+            status = response.status_code
+            return response
+        finally:
+            route = request.scope.get("route")
+            http_request_seconds.observe(
+                time.perf_counter() - start,
+                request.method,
+                getattr(route, "path", "unmatched"),
+                str(status)
+            )
+
+app.add_middleware(RequestMetrics)
+
 os.makedirs("static/profiles", exist_ok=True)
+os.makedirs("static/captures", exist_ok=True)
+# Capture names are unique and never rewritten; mounted first so it wins over /static
+app.mount("/static/captures", ImmutableStaticFiles(directory="static/captures"), name="captures")
 app.mount("/static", StaticFiles(directory="static"), name="static")
 
 app.include_router(auth.router, prefix="/auth", tags=["Auth"])
@@ -47,11 +100,25 @@ app.include_router(vehicles.router, prefix="/vehicles", tags=["Vehicles"])
 app.include_router(logs.router, prefix="/logs", tags=["Access Logs"])
 app.include_router(stream.router, tags=["Camera Stream"])
 app.include_router(detection.router, tags=["AI Detection"])
+app.include_router(detect_ws.router, tags=["AI Detection"])
 app.include_router(camera_server.router, prefix="/camera-server", tags=["Backend Cameras"])
 app.include_router(notifications.router, prefix="/notifications", tags=["Notifications"])
 app.include_router(stats.router, prefix="/stats", tags=["Statistics"])
 app.include_router(cameras.router, prefix="/cameras", tags=["Cameras"])
 
+@app.get("/ready")
+def readiness():
+    """Readiness probe: which AI models are loaded and how long loading took."""
+    from model_registry import model_registry
+    status = model_registry.status()
+    return JSONResponse(status_code=200 if status["ready"] else 503, content=status)
+
+@app.get("/metrics")
+def metrics():
+    """Prometheus scrape endpoint (per worker process)."""
+    from utils.metrics import registry
+    return PlainTextResponse(registry.render(), media_type="text/plain; version=0.0.4")
+
 @app.get("/")
 def read_root():
     return {"message": "IntelliAccess Backend is running!"}
@@ -0,0 +1,45 @@
+"""
+One-shot migration: backfill `plate_key` on every vehicle and create the unique index.
+
+Run once from the backend directory after deploying the plate_key change:
+    python migrate_plate_keys.py
+
+Vehicles whose plates normalize to the same key are reported and left without
+a key so the index can still be built; resolve them by hand and re-run.
+"""
+
+from pymongo import UpdateOne
+from mongo_client import vehicles_collection, ensure_indexes
+from utils.plates import normalize_plate
+
+def backfill_plate_keys():
+    seen = {}
+    duplicates = []
+    updates = []
+
+    for v in vehicles_collection.find({}, {"_id": 1, "plate_number": 1, "plate_key": 1}):
+        plate_key = normalize_plate(v.get("plate_number"))
+        if not plate_key:
+            continue
+        if plate_key in seen:
+            duplicates.append((plate_key, seen[plate_key], v["_id"]))
+            continue
+        seen[plate_key] = v["_id"]
+        if v.get("plate_key") != plate_key:
+            updates.append(UpdateOne({"_id": v["_id"]}, {"$set": {"plate_key": plate_key}}))
+
+    if updates:
+        result = vehicles_collection.bulk_write(updates, ordered=False)
+        print(f"Backfilled plate_key on {result.modified_count} vehicles.")
+    else:
+        print("All vehicles already have an up-to-date plate_key.")
+
+    for plate_key, first_id, dup_id in duplicates:
+        print(f"[DUPLICATE] {plate_key}: {first_id} and {dup_id} normalize to the same plate")
+
+    return len(updates), duplicates
+
+if __name__ == "__main__":
+    backfill_plate_keys()
+    ensure_indexes()
+    print("plate_key index ready.")
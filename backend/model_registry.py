@@ -0,0 +1,147 @@
+"""
+Single shared registry for the AI models (YOLO vehicle detector + EasyOCR reader).
+
+Every consumer (detection, stream, camera_server) asks this module for its models,
+so a worker holds exactly one copy of each. Loading happens in a background thread
+started from the app lifespan so the API (e.g. /auth/login) is served immediately;
+each model gets a warmup inference on a dummy frame so the first real request does
+not pay lazy-initialization costs. `get_yolo()` / `get_reader()` block until loading
+finishes (and trigger it if nobody has), and `status()` backs the /ready endpoint.
+"""
+
+import os
+import threading
+import time
+
+try:
+    import numpy as np
+    NUMPY_AVAILABLE = True
+except Exception:
+    NUMPY_AVAILABLE = False
+
+try:
+    from ultralytics import YOLO
+    from utils.yolo_backends import load_detector, YOLO_BACKEND
+    YOLO_AVAILABLE = True
+except Exception as e:
+    print(f"Warning: 'ultralytics' failed to load: {e}. Vehicle detection disabled.")
+    YOLO_AVAILABLE = False
+
+try:
+    import easyocr
+    OCR_AVAILABLE = True
+except Exception as e:
+    print(f"Warning: 'easyocr' failed to load: {e}. License plate reading disabled.")
+    OCR_AVAILABLE = False
+
+YOLO_WEIGHTS = os.getenv("YOLO_WEIGHTS", "yolov8n.pt")  # .pt source; see utils/yolo_backends.py
+OCR_LANGUAGES = ["en"]
+
+class ModelRegistry:
+    def __init__(self):
+        self.yolo = None
+        self.reader = None
+        self._lock = threading.Lock()
+        self._loaded = threading.Event()
+        self._thread = None
+        self._status = {
+            "yolo": {"available": YOLO_AVAILABLE, "loaded": False, "load_seconds": None, "warmup_ms": None, "error": None,
+                     "backend": None, "weights": None},
+            "ocr": {"available": OCR_AVAILABLE, "loaded": False, "load_seconds": None, "warmup_ms": None, "error": None},
+        }
+        self.started_at = None
+        self.finished_at = None
+
+    @property
+    def ready(self) -> bool:
+        """True once loading finished and every installed model loaded successfully."""
+        if not self._loaded.is_set():
+            return False
+        return all(s["loaded"] for s in self._status.values() if s["available"])
+
+    def start_background_load(self):
+        """Kick off loading + warmup without blocking the caller."""
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self.load, name="model-loader", daemon=True)
+                self._thread.start()
+
+    def load(self):
+        """Load and warm up all available models. Safe to call more than once."""
+        if self._loaded.is_set():
+            return
+        self.started_at = time.time()
+
+        if YOLO_AVAILABLE and self.yolo is None:
+            self.yolo = self._load_model("yolo", self._load_yolo, self._warmup_yolo)
+        if OCR_AVAILABLE and self.reader is None:
+            self.reader = self._load_model("ocr", lambda: easyocr.Reader(OCR_LANGUAGES, gpu=False), self._warmup_reader)
+
+        self.finished_at = time.time()
+        self._loaded.set()
+
+    def _load_model(self, name: str, loader, warmup):
+        status = self._status[name]
+        try:
+            print(f"[MODELS] Loading {name}...")
+            start = time.perf_counter()
+            instance = loader()
+            status["load_seconds"] = round(time.perf_counter() - start, 2)
+
+            start = time.perf_counter()
+            warmup(instance)
+            status["warmup_ms"] = round((time.perf_counter() - start) * 1000, 1)
+            status["loaded"] = True
+            print(f"[MODELS] {name} ready in {status['load_seconds']}s (warmup {status['warmup_ms']}ms)")
+            return instance
+        except Exception as e:
+            status["error"] = str(e)
+            print(f"[MODELS] Failed to load {name}: {e}")
+            return None
+
+    def _load_yolo(self):
+        # PyTorch or an exported ONNX/OpenVINO model, per YOLO_BACKEND
+        model, backend, weights = load_detector(YOLO_WEIGHTS, YOLO_BACKEND)
+        self._status["yolo"]["backend"] = backend
+        self._status["yolo"]["weights"] = weights
+        return model
+
+    @staticmethod
+    def _warmup_yolo(model):
+        if NUMPY_AVAILABLE:
+            model(np.zeros((640, 640, 3), dtype=np.uint8), verbose=False)
+
+    @staticmethod
+    def _warmup_reader(reader):
+        if NUMPY_AVAILABLE:
+            dummy = np.full((64, 256), 255, dtype=np.uint8)
+            reader.recognize(dummy, horizontal_list=[[0, 256, 0, 64]], free_list=[], detail=1)
+
+    def _wait_loaded(self, timeout=None):
+        if not self._loaded.is_set():
+            self.start_background_load()
+            self._loaded.wait(timeout)
+
+    def get_yolo(self, timeout=None):
+        """The shared YOLO model, or None if ultralytics is missing or loading failed."""
+        self._wait_loaded(timeout)
+        return self.yolo
+
+    def get_reader(self, timeout=None):
+        """The shared EasyOCR reader, or None if easyocr is missing or loading failed."""
+        self._wait_loaded(timeout)
+        return self.reader
+
+    def status(self):
+        total = None
+        if self.started_at and self.finished_at:
+            total = round(self.finished_at - self.started_at, 2)
+        return {
+            "ready": self.ready,
+            "loading": self._thread is not None and not self._loaded.is_set(),
+            "total_load_seconds": total,
+            "models": {name: dict(s) for name, s in self._status.items()},
+        }
+
+# Global instance shared by every endpoint in this worker
+model_registry = ModelRegistry()
@@ -0,0 +1,58 @@
+"""
+Async MongoDB access for the API routers.
+
+The routers (auth, vehicles, logs, notifications, stats, cameras) await these
+collections on the event loop instead of each request holding one of the
+threadpool's 40 slots for its whole database round trip. Collection names match
+mongo_client.py; the pool settings (MONGODB_MAX_POOL_SIZE etc.) are shared with it.
+The detection pipeline and the background threads keep the sync client.
+
+The client connects lazily; the app lifespan calls `connect()` / `close()`.
+"""
+
+from pymongo import AsyncMongoClient
+from bson import ObjectId
+
+from mongo_client import MONGODB_URI, MONGODB_POOL_OPTIONS, notification_doc
+
+client = AsyncMongoClient(MONGODB_URI, connect=False, **MONGODB_POOL_OPTIONS)
+db = client['intelliaccess']
+
+users_collection = db['users']
+vehicles_collection = db['vehicles']
+access_logs_collection = db['access_logs'] # Granted logs
+denied_logs_collection = db['denied_logs'] # Denied logs
+notifications_collection = db['notifications']
+cameras_collection = db['cameras']
+
+async def connect():
+    """Open the pool before the first request instead of on it."""
+    try:
+        await client.aconnect()
+    except Exception as e:
+        print(f"Async MongoDB client failed to connect: {e}")
+
+async def close():
+    await client.close()
+
+async def log_notification(title: str, message: str, user_id: str = None, type: str = "system"):
+    """Async twin of mongo_client.log_notification."""
+    try:
+        await notifications_collection.insert_one(notification_doc(title, message, user_id, type))
+    except Exception as e:
+        print(f"Failed to log notification: {e}")
+
+async def find_by_ids(collection, ids, projection=None):
+    """
+    {str(_id): doc} for the given hex ids in one `$in` query, so list routes hydrate
+    owners/vehicles with a single round trip instead of one find_one per row.
+    Ids that are not valid ObjectIds are skipped.
+    """
+    object_ids = set()
+    for value in ids:
+        if value and ObjectId.is_valid(value):
+            object_ids.add(ObjectId(value))
+    if not object_ids:
+        return {}
+    cursor = collection.find({"_id": {"$in": list(object_ids)}}, projection)
+    return {str(doc["_id"]): doc async for doc in cursor}
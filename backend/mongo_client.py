@@ -5,7 +5,19 @@ from dotenv import load_dotenv
 load_dotenv()
 
 MONGODB_URI = os.getenv("MONGODB_URI", "mongodb://localhost:27017")
-client = MongoClient(MONGODB_URI)
+
+# Connection pool settings shared by this (sync) client and the async one in mongo_async.py.
+# A request that cannot get a connection within waitQueueTimeoutMS fails instead of queueing forever.
+MONGODB_POOL_OPTIONS = {
+    "maxPoolSize": int(os.getenv("MONGODB_MAX_POOL_SIZE", "100")),
+    "minPoolSize": int(os.getenv("MONGODB_MIN_POOL_SIZE", "10")),
+    "maxIdleTimeMS": int(os.getenv("MONGODB_MAX_IDLE_TIME_MS", "60000")),
+    "waitQueueTimeoutMS": int(os.getenv("MONGODB_WAIT_QUEUE_TIMEOUT_MS", "5000")),
+    "serverSelectionTimeoutMS": int(os.getenv("MONGODB_SERVER_SELECTION_TIMEOUT_MS", "5000")),
+}
+
+# Used by the detection pipeline, background threads and scripts; API routers use mongo_async
+client = MongoClient(MONGODB_URI, **MONGODB_POOL_OPTIONS)
 
 # Use a database named 'intelliaccess'
 db = client['intelliaccess']
@@ -19,6 +31,17 @@ notifications_collection = db['notifications']
 cameras_collection = db['cameras']
 from datetime import datetime
 
+def notification_doc(title: str, message: str, user_id: str = None, type: str = "system"):
+    """The notifications document log_notification inserts (also used by the outbox)."""
+    return {
+        "title": title,
+        "message": message,
+        "user_id": user_id,
+        "type": type,
+        "read": False,
+        "created_at": datetime.utcnow().isoformat()
+    }
+
 def log_notification(title: str, message: str, user_id: str = None, type: str = "system"):
     """
     Helper function to insert a notification into the global timeline.
@@ -27,16 +50,31 @@ def log_notification(title: str, message: str, user_id: str = None, type: str =
     Type can be: 'system', 'user', 'alert', 'update'
     """
     try:
-        doc = {
-            "title": title,
-            "message": message,
-            "user_id": user_id,
-            "type": type,
-            "read": False,
-            "created_at": datetime.utcnow().isoformat()
-        }
-        notifications_collection.insert_one(doc)
+        notifications_collection.insert_one(notification_doc(title, message, user_id, type))
     except Exception as e:
         print(f"Failed to log notification: {e}")
 
+def ensure_indexes():
+    """
+    Create the indexes the gate hot path depends on. Safe to call on every startup.
+    `plate_key` is unique only where it is set, so vehicles that have not been
+    backfilled yet (see migrate_plate_keys.py) do not collide on a null key.
+    """
+    try:
+        vehicles_collection.create_index(
+            "plate_key",
+            name="plate_key_unique",
+            unique=True,
+            partialFilterExpression={"plate_key": {"$type": "string"}}
+        )
+    except Exception as e:
+        print(f"Failed to create plate_key index (run migrate_plate_keys.py to resolve duplicates): {e}")
+
+    # Log listings sort by timestamp and the capture pruner scans expired entries by it
+    for collection in (access_logs_collection, denied_logs_collection):
+        try:
+            collection.create_index("timestamp", name="timestamp")
+        except Exception as e:
+            print(f"Failed to create timestamp index on {collection.name}: {e}")
+
 print("MongoDB client initialized.")
@@ -0,0 +1,69 @@
+"""
+Process-mode inference pool: job errors must come back as InferenceError and never
+break the pool. Run with pytest, or directly: python test_inference_pool.py
+"""
+
+import asyncio
+import os
+import pickle
+
+from utils.inference_pool import InferencePool, InferenceError
+
+def _reject(status_code, detail):
+    raise InferenceError(status_code, detail)
+
+def _crash():
+    os._exit(1)
+
+def _ok():
+    return "ok"
+
+def _run(pool, fn, *args):
+    try:
+        return asyncio.run(pool.run(fn, *args))
+    except InferenceError as e:
+        return e
+
+def test_inference_error_pickles():
+    error = pickle.loads(pickle.dumps(InferenceError(400, "bad upload")))
+    assert (error.status_code, error.detail) == (400, "bad upload")
+
+def test_job_error_keeps_pool_alive():
+    pool = InferencePool(kind="process", workers=1)
+    try:
+        error = _run(pool, _reject, 503, "Vehicle detection model is not available")
+        assert isinstance(error, InferenceError) and error.status_code == 503
+        assert _run(pool, _ok) == "ok"
+    finally:
+        pool.shutdown()
+
+def test_crashed_worker_restarts_pool():
+    pool = InferencePool(kind="process", workers=1)
+    try:
+        error = _run(pool, _crash)
+        assert isinstance(error, InferenceError) and error.status_code == 503
+        assert _run(pool, _ok) == "ok"
+    finally:
+        pool.shutdown()
+
+def test_invalid_image_in_process_mode():
+    try:
+        from endpoints.detection import _process_detection
+    except ImportError as e:
+        print(f"Skipping /detect pipeline check: {e}")
+        return
+    pool = InferencePool(kind="process", workers=1)
+    try:
+        for _ in range(2):
+            # Each bad upload is a 400, and the pool keeps serving afterwards
+            error = _run(pool, _process_detection, b"not an image")
+            assert isinstance(error, InferenceError) and error.status_code == 400
+        assert _run(pool, _ok) == "ok"
+    finally:
+        pool.shutdown()
+
+if __name__ == "__main__":
+    for name, test in list(globals().items()):
+        if name.startswith("test_") and callable(test):
+            test()
+            print(f"{name}: OK")
@@ -0,0 +1,77 @@
+"""
+Last granted action (Entry/Exit) per vehicle for the gate fast path.
+
+Deciding Entry vs Exit used to query `access_logs` for the vehicle's newest log on
+every read. With log inserts deferred to the outbox the database may also lag the
+decisions just made, so the last action per vehicle lives in the `last_actions`
+table of the outbox's SQLite file (OUTBOX_PATH), shared by every uvicorn worker on
+the host. The outbox writes it in the same transaction that queues a granted log
+(`record_in`), and manual logs (`POST /logs`) record theirs directly. A vehicle
+with no row yet falls back to one `access_logs` lookup, whose result is stored
+without overwriting a decision recorded meanwhile.
+"""
+
+import sqlite3
+import threading
+
+# Importing the outbox creates the last_actions table in its file
+from utils.outbox import OUTBOX_PATH
+
+class LastActionStore:
+    def __init__(self, path: str = OUTBOX_PATH):
+        self.path = path
+        self._local = threading.local()
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+    def _connect(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=5, isolation_level=None)
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    @staticmethod
+    def record_in(conn, vehicle_id: str, action: str, timestamp: str):
+        """Record a decision on `conn`, inside the caller's transaction."""
+        conn.execute("INSERT OR REPLACE INTO last_actions VALUES (?, ?, ?)", (vehicle_id, action, timestamp))
+
+    def get(self, vehicle_id: str):
+        """(action, iso timestamp) of the vehicle's last granted log, or None."""
+        conn = self._connect()
+        row = conn.execute(
+            "SELECT action, timestamp FROM last_actions WHERE vehicle_id = ?", (vehicle_id,)).fetchone()
+        with self._lock:
+            if row is not None:
+                self.hits += 1
+            else:
+                self.misses += 1
+        if row is not None:
+            return row if row[0] else None
+
+        from mongo_client import access_logs_collection
+        last_log = access_logs_collection.find_one(
+            {"vehicle_id": vehicle_id},
+            {"action": 1, "timestamp": 1},
+            sort=[("timestamp", -1)]
+        )
+        entry = ("", None)
+        if last_log:
+            timestamp = last_log.get("timestamp")
+            entry = (last_log.get("action"), timestamp.isoformat() if hasattr(timestamp, "isoformat") else timestamp)
+        # A decision recorded while we were querying is newer than the database
+        conn.execute("INSERT OR IGNORE INTO last_actions VALUES (?, ?, ?)", (vehicle_id, *entry))
+        row = conn.execute(
+            "SELECT action, timestamp FROM last_actions WHERE vehicle_id = ?", (vehicle_id,)).fetchone()
+        return row if row and row[0] else None
+
+    def record(self, vehicle_id: str, action: str, timestamp: str):
+        self.record_in(self._connect(), vehicle_id, action, timestamp)
+
+    def stats(self):
+        with self._lock:
+            return {"hits": self.hits, "misses": self.misses}
+
+last_actions = LastActionStore()
@@ -0,0 +1,102 @@
+"""
+Micro-batching for model inference.
+
+Several gate kiosks posting frames at once would otherwise each run YOLO with a
+batch of one. Callers (inference pool threads, camera loops) call `submit(frame)`
+and block; a collector thread gathers frames for up to `max_wait_ms` or until
+`max_batch_size` are queued, runs one batched call and hands each caller its own
+result. Batches can only be as large as the number of concurrent callers, so
+size INFERENCE_WORKERS to at least the batch size you want to reach.
+"""
+
+import queue
+import threading
+import time
+from concurrent.futures import Future
+
+from utils.metrics import batch_size
+
+class MicroBatcher:
+    def __init__(self, batch_fn, max_batch_size: int = 8, max_wait_ms: float = 5.0, name: str = "batcher"):
+        """
+        batch_fn(items) -> results must return one result per item, in order.
+        """
+        self.batch_fn = batch_fn
+        self.max_batch_size = max(1, max_batch_size)
+        self.max_wait = max(0.0, max_wait_ms) / 1000.0
+        self.name = name
+        self._queue = queue.Queue()
+        self._thread = None
+        self._start_lock = threading.Lock()
+        self._stats_lock = threading.Lock()
+        self._batches = 0
+        self._items = 0
+        self._size_counts = {}   # batch size -> number of batches run at that size
+        self._wait_total = 0.0
+
+    def _ensure_started(self):
+        with self._start_lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._collect_loop, name=self.name, daemon=True)
+                self._thread.start()
+
+    def submit(self, item):
+        """Queue one item and block until its result (or the batch's exception) is ready."""
+        if self.max_batch_size == 1:
+            started = time.perf_counter()
+            self._record([started], started)
+            return self.batch_fn([item])[0]
+
+        self._ensure_started()
+        future = Future()
+        self._queue.put((item, future, time.perf_counter()))
+        return future.result()
+
+    def _collect_loop(self):
+        while True:
+            batch = [self._queue.get()]
+            deadline = time.perf_counter() + self.max_wait
+            while len(batch) < self.max_batch_size:
+                remaining = deadline - time.perf_counter()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(self._queue.get(timeout=remaining))
+                except queue.Empty:
+                    break
+
+            items = [entry[0] for entry in batch]
+            started = time.perf_counter()
+            self._record([entry[2] for entry in batch], started)
+            try:
+                results = list(self.batch_fn(items))
+                if len(results) != len(items):
+                    raise RuntimeError(f"{self.name}: batch_fn returned {len(results)} results for {len(items)} items")
+                for (_, future, _), result in zip(batch, results):
+                    future.set_result(result)
+            except Exception as e:
+                for _, future, _ in batch:
+                    if not future.done():
+                        future.set_exception(e)
+
+    def _record(self, enqueued_at, started):
+        size = len(enqueued_at)
+        with self._stats_lock:
+            self._batches += 1
+            self._items += size
+            self._size_counts[size] = self._size_counts.get(size, 0) + 1
+            self._wait_total += sum(started - t for t in enqueued_at)
+        batch_size.observe(size, self.name)
+
+    def stats(self):
+        with self._stats_lock:
+            return {
+                "max_batch_size": self.max_batch_size,
+                "max_wait_ms": round(self.max_wait * 1000, 2),
+                "batches": self._batches,
+                "items": self._items,
+                "avg_batch_size": round(self._items / self._batches, 2) if self._batches else 0.0,
+                "avg_queue_wait_ms": round(self._wait_total / self._items * 1000, 2) if self._items else 0.0,
+                "batch_size_counts": dict(sorted(self._size_counts.items())),
+                "queue_depth": self._queue.qsize(),
+            }
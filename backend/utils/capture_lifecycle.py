@@ -0,0 +1,141 @@
+"""
+Capture lifecycle: retention, pruning and HTTP caching of `static/captures`.
+
+Captures (and the thumbnails the capture writer stores next to them) are kept only
+as long as their access log needs them:
+  - granted captures for CAPTURE_RETENTION_GRANTED_DAYS (default 90),
+  - denied captures for CAPTURE_RETENTION_DENIED_DAYS (default 30).
+A background pruner runs every CAPTURE_PRUNE_INTERVAL_SECONDS: it deletes the files
+of expired log entries and clears their `image_url` / `thumbnail_url`, then sweeps
+files older than the longest retention that no log points at (e.g. legacy captures).
+
+Capture names are unique and never rewritten, so `ImmutableStaticFiles` serves them
+with a one-year immutable Cache-Control header.
+"""
+
+import os
+import threading
+import time
+from datetime import datetime, timedelta
+
+from fastapi.staticfiles import StaticFiles
+
+from utils.capture_writer import CAPTURE_ROOT, CAPTURE_URL_PREFIX, thumbnail_url
+
+CAPTURE_RETENTION_GRANTED_DAYS = float(os.getenv("CAPTURE_RETENTION_GRANTED_DAYS", "90"))
+CAPTURE_RETENTION_DENIED_DAYS = float(os.getenv("CAPTURE_RETENTION_DENIED_DAYS", "30"))
+CAPTURE_PRUNE_INTERVAL_SECONDS = float(os.getenv("CAPTURE_PRUNE_INTERVAL_SECONDS", "3600"))
+
+IMMUTABLE_CACHE_CONTROL = "public, max-age=31536000, immutable"
+
+class ImmutableStaticFiles(StaticFiles):
+    """StaticFiles for content-addressed-style files that never change once written."""
+
+    def file_response(self, *args, **kwargs):
+        response = super().file_response(*args, **kwargs)
+        response.headers["Cache-Control"] = IMMUTABLE_CACHE_CONTROL
+        return response
+
+def with_thumbnail(log: dict) -> dict:
+    """Give a log document a `thumbnail_url`, falling back to the full capture for legacy logs."""
+    log["thumbnail_url"] = log.get("thumbnail_url") or log.get("image_url")
+    return log
+
+def _capture_path(image_url: str):
+    """Filesystem path of a capture URL, or None for URLs outside the captures directory."""
+    if not image_url or not image_url.startswith(CAPTURE_URL_PREFIX + "/"):
+        return None
+    relative = image_url[len(CAPTURE_URL_PREFIX) + 1:]
+    path = os.path.normpath(os.path.join(CAPTURE_ROOT, *relative.split("/")))
+    return path if path.startswith(os.path.normpath(CAPTURE_ROOT) + os.sep) else None
+
+def _remove(path: str) -> bool:
+    try:
+        os.remove(path)
+        return True
+    except FileNotFoundError:
+        return False
+    except Exception as e:
+        print(f"[CAPTURES] Failed to delete {path}: {e}")
+        return False
+
+class CapturePruner:
+    def __init__(self, interval_seconds: float = CAPTURE_PRUNE_INTERVAL_SECONDS):
+        self.interval_seconds = interval_seconds
+        self._thread = None
+        self._lock = threading.Lock()
+        self.last_run = None
+        self.files_deleted = 0
+        self.logs_cleared = 0
+
+    def start(self):
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="capture-pruner", daemon=True)
+                self._thread.start()
+
+    def _run(self):
+        while True:
+            try:
+                self.prune()
+            except Exception as e:
+                print(f"[CAPTURES] Prune failed: {e}")
+            time.sleep(self.interval_seconds)
+
+    def prune(self):
+        from mongo_client import access_logs_collection, denied_logs_collection
+
+        now = datetime.now()
+        for collection, days in ((access_logs_collection, CAPTURE_RETENTION_GRANTED_DAYS),
+                                 (denied_logs_collection, CAPTURE_RETENTION_DENIED_DAYS)):
+            self._prune_collection(collection, (now - timedelta(days=days)).isoformat())
+        self._sweep_orphans(time.time() - max(CAPTURE_RETENTION_GRANTED_DAYS, CAPTURE_RETENTION_DENIED_DAYS) * 86400)
+        self.last_run = now.isoformat()
+
+    def _prune_collection(self, collection, cutoff: str):
+        expired = list(collection.find(
+            {"image_url": {"$ne": None}, "timestamp": {"$lt": cutoff}},
+            {"_id": 1, "image_url": 1, "thumbnail_url": 1}
+        ))
+        if not expired:
+            return
+        for log in expired:
+            for url in (log.get("image_url"), log.get("thumbnail_url") or thumbnail_url(log.get("image_url"))):
+                path = _capture_path(url)
+                if path and _remove(path):
+                    self.files_deleted += 1
+        result = collection.update_many(
+            {"_id": {"$in": [log["_id"] for log in expired]}},
+            {"$set": {"image_url": None, "thumbnail_url": None}}
+        )
+        self.logs_cleared += result.modified_count
+        print(f"[CAPTURES] Pruned {result.modified_count} expired captures from {collection.name}")
+
+    def _sweep_orphans(self, cutoff_epoch: float):
+        """Delete capture files (and empty shard dirs) older than the longest retention."""
+        if not os.path.isdir(CAPTURE_ROOT):
+            return
+        for dirpath, dirnames, filenames in os.walk(CAPTURE_ROOT, topdown=False):
+            for filename in filenames:
+                path = os.path.join(dirpath, filename)
+                try:
+                    if os.path.getmtime(path) < cutoff_epoch and _remove(path):
+                        self.files_deleted += 1
+                except OSError:
+                    pass
+            if dirpath != CAPTURE_ROOT and not os.listdir(dirpath) and os.path.getmtime(dirpath) < cutoff_epoch:
+                try:
+                    os.rmdir(dirpath)
+                except OSError:
+                    pass
+
+    def stats(self):
+        return {
+            "last_run": self.last_run,
+            "files_deleted": self.files_deleted,
+            "logs_cleared": self.logs_cleared,
+            "retention_days": {"granted": CAPTURE_RETENTION_GRANTED_DAYS, "denied": CAPTURE_RETENTION_DENIED_DAYS},
+        }
+
+# Started once per worker from the app lifespan
+capture_pruner = CapturePruner()
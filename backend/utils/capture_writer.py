@@ -0,0 +1,150 @@
+"""
+Background writer for access-event captures.
+
+Encoding a full frame and writing it to disk used to happen inline on the /detect
+worker and the stream thread, into one flat `static/captures/` directory with names
+from `int(time.time())`, so two plates in the same second overwrote each other.
+
+`capture_writer.save(frame, camera_id)` now:
+  - builds a unique name from the camera id, a millisecond timestamp, the process id
+    and a per-process monotonic sequence,
+  - places it in a date-sharded directory `static/captures/YYYY/MM/DD/`,
+  - returns the public image URL immediately, and
+  - leaves the encode + write to a background thread, which also stores a small
+    JPEG thumbnail next to it (`<name>.thumb.jpg`, see `thumbnail_url`) for list views.
+The frame is handed over: callers must not modify it after `save`. If the queue is
+full the capture is written synchronously so the returned URL never dangles.
+
+Settings:
+    CAPTURE_FORMAT       "jpg" (default) or "webp"
+    CAPTURE_QUALITY      encoder quality 1-100 (default 85)
+    CAPTURE_QUEUE_LIMIT  captures allowed to wait for the writer (default 64)
+    THUMBNAIL_WIDTH      thumbnail width in px (default 320)
+"""
+
+import itertools
+import os
+import queue
+import re
+import threading
+import time
+from datetime import datetime
+
+from utils.metrics import observe_stage
+
+try:
+    import cv2
+    OPENCV_AVAILABLE = True
+except Exception as e:
+    print(f"Warning: 'cv2' failed to load: {e}. Capture writing disabled.")
+    OPENCV_AVAILABLE = False
+
+CAPTURE_ROOT = os.path.join("static", "captures")
+CAPTURE_URL_PREFIX = "/static/captures"
+CAPTURE_FORMAT = os.getenv("CAPTURE_FORMAT", "jpg").lower()
+CAPTURE_QUALITY = int(os.getenv("CAPTURE_QUALITY", "85"))
+CAPTURE_QUEUE_LIMIT = int(os.getenv("CAPTURE_QUEUE_LIMIT", "64"))
+THUMBNAIL_WIDTH = int(os.getenv("THUMBNAIL_WIDTH", "320"))
+THUMBNAIL_QUALITY = 70
+THUMBNAIL_SUFFIX = ".thumb.jpg"
+
+def thumbnail_url(image_url: str):
+    """URL of the thumbnail stored alongside a capture (None for no capture)."""
+    if not image_url:
+        return None
+    return os.path.splitext(image_url)[0] + THUMBNAIL_SUFFIX
+
+def thumbnail_path(path: str) -> str:
+    return os.path.splitext(path)[0] + THUMBNAIL_SUFFIX
+
+def _encode_params(fmt: str, quality: int):
+    if fmt == "webp":
+        return [cv2.IMWRITE_WEBP_QUALITY, quality]
+    return [cv2.IMWRITE_JPEG_QUALITY, quality]
+
+class CaptureWriter:
+    def __init__(self, root: str = CAPTURE_ROOT, fmt: str = CAPTURE_FORMAT,
+                 quality: int = CAPTURE_QUALITY, queue_limit: int = CAPTURE_QUEUE_LIMIT):
+        self.root = root
+        self.fmt = fmt if fmt in ("jpg", "webp") else "jpg"
+        self.quality = quality
+        self._queue = queue.Queue(maxsize=max(1, queue_limit))
+        self._sequence = itertools.count(1)
+        self._thread = None
+        self._lock = threading.Lock()
+        self.written = 0
+        self.failed = 0
+        self.sync_writes = 0
+
+    def _start(self):
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="capture-writer", daemon=True)
+                self._thread.start()
+
+    def _new_path(self, camera_id: str):
+        """(filesystem path, URL) of a new, unique capture for this camera."""
+        now = datetime.now()
+        shard = now.strftime("%Y/%m/%d")
+        camera = re.sub(r"[^A-Za-z0-9_-]", "-", camera_id or "camera")
+        filename = f"{camera}_{int(time.time() * 1000)}_{os.getpid()}-{next(self._sequence):06d}.{self.fmt}"
+        path = os.path.join(self.root, *shard.split("/"), filename)
+        return path, f"{CAPTURE_URL_PREFIX}/{shard}/{filename}"
+
+    def save(self, frame, camera_id: str) -> str:
+        """Queue `frame` for writing and return its image URL right away."""
+        path, url = self._new_path(camera_id)
+        self._start()
+        try:
+            self._queue.put_nowait((frame, path))
+        except queue.Full:
+            self.sync_writes += 1
+            self._write(frame, path)
+        return url
+
+    def _write(self, frame, path: str):
+        start = time.perf_counter()
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            if not cv2.imwrite(path, frame, _encode_params(self.fmt, self.quality)):
+                raise IOError("encoder returned False")
+            h, w = frame.shape[:2]
+            if w > THUMBNAIL_WIDTH:
+                thumb = cv2.resize(frame, (THUMBNAIL_WIDTH, max(1, h * THUMBNAIL_WIDTH // w)), interpolation=cv2.INTER_AREA)
+            else:
+                thumb = frame
+            cv2.imwrite(thumbnail_path(path), thumb, [cv2.IMWRITE_JPEG_QUALITY, THUMBNAIL_QUALITY])
+            self.written += 1
+            observe_stage("capture_write", time.perf_counter() - start)
+        except Exception as e:
+            self.failed += 1
+            print(f"[CAPTURE] Failed to write {path}: {e}")
+
+    def _run(self):
+        while True:
+            item = self._queue.get()
+            if item is None:
+                self._queue.task_done()
+                return
+            self._write(*item)
+            self._queue.task_done()
+
+    def shutdown(self):
+        """Write out everything still queued, then stop the writer thread."""
+        if self._thread is not None:
+            self._queue.put(None)
+            self._thread.join()
+            self._thread = None
+
+    def stats(self):
+        return {
+            "queued": self._queue.qsize(),
+            "written": self.written,
+            "failed": self.failed,
+            "sync_writes": self.sync_writes,
+            "format": self.fmt,
+            "quality": self.quality,
+        }
+
+# Shared by /detect, the backend camera scanner and the live stream
+capture_writer = CaptureWriter()
@@ -0,0 +1,233 @@
+"""
+Plate cooldown / dedup store shared by every detection path.
+
+`/detect`, the backend camera scanner and the live stream all ask the same store
+before acting on a plate, through named cooldowns with a fixed TTL each:
+    gate_cooldown  a plate was just granted; ignore it for COOLDOWN_SECONDS (60)
+    log_dedup      the stream just logged/considered a plate; skip it for
+                   STREAM_LOG_COOLDOWN_SECONDS (30)
+Keys are normalized plates, so "ABC 123" and "ABC123" share an entry.
+
+Backends (COOLDOWN_BACKEND):
+    memory  per-process; one OrderedDict per cooldown. A cooldown's TTL is fixed, so
+            insertion order is expiry order and eviction pops expired entries off
+            the front in O(1) each; COOLDOWN_MAX_ENTRIES bounds every cooldown.
+    sqlite  a WAL-mode SQLite file (COOLDOWN_SQLITE_PATH) shared by the uvicorn
+            workers on one host.
+    mongo   the `cooldowns` collection with a TTL index, shared across hosts.
+"""
+
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime, timedelta
+
+from utils.plates import normalize_plate
+
+COOLDOWN_BACKEND = os.getenv("COOLDOWN_BACKEND", "memory").lower()
+COOLDOWN_SQLITE_PATH = os.getenv("COOLDOWN_SQLITE_PATH", "cooldowns.db")
+COOLDOWN_MAX_ENTRIES = int(os.getenv("COOLDOWN_MAX_ENTRIES", "10000"))
+COOLDOWN_SECONDS = float(os.getenv("COOLDOWN_SECONDS", "60"))
+STREAM_LOG_COOLDOWN_SECONDS = float(os.getenv("STREAM_LOG_COOLDOWN_SECONDS", "30"))
+
+class MemoryBackend:
+    def __init__(self, max_entries: int = COOLDOWN_MAX_ENTRIES):
+        self.max_entries = max_entries
+        self._scopes = {}   # scope -> OrderedDict(key -> expires_at), oldest first
+        self._lock = threading.Lock()
+
+    def _entries(self, scope: str, now: float):
+        entries = self._scopes.setdefault(scope, OrderedDict())
+        while entries:
+            key, expires_at = next(iter(entries.items()))
+            if expires_at > now:
+                break
+            entries.popitem(last=False)
+        return entries
+
+    def remaining(self, scope: str, key: str) -> float:
+        now = time.time()
+        with self._lock:
+            return max(0.0, self._entries(scope, now).get(key, now) - now)
+
+    def acquire(self, scope: str, key: str, ttl: float) -> float:
+        now = time.time()
+        with self._lock:
+            entries = self._entries(scope, now)
+            if key in entries:
+                return entries[key] - now
+            entries[key] = now + ttl
+            while len(entries) > self.max_entries:
+                entries.popitem(last=False)
+            return 0.0
+
+    def mark(self, scope: str, key: str, ttl: float):
+        now = time.time()
+        with self._lock:
+            entries = self._entries(scope, now)
+            entries.pop(key, None)
+            entries[key] = now + ttl
+            while len(entries) > self.max_entries:
+                entries.popitem(last=False)
+
+    def size(self) -> int:
+        with self._lock:
+            return sum(len(entries) for entries in self._scopes.values())
+
+class SqliteBackend:
+    # Expired rows are deleted every this many writes (plus on read, by the expiry check)
+    CLEANUP_EVERY = 100
+
+    def __init__(self, path: str = COOLDOWN_SQLITE_PATH):
+        self.path = path
+        self._local = threading.local()
+        self._writes = 0
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS cooldowns ("
+                " scope TEXT NOT NULL, key TEXT NOT NULL, expires_at REAL NOT NULL,"
+                " PRIMARY KEY (scope, key))"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS cooldowns_expires_at ON cooldowns (expires_at)")
+
+    def _connect(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=5, isolation_level=None)
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def _cleanup(self, conn, now: float):
+        self._writes += 1
+        if self._writes % self.CLEANUP_EVERY == 0:
+            conn.execute("DELETE FROM cooldowns WHERE expires_at <= ?", (now,))
+
+    def remaining(self, scope: str, key: str) -> float:
+        now = time.time()
+        row = self._connect().execute(
+            "SELECT expires_at FROM cooldowns WHERE scope = ? AND key = ? AND expires_at > ?",
+            (scope, key, now)
+        ).fetchone()
+        return row[0] - now if row else 0.0
+
+    def acquire(self, scope: str, key: str, ttl: float) -> float:
+        now = time.time()
+        conn = self._connect()
+        # IMMEDIATE takes the write lock up front so two workers cannot both acquire
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            row = conn.execute(
+                "SELECT expires_at FROM cooldowns WHERE scope = ? AND key = ? AND expires_at > ?",
+                (scope, key, now)
+            ).fetchone()
+            if row is None:
+                conn.execute("INSERT OR REPLACE INTO cooldowns VALUES (?, ?, ?)", (scope, key, now + ttl))
+                self._cleanup(conn, now)
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        return row[0] - now if row else 0.0
+
+    def mark(self, scope: str, key: str, ttl: float):
+        now = time.time()
+        conn = self._connect()
+        conn.execute("INSERT OR REPLACE INTO cooldowns VALUES (?, ?, ?)", (scope, key, now + ttl))
+        self._cleanup(conn, now)
+
+    def size(self) -> int:
+        return self._connect().execute(
+            "SELECT COUNT(*) FROM cooldowns WHERE expires_at > ?", (time.time(),)).fetchone()[0]
+
+class MongoBackend:
+    def __init__(self):
+        from mongo_client import db
+        self.collection = db["cooldowns"]
+        try:
+            # MongoDB removes expired entries itself (its TTL monitor runs about once a minute)
+            self.collection.create_index("expires_at", name="expires_at_ttl", expireAfterSeconds=0)
+        except Exception as e:
+            print(f"[COOLDOWN] Failed to create TTL index: {e}")
+
+    @staticmethod
+    def _id(scope: str, key: str) -> str:
+        return f"{scope}:{key}"
+
+    def remaining(self, scope: str, key: str) -> float:
+        now = datetime.utcnow()
+        doc = self.collection.find_one({"_id": self._id(scope, key), "expires_at": {"$gt": now}})
+        return (doc["expires_at"] - now).total_seconds() if doc else 0.0
+
+    def acquire(self, scope: str, key: str, ttl: float) -> float:
+        from pymongo.errors import DuplicateKeyError
+
+        now = datetime.utcnow()
+        try:
+            # Matches only a missing or expired entry; a live one makes the upsert collide on _id
+            self.collection.update_one(
+                {"_id": self._id(scope, key), "expires_at": {"$lte": now}},
+                {"$set": {"expires_at": now + timedelta(seconds=ttl)}},
+                upsert=True
+            )
+            return 0.0
+        except DuplicateKeyError:
+            return self.remaining(scope, key)
+
+    def mark(self, scope: str, key: str, ttl: float):
+        self.collection.update_one(
+            {"_id": self._id(scope, key)},
+            {"$set": {"expires_at": datetime.utcnow() + timedelta(seconds=ttl)}},
+            upsert=True
+        )
+
+    def size(self) -> int:
+        return self.collection.count_documents({"expires_at": {"$gt": datetime.utcnow()}})
+
+def _create_backend(name: str):
+    try:
+        if name == "sqlite":
+            return SqliteBackend()
+        if name == "mongo":
+            return MongoBackend()
+    except Exception as e:
+        print(f"[COOLDOWN] {name} backend unavailable ({e}); using in-memory cooldowns.")
+    return MemoryBackend()
+
+class Cooldown:
+    """A named cooldown with a fixed TTL on the shared backend."""
+
+    def __init__(self, backend, scope: str, ttl_seconds: float):
+        self.backend = backend
+        self.scope = scope
+        self.ttl_seconds = ttl_seconds
+
+    def remaining(self, plate: str) -> float:
+        """Seconds left on this plate's cooldown, 0 if it is not cooling down."""
+        try:
+            return self.backend.remaining(self.scope, normalize_plate(plate))
+        except Exception as e:
+            print(f"[COOLDOWN] {self.scope} lookup failed: {e}")
+            return 0.0
+
+    def acquire(self, plate: str) -> float:
+        """Atomically start the cooldown if it is not running; returns the seconds left (0 = acquired)."""
+        try:
+            return self.backend.acquire(self.scope, normalize_plate(plate), self.ttl_seconds)
+        except Exception as e:
+            print(f"[COOLDOWN] {self.scope} acquire failed: {e}")
+            return 0.0
+
+    def mark(self, plate: str):
+        """(Re)start this plate's cooldown."""
+        try:
+            self.backend.mark(self.scope, normalize_plate(plate), self.ttl_seconds)
+        except Exception as e:
+            print(f"[COOLDOWN] {self.scope} update failed: {e}")
+
+cooldown_backend = _create_backend(COOLDOWN_BACKEND)
+gate_cooldown = Cooldown(cooldown_backend, "gate", COOLDOWN_SECONDS)
+log_dedup = Cooldown(cooldown_backend, "stream-log", STREAM_LOG_COOLDOWN_SECONDS)
@@ -0,0 +1,86 @@
+"""
+JPEG encoding of live-feed frames per quality tier, once per frame and tier.
+
+Viewers of `/live-feed` pick a tier (?tier=...). Whichever viewer first needs the
+newest frame in a tier encodes it; every other viewer of that tier reuses the
+bytes, so encoding cost grows with the number of tiers in use, not of viewers.
+    tier    width (px)   JPEG quality   default max fps per viewer
+    full    camera       90             uncapped
+    medium  960          75             15
+    low     640          60             8
+    thumb   320          50             2
+Frames are only ever downscaled; a tier wider than the camera keeps its size.
+"""
+
+import threading
+import time
+
+try:
+    import cv2
+    OPENCV_AVAILABLE = True
+except Exception as e:
+    print(f"Warning: 'cv2' failed to load: {e}. Feed encoding disabled.")
+    OPENCV_AVAILABLE = False
+
+from utils.metrics import observe_stage
+
+FEED_TIERS = {
+    "full": {"width": None, "quality": 90, "max_fps": 0},
+    "medium": {"width": 960, "quality": 75, "max_fps": 15},
+    "low": {"width": 640, "quality": 60, "max_fps": 8},
+    "thumb": {"width": 320, "quality": 50, "max_fps": 2},
+}
+DEFAULT_FEED_TIER = "full"
+
+class TieredEncoder:
+    def __init__(self, tiers: dict = FEED_TIERS):
+        self.tiers = tiers
+        self._lock = threading.Lock()
+        # One lock per tier so two viewers of a tier never encode the same frame twice
+        self._tier_locks = {tier: threading.Lock() for tier in tiers}
+        self._seq = None
+        self._encoded = {}  # tier -> JPEG bytes of frame self._seq
+        self.encodes = {tier: 0 for tier in tiers}
+        self.hits = 0
+
+    def cached(self, seq: int, tier: str):
+        """The frame's bytes in this tier if already encoded, else None (cheap enough for the event loop)."""
+        with self._lock:
+            if self._seq == seq and tier in self._encoded:
+                self.hits += 1
+                return self._encoded[tier]
+        return None
+
+    def encode(self, seq: int, frame, tier: str) -> bytes:
+        """JPEG bytes of frame `seq` in `tier`; encodes at most once per (frame, tier)."""
+        with self._tier_locks[tier]:
+            data = self.cached(seq, tier)
+            if data is not None:
+                return data
+
+            settings = self.tiers[tier]
+            start = time.perf_counter()
+            img = frame
+            width = settings["width"]
+            if width and frame.shape[1] > width:
+                height = max(1, round(frame.shape[0] * width / frame.shape[1]))
+                img = cv2.resize(frame, (width, height), interpolation=cv2.INTER_AREA)
+            ok, buffer = cv2.imencode('.jpg', img, [cv2.IMWRITE_JPEG_QUALITY, settings["quality"]])
+            if not ok:
+                raise RuntimeError(f"JPEG encoding failed for tier {tier}")
+            data = buffer.tobytes()
+            observe_stage(f"feed_encode_{tier}", time.perf_counter() - start)
+
+            with self._lock:
+                self.encodes[tier] += 1
+                if self._seq is None or seq > self._seq:
+                    # A newer frame: the older encodings are never needed again
+                    self._seq = seq
+                    self._encoded = {}
+                if seq == self._seq:
+                    self._encoded[tier] = data
+            return data
+
+    def stats(self):
+        with self._lock:
+            return {"encodes": dict(self.encodes), "hits": self.hits}
@@ -0,0 +1,168 @@
+"""
+Latest-frame broadcast from one producer thread to any number of async viewers.
+
+`/live-feed` used to run a whole capture + YOLO + OCR loop per open connection.
+A FrameHub owns the single producer for one camera instead: the first viewer starts
+it (on a daemon thread), every viewer awaits the newest published frame, and the
+producer stops once nobody has watched for FEED_IDLE_SECONDS. Viewers only hold a
+reference to the newest frame, so a slow viewer skips frames rather than queueing
+them, and waiting costs no threadpool slot (producers wake the viewers' event loop
+with call_soon_threadsafe).
+
+The producer is a callable `produce(hub)` that publishes with `hub.publish(frame)`
+while `hub.has_viewers()`; it calls `hub.end(error)` if the source cannot go on.
+"""
+
+import asyncio
+import os
+import threading
+import time
+
+FEED_IDLE_SECONDS = float(os.getenv("FEED_IDLE_SECONDS", "10"))
+
+class _Run:
+    """One producer thread's lifetime; viewers attached to it leave when it ends."""
+
+    def __init__(self):
+        self.thread = None
+        self.ended = False
+        self.error = None
+
+class _Viewer:
+    def __init__(self, run: _Run):
+        self.run = run
+        self.loop = asyncio.get_running_loop()
+        self.event = asyncio.Event()
+
+    def wake(self):
+        try:
+            self.loop.call_soon_threadsafe(self.event.set)
+        except RuntimeError:
+            pass  # The viewer's loop is closed; it is unsubscribed by its own finally
+
+class FrameHub:
+    def __init__(self, name: str, produce, idle_seconds: float = FEED_IDLE_SECONDS):
+        self.name = name
+        self.produce = produce
+        self.idle_seconds = idle_seconds
+        self._lock = threading.Lock()
+        self._viewers = set()
+        self._run = None
+        self._last_leave = 0.0
+        self._seq = 0
+        self._frame = None
+        self._published_at = 0.0
+        self.runs_started = 0
+
+    # --- Producer side ---
+
+    def has_viewers(self) -> bool:
+        """True while someone is watching, or left less than idle_seconds ago."""
+        with self._lock:
+            return bool(self._viewers) or time.time() - self._last_leave < self.idle_seconds
+
+    def publish(self, frame):
+        with self._lock:
+            self._seq += 1
+            self._frame = frame
+            self._published_at = time.time()
+            viewers = list(self._viewers)
+        for viewer in viewers:
+            viewer.wake()
+
+    def end(self, error: str = None):
+        """The source gave up (camera lost, model failure): disconnect the current viewers."""
+        with self._lock:
+            run = self._run
+            if run is None:
+                return
+            run.ended = True
+            run.error = error
+            viewers = [v for v in self._viewers if v.run is run]
+        for viewer in viewers:
+            viewer.wake()
+
+    def _start_run(self):
+        run = _Run()
+        run.thread = threading.Thread(target=self._produce, args=(run,), name=f"feed-{self.name}", daemon=True)
+        self._run = run
+        self.runs_started += 1
+        run.thread.start()
+        return run
+
+    def _produce(self, run: _Run):
+        try:
+            self.produce(self)
+        except Exception as e:
+            print(f"[FEED] {self.name} producer failed: {e}")
+            self.end(str(e))
+        with self._lock:
+            if self._run is not run:
+                return
+            self._run = None
+            self._frame = None
+            if run.ended or not self._viewers:
+                return
+            # Viewers arrived while the producer was stopping for idleness: keep them fed
+            new_run = self._start_run()
+            for viewer in self._viewers:
+                viewer.run = new_run
+
+    # --- Viewer side ---
+
+    def _subscribe(self) -> _Viewer:
+        with self._lock:
+            run = self._run
+            if run is None or run.ended:
+                run = self._start_run()
+            viewer = _Viewer(run)
+            self._viewers.add(viewer)
+            if self._frame is not None:
+                viewer.event.set()
+            return viewer
+
+    def _unsubscribe(self, viewer: _Viewer):
+        with self._lock:
+            self._viewers.discard(viewer)
+            self._last_leave = time.time()
+
+    def latest(self):
+        """(sequence number, frame) of the newest published frame; frame is None before the first."""
+        with self._lock:
+            return self._seq, self._frame
+
+    async def frames(self):
+        """
+        Async iterator of (sequence number, frame) over the newest frames for one viewer.
+        Returns when the producer ends, or raises FeedEnded with the error it reported.
+        """
+        viewer = self._subscribe()
+        last_seq = 0
+        try:
+            while True:
+                await viewer.event.wait()
+                viewer.event.clear()
+                if viewer.run.ended:
+                    if viewer.run.error:
+                        raise FeedEnded(viewer.run.error)
+                    return
+                seq, frame = self.latest()
+                if frame is None or seq == last_seq:
+                    continue
+                last_seq = seq
+                yield seq, frame
+        finally:
+            self._unsubscribe(viewer)
+
+    def stats(self):
+        with self._lock:
+            return {
+                "viewers": len(self._viewers),
+                "producing": self._run is not None and not self._run.ended,
+                "frames_published": self._seq,
+                "last_frame_age_s": round(time.time() - self._published_at, 2) if self._published_at else None,
+                "producer_starts": self.runs_started,
+            }
+
+class FeedEnded(Exception):
+    """Raised to a viewer when the producer stopped with an error."""
@@ -0,0 +1,105 @@
+"""
+Bounded executor for CPU-bound inference and the blocking DB/decision work behind it.
+
+`async def` handlers must not call YOLO, EasyOCR, cv2 or pymongo directly or every
+other request on the worker (logins, /latest-scan polling) stalls behind them.
+Handlers instead `await inference_pool.run(fn, *args)`, which runs `fn` on a
+dedicated pool sized independently of Starlette's shared threadpool.
+
+Settings:
+    INFERENCE_EXECUTOR     "thread" (default) or "process"
+    INFERENCE_WORKERS      number of workers (default 2)
+    INFERENCE_QUEUE_LIMIT  jobs allowed to wait beyond the busy workers (default 8)
+"""
+
+import asyncio
+import functools
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+INFERENCE_EXECUTOR = os.getenv("INFERENCE_EXECUTOR", "thread").lower()
+INFERENCE_WORKERS = int(os.getenv("INFERENCE_WORKERS", "2"))
+INFERENCE_QUEUE_LIMIT = int(os.getenv("INFERENCE_QUEUE_LIMIT", "8"))
+
+class InferencePoolFull(Exception):
+    """Raised when more jobs are in flight than workers + queue limit allow."""
+
+class InferenceError(Exception):
+    """
+    A job's HTTP-level failure (bad upload, model not loaded). Raised inside the
+    pool instead of fastapi's HTTPException, which cannot be unpickled back from a
+    worker process; handlers map it to an HTTPException / error reply.
+    """
+
+    def __init__(self, status_code: int, detail: str):
+        super().__init__(status_code, detail)
+        self.status_code = status_code
+        self.detail = detail
+
+class InferencePool:
+    def __init__(self, kind: str = INFERENCE_EXECUTOR, workers: int = INFERENCE_WORKERS,
+                 queue_limit: int = INFERENCE_QUEUE_LIMIT, initializer=None):
+        self.kind = kind
+        self.workers = max(1, workers)
+        self.queue_limit = max(0, queue_limit)
+        self.initializer = initializer
+        self._executor = None
+        self._pending = 0
+        self._lock = threading.Lock()
+
+    def _get_executor(self):
+        with self._lock:
+            if self._executor is None:
+                if self.kind == "process":
+                    # fn and args must be picklable; each worker process loads its own models
+                    self._executor = ProcessPoolExecutor(max_workers=self.workers, initializer=self.initializer)
+                else:
+                    self._executor = ThreadPoolExecutor(
+                        max_workers=self.workers,
+                        thread_name_prefix="inference",
+                        initializer=self.initializer,
+                    )
+                print(f"[INFERENCE] Started {self.kind} pool with {self.workers} workers (queue limit {self.queue_limit})")
+            return self._executor
+
+    @property
+    def pending(self) -> int:
+        """Jobs currently running or waiting for a worker."""
+        return self._pending
+
+    async def run(self, fn, *args, **kwargs):
+        """Run fn(*args, **kwargs) on the pool and await its result without blocking the event loop."""
+        executor = self._get_executor()
+        with self._lock:
+            if self._pending >= self.workers + self.queue_limit:
+                raise InferencePoolFull(f"{self._pending} inference jobs already in flight")
+            self._pending += 1
+        try:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(executor, functools.partial(fn, *args, **kwargs))
+        except BrokenProcessPool as e:
+            # A worker died (or a result could not be unpickled): every later submit would
+            # fail too, so drop the pool and start a fresh one on the next job
+            print(f"[INFERENCE] Process pool broken, restarting it: {e}")
+            self._reset(executor)
+            raise InferenceError(503, "Detection worker crashed, please retry") from e
+        finally:
+            with self._lock:
+                self._pending -= 1
+
+    def _reset(self, executor):
+        with self._lock:
+            if self._executor is executor:
+                self._executor = None
+        executor.shutdown(wait=False, cancel_futures=True)
+
+    def shutdown(self):
+        with self._lock:
+            if self._executor is not None:
+                self._executor.shutdown(wait=False, cancel_futures=True)
+                self._executor = None
+
+# Global instance used by the /detect handler
+inference_pool = InferencePool()
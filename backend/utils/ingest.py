@@ -0,0 +1,106 @@
+"""
+Size-aware decoding of /detect uploads.
+
+A phone photo (up to the 50 MB body limit) used to be decoded at full resolution
+before any work started, although YOLO runs at 640px and plates stay readable far
+below 12 MP. `decode_upload` reads the image dimensions from the JPEG/PNG header
+first and picks the largest IMREAD_REDUCED_* factor (2, 4 or 8) that keeps the width
+at or above DETECT_TARGET_WIDTH. For JPEGs libjpeg then decodes straight at the
+reduced size (DCT scaling), skipping most of the decode work and memory.
+
+Smart cameras can also skip encoding altogether and send a raw 8-bit buffer
+(grayscale or BGR) by passing its `width` and `height`.
+"""
+
+import os
+import struct
+
+try:
+    import numpy as np
+    import cv2
+    OPENCV_AVAILABLE = True
+except Exception as e:
+    print(f"Warning: 'cv2' or 'numpy' failed to load: {e}. Upload decoding disabled.")
+    OPENCV_AVAILABLE = False
+
+DETECT_TARGET_WIDTH = int(os.getenv("DETECT_TARGET_WIDTH", "1280"))
+
+if OPENCV_AVAILABLE:
+    _REDUCED_FLAGS = {
+        1: cv2.IMREAD_COLOR,
+        2: cv2.IMREAD_REDUCED_COLOR_2,
+        4: cv2.IMREAD_REDUCED_COLOR_4,
+        8: cv2.IMREAD_REDUCED_COLOR_8,
+    }
+
+# JPEG start-of-frame markers (carry the dimensions); C4/C8/CC are not SOF segments
+_SOF_MARKERS = {0xC0, 0xC1, 0xC2, 0xC3, 0xC5, 0xC6, 0xC7, 0xC9, 0xCA, 0xCB, 0xCD, 0xCE, 0xCF}
+
+class UploadDecodeError(ValueError):
+    pass
+
+def image_dimensions(data: bytes):
+    """(width, height) from a JPEG or PNG header without decoding, or None."""
+    if data[:8] == b"\x89PNG\r\n\x1a\n" and len(data) >= 24:
+        width, height = struct.unpack(">II", data[16:24])
+        return width, height
+
+    if data[:2] != b"\xff\xd8":
+        return None
+    i = 2
+    while i + 9 < len(data):
+        if data[i] != 0xFF:
+            i += 1
+            continue
+        marker = data[i + 1]
+        if marker == 0xFF:
+            i += 1
+            continue
+        if marker in (0xD8, 0x01) or 0xD0 <= marker <= 0xD7:
+            i += 2
+            continue
+        if marker in _SOF_MARKERS:
+            height, width = struct.unpack(">HH", data[i + 5:i + 9])
+            return width, height
+        segment_length = struct.unpack(">H", data[i + 2:i + 4])[0]
+        i += 2 + segment_length
+    return None
+
+def reduction_factor(width: int, target_width: int = DETECT_TARGET_WIDTH) -> int:
+    """Largest of 8/4/2 that keeps `width` at or above the target, else 1."""
+    for factor in (8, 4, 2):
+        if width // factor >= target_width:
+            return factor
+    return 1
+
+def decode_upload(contents: bytes, width: int = None, height: int = None,
+                  target_width: int = DETECT_TARGET_WIDTH):
+    """
+    Decode an upload into an image array. Returns (img, info) where info records
+    the source size, the reduction factor and the decoded size.
+    `width`/`height` mark a raw 8-bit buffer (1 channel = grayscale, 3 = BGR);
+    otherwise `contents` is an encoded image. Raises UploadDecodeError.
+    """
+    if width or height:
+        if not width or not height or width < 0 or height < 0:
+            raise UploadDecodeError("Raw uploads need a positive width and height")
+        channels, remainder = divmod(len(contents), width * height)
+        if remainder or channels not in (1, 3):
+            raise UploadDecodeError(
+                f"Raw upload of {len(contents)} bytes does not match {width}x{height} grayscale or BGR")
+        shape = (height, width) if channels == 1 else (height, width, 3)
+        # Copy: frombuffer views are read-only and the frame gets annotated later
+        img = np.frombuffer(contents, np.uint8).reshape(shape).copy()
+        return img, {"source": f"{width}x{height}", "raw": True, "reduction": 1, "decoded": f"{width}x{height}"}
+
+    dims = image_dimensions(contents)
+    factor = reduction_factor(dims[0], target_width) if dims else 1
+    img = cv2.imdecode(np.frombuffer(contents, np.uint8), _REDUCED_FLAGS[factor])
+    if img is None:
+        raise UploadDecodeError("Could not decode image")
+    return img, {
+        "source": f"{dims[0]}x{dims[1]}" if dims else None,
+        "raw": False,
+        "reduction": factor,
+        "decoded": f"{img.shape[1]}x{img.shape[0]}",
+    }
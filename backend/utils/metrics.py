@@ -0,0 +1,174 @@
+"""
+In-process metrics exposed in Prometheus text format on /metrics.
+
+A deliberately small registry (counters, histograms and scrape-time gauges) so
+the hot path can be instrumented without another dependency:
+    anpr_stage_seconds{stage}                 time per pipeline stage (decode, yolo,
+                                              preprocess, each OCR pass, plate_lookup,
+                                              log_insert, capture_write, ...)
+    anpr_frames_total{camera, result}         frames processed / skipped / dropped; camera
+                                              is a registered id or "other" (see below)
+    anpr_queue_depth{queue}                   inference pool, YOLO batcher and capture
+                                              writer backlog at scrape time
+    anpr_batch_size{batcher}                  achieved micro-batch sizes (yolo-batcher)
+    anpr_ocr_cache_lookups_total{result}      OCR cache hits and misses
+    http_request_duration_seconds{method, route, status}
+Metrics are per process: with several uvicorn workers each scrape sees one worker.
+"""
+
+import os
+import threading
+
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+def _labels(names, values, extra: str = "") -> str:
+    parts = [f'{n}="{_escape(v)}"' for n, v in zip(names, values)]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+def _number(value) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+class Counter:
+    def __init__(self, name: str, documentation: str, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, *labelvalues, amount: float = 1):
+        with self._lock:
+            self._values[labelvalues] = self._values.get(labelvalues, 0) + amount
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            for labelvalues, value in sorted(self._values.items()):
+                lines.append(f"{self.name}{_labels(self.labelnames, labelvalues)} {_number(value)}")
+        return lines
+
+class Histogram:
+    def __init__(self, name: str, documentation: str, labelnames=(), buckets=DEFAULT_BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(sorted(buckets)) + (float("inf"),)
+        self._series = {}   # labelvalues -> [bucket counts..., sum, count]
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, *labelvalues):
+        with self._lock:
+            series = self._series.get(labelvalues)
+            if series is None:
+                series = self._series[labelvalues] = [0] * len(self.buckets) + [0.0, 0]
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    series[i] += 1
+            series[-2] += value
+            series[-1] += 1
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            for labelvalues, series in sorted(self._series.items()):
+                for bound, count in zip(self.buckets, series):
+                    le = f'le="{_number(bound)}"'
+                    lines.append(f"{self.name}_bucket{_labels(self.labelnames, labelvalues, le)} {count}")
+                lines.append(f"{self.name}_sum{_labels(self.labelnames, labelvalues)} {_number(series[-2])}")
+                lines.append(f"{self.name}_count{_labels(self.labelnames, labelvalues)} {series[-1]}")
+        return lines
+
+class CallbackGauge:
+    """Gauge read at scrape time: `callback()` returns {labelvalues tuple: value}."""
+
+    def __init__(self, name: str, documentation: str, labelnames, callback):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.callback = callback
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} gauge"]
+        try:
+            values = self.callback()
+        except Exception as e:
+            print(f"[METRICS] Gauge {self.name} failed: {e}")
+            values = {}
+        for labelvalues, value in sorted(values.items()):
+            lines.append(f"{self.name}{_labels(self.labelnames, labelvalues)} {_number(value)}")
+        return lines
+
+class MetricsRegistry:
+    def __init__(self):
+        self._metrics = []
+
+    def register(self, metric):
+        self._metrics.append(metric)
+        return metric
+
+    def render(self) -> str:
+        lines = []
+        for metric in self._metrics:
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+registry = MetricsRegistry()
+
+stage_seconds = registry.register(Histogram(
+    "anpr_stage_seconds", "Time spent per ANPR pipeline stage.", ["stage"]))
+frames_total = registry.register(Counter(
+    "anpr_frames_total", "Frames seen per camera by outcome (processed, skipped, dropped).", ["camera", "result"]))
+http_request_seconds = registry.register(Histogram(
+    "http_request_duration_seconds", "HTTP request latency per route.", ["method", "route", "status"]))
+batch_size = registry.register(Histogram(
+    "anpr_batch_size", "Items per model call achieved by each micro-batcher.", ["batcher"],
+    buckets=(1, 2, 3, 4, 6, 8, 12, 16, 32)))
+ocr_cache_lookups = registry.register(Counter(
+    "anpr_ocr_cache_lookups_total", "OCR cache lookups by result (hit, miss).", ["result"]))
+
+def _queue_depths():
+    from utils.inference_pool import inference_pool
+    from utils.capture_writer import capture_writer
+    depths = {("inference_pool",): inference_pool.pending, ("capture_writer",): capture_writer.stats()["queued"]}
+    try:
+        from endpoints.detection import yolo_batcher
+        depths[("yolo_batcher",)] = yolo_batcher.stats()["queue_depth"]
+    except Exception:
+        pass
+    return depths
+
+registry.register(CallbackGauge(
+    "anpr_queue_depth", "Jobs waiting or running per queue at scrape time.", ["queue"], _queue_depths))
+
+def observe_stage(stage: str, seconds: float):
+    stage_seconds.observe(seconds, stage)
+
+def observe_timings(timings: dict):
+    """Record every `<stage>_ms` entry of a /detect timings dict, the end-to-end `total` included."""
+    for key, value in timings.items():
+        if key.endswith("_ms") and isinstance(value, (int, float)):
+            stage_seconds.observe(value / 1000.0, key[:-3])
+
+# Camera ids come from clients (/detect/ws headers and query), so only known ids get
+# their own series: the built-in sources, METRICS_CAMERAS (comma-separated) and the
+# cameras registered by the camera server and the cameras router. Anything else is "other".
+_known_cameras = {"upload", "browser", "live-feed"} | {
+    c.strip() for c in os.getenv("METRICS_CAMERAS", "").split(",") if c.strip()}
+_known_cameras_lock = threading.Lock()
+
+def register_camera(camera_id):
+    with _known_cameras_lock:
+        _known_cameras.add(str(camera_id))
+
+def count_frame(camera: str, result: str):
+    camera = str(camera)
+    if camera not in _known_cameras:
+        camera = "other"
+    frames_total.inc(camera, result)
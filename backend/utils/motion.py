@@ -0,0 +1,133 @@
+"""
+Motion-gated detection scheduling for camera loops.
+
+Instead of running YOLO+OCR on a fixed frame cadence, each camera keeps a cheap
+background model of a downscaled grayscale frame. Detection runs:
+  - immediately when motion appears in a static scene,
+  - every `active_interval` frames while there is motion or a vehicle was seen
+    within the last `hold_seconds`,
+  - only every `idle_interval` frames when the scene is static (a safety net for
+    a car that stopped before the scheduler noticed it).
+
+Thresholds default to DEFAULT_MOTION_CONFIG and can be overridden per camera id
+with the MOTION_CONFIG setting, e.g.
+    MOTION_CONFIG='{"live-feed": {"motion_ratio": 0.02}, "local_device": {"idle_interval": 600}}'
+"""
+
+import json
+import os
+import time
+
+from utils.metrics import count_frame
+
+try:
+    import cv2
+    OPENCV_AVAILABLE = True
+except Exception as e:
+    print(f"Warning: 'cv2' failed to load: {e}. Motion gating disabled.")
+    OPENCV_AVAILABLE = False
+
+DEFAULT_MOTION_CONFIG = {
+    "downscale_width": 160,   # px; motion is measured on a tiny frame
+    "pixel_threshold": 25,    # grey-level change that counts a pixel as moving
+    "motion_ratio": 0.01,     # fraction of moving pixels that counts as motion
+    "background_alpha": 0.05, # how fast the background absorbs slow changes (lighting)
+    "active_interval": 5,     # frames between detections while something is present
+    "idle_interval": 300,     # frames between detections in a static scene
+    "hold_seconds": 5.0,      # stay active this long after the last motion/vehicle
+}
+
+def _load_overrides():
+    raw = os.getenv("MOTION_CONFIG")
+    if not raw:
+        return {}
+    try:
+        return json.loads(raw)
+    except Exception as e:
+        print(f"[MOTION] Ignoring invalid MOTION_CONFIG: {e}")
+        return {}
+
+_overrides = _load_overrides()
+
+def get_motion_config(camera_id: str) -> dict:
+    """Default thresholds merged with this camera's MOTION_CONFIG overrides."""
+    config = dict(DEFAULT_MOTION_CONFIG)
+    config.update(_overrides.get(camera_id, {}))
+    return config
+
+class MotionScheduler:
+    def __init__(self, camera_id: str, config: dict = None):
+        self.camera_id = camera_id
+        self.config = config or get_motion_config(camera_id)
+        self._background = None
+        self._frames_since_detection = 0
+        self._active_until = 0.0
+        self.last_motion_ratio = 0.0
+        self.frames_seen = 0
+        self.frames_detected = 0
+
+    def _measure_motion(self, frame) -> float:
+        h, w = frame.shape[:2]
+        width = self.config["downscale_width"]
+        small = cv2.resize(frame, (width, max(1, int(h * width / w))), interpolation=cv2.INTER_AREA)
+        if small.ndim == 3:
+            small = cv2.cvtColor(small, cv2.COLOR_BGR2GRAY)
+        small = cv2.GaussianBlur(small, (5, 5), 0).astype("float32")
+
+        if self._background is None or self._background.shape != small.shape:
+            self._background = small
+            return 0.0
+
+        diff = cv2.absdiff(small, self._background)
+        moving = cv2.countNonZero(cv2.threshold(diff, self.config["pixel_threshold"], 255, cv2.THRESH_BINARY)[1])
+        cv2.accumulateWeighted(small, self._background, self.config["background_alpha"])
+        return moving / float(small.shape[0] * small.shape[1])
+
+    def should_detect(self, frame):
+        """
+        Decide whether to run detection on this frame.
+        Returns (run_detection, reason) with reason one of
+        "motion_start", "active", "idle", "skip".
+        """
+        self.frames_seen += 1
+        self._frames_since_detection += 1
+        if not OPENCV_AVAILABLE:
+            run = self._frames_since_detection >= self.config["active_interval"]
+            return self._decide(run, "active")
+
+        now = time.time()
+        was_active = now < self._active_until
+        self.last_motion_ratio = self._measure_motion(frame)
+        moving = self.last_motion_ratio >= self.config["motion_ratio"]
+        if moving:
+            self._active_until = now + self.config["hold_seconds"]
+
+        if moving and not was_active:
+            return self._decide(True, "motion_start")
+        if moving or was_active:
+            return self._decide(self._frames_since_detection >= self.config["active_interval"], "active")
+        return self._decide(self._frames_since_detection >= self.config["idle_interval"], "idle")
+
+    def _decide(self, run: bool, reason: str):
+        if run:
+            self._frames_since_detection = 0
+            self.frames_detected += 1
+            count_frame(self.camera_id, "processed")
+            return True, reason
+        count_frame(self.camera_id, "skipped")
+        return False, "skip"
+
+    def report_vehicle(self, present: bool):
+        """Keep the higher detection rate while a detection pass still sees a vehicle/plate."""
+        if present:
+            self._active_until = time.time() + self.config["hold_seconds"]
+
+    def stats(self):
+        return {
+            "camera_id": self.camera_id,
+            "frames_seen": self.frames_seen,
+            "frames_detected": self.frames_detected,
+            "last_motion_ratio": round(self.last_motion_ratio, 4),
+            "active": time.time() < self._active_until,
+            "config": self.config,
+        }
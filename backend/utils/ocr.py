@@ -0,0 +1,114 @@
+"""
+Recognition-only OCR for plate crops that are already localized.
+
+`reader.readtext` always runs EasyOCR's CRAFT text detector first. When the plate
+box is known that pass is wasted, so `recognize_plates` stacks a batch of crops
+(from one or more frames) onto a single canvas and calls `reader.recognize` once
+with one horizontal box per crop, skipping detection entirely.
+"""
+
+try:
+    import numpy as np
+    import cv2
+    OPENCV_AVAILABLE = True
+except Exception as e:
+    print(f"Warning: 'cv2' or 'numpy' failed to load: {e}. Batched plate recognition disabled.")
+    OPENCV_AVAILABLE = False
+
+from utils.ocr_cache import dhash
+
+PLATE_ALLOWLIST = "ABCDEFGHIJKLMNOPQRSTUVWXYZ0123456789"
+# EasyOCR's recognizer works at 64px line height; normalizing crops to it up front
+# keeps the canvas small and every crop at the resolution the model expects
+CROP_HEIGHT = 64
+# Blank rows between stacked crops so no box bleeds into its neighbour
+CROP_GAP = 8
+
+def _to_gray(crop):
+    if crop.ndim == 3:
+        return cv2.cvtColor(crop, cv2.COLOR_BGR2GRAY)
+    return crop
+
+def _build_canvas(crops):
+    """Stack crops vertically at CROP_HEIGHT; returns (canvas, [[x_min, x_max, y_min, y_max], ...])."""
+    resized = []
+    for crop in crops:
+        gray = _to_gray(crop)
+        h, w = gray.shape[:2]
+        new_w = max(1, int(round(w * CROP_HEIGHT / float(h))))
+        interpolation = cv2.INTER_AREA if h > CROP_HEIGHT else cv2.INTER_CUBIC
+        resized.append(cv2.resize(gray, (new_w, CROP_HEIGHT), interpolation=interpolation))
+
+    canvas_w = max(r.shape[1] for r in resized)
+    canvas_h = len(resized) * (CROP_HEIGHT + CROP_GAP)
+    canvas = np.full((canvas_h, canvas_w), 255, dtype=np.uint8)
+
+    boxes = []
+    for i, r in enumerate(resized):
+        y = i * (CROP_HEIGHT + CROP_GAP)
+        canvas[y:y + CROP_HEIGHT, :r.shape[1]] = r
+        boxes.append([0, r.shape[1], y, y + CROP_HEIGHT])
+    return canvas, boxes
+
+def recognize_plates(reader, crops, allowlist: str = PLATE_ALLOWLIST, cache=None, scopes=None):
+    """
+    Recognize text in each plate crop with a single `reader.recognize` call.
+    Returns a list aligned with `crops` of (text, confidence); crops the
+    recognizer returned nothing for come back as ("", 0.0).
+    With an OcrCache and `scopes` (aligned with `crops`: camera plus tracked plate
+    or box cell, see utils/ocr_cache.py), a crop perceptually matching a recent one
+    of the same scope is answered from the cache; crops with a None scope are never cached.
+    """
+    crops = list(crops)
+    if not crops:
+        return []
+    if not OPENCV_AVAILABLE or reader is None:
+        return [("", 0.0)] * len(crops)
+
+    valid = [i for i, c in enumerate(crops) if c is not None and c.size > 0 and min(c.shape[:2]) > 1]
+    outputs = [("", 0.0)] * len(crops)
+
+    keys = {}
+    if cache is not None and scopes is not None:
+        pending = []
+        for i in valid:
+            if scopes[i] is None:
+                pending.append(i)
+                continue
+            keys[i] = (scopes[i], dhash(crops[i]))
+            cached = cache.get(*keys[i])
+            if cached is None:
+                pending.append(i)
+            else:
+                outputs[i] = cached
+        valid = pending
+
+    if not valid:
+        return outputs
+
+    canvas, boxes = _build_canvas([crops[i] for i in valid])
+    results = reader.recognize(
+        canvas,
+        horizontal_list=boxes,
+        free_list=[],
+        detail=1,
+        allowlist=allowlist,
+        batch_size=len(boxes),
+        paragraph=False,
+    )
+
+    # Results carry their box; map each back to its crop by the top edge on the canvas
+    index_by_top = {box[2]: crop_index for box, crop_index in zip(boxes, valid)}
+    for bbox, text, conf in results:
+        top = int(round(min(pt[1] for pt in bbox)))
+        crop_index = index_by_top.get(top)
+        if crop_index is None:
+            # Fall back to the nearest stacked slot
+            slot = min(range(len(boxes)), key=lambda k: abs(boxes[k][2] - top))
+            crop_index = valid[slot]
+        outputs[crop_index] = (text.upper(), float(conf))
+
+    for i in valid:
+        if i in keys:
+            cache.put(*keys[i], *outputs[i])
+    return outputs
@@ -0,0 +1,117 @@
+"""
+OCR result cache keyed by a perceptual hash of the plate crop, within a scope.
+
+A car idling at the barrier produces near-identical plate crops frame after frame.
+Each crop is reduced to a 256-bit difference hash (dHash) of its normalized
+grayscale thumbnail (HASH_WIDTH x HASH_HEIGHT, wide like a plate so single glyphs
+still move many bits); a crop whose hash is within `max_distance` bits of a cached
+one *in the same scope* reuses that entry's text and confidence instead of running
+the recognizer. Scopes are the camera plus the tracked plate, or the coarse grid
+cell of the plate box (`box_scope`), so sensor noise and box jitter between frames
+still hit while a read never carries over from one vehicle position to another.
+Entries expire after `ttl_seconds` and the least recently used are evicted past
+`max_entries`.
+"""
+
+import os
+import threading
+import time
+from collections import OrderedDict
+
+try:
+    import numpy as np
+    import cv2
+    OPENCV_AVAILABLE = True
+except Exception as e:
+    print(f"Warning: 'cv2' or 'numpy' failed to load: {e}. OCR cache disabled.")
+    OPENCV_AVAILABLE = False
+
+from utils.metrics import ocr_cache_lookups
+
+OCR_CACHE_SIZE = int(os.getenv("OCR_CACHE_SIZE", "256"))
+OCR_CACHE_TTL_SECONDS = float(os.getenv("OCR_CACHE_TTL_SECONDS", "10"))
+OCR_CACHE_MAX_DISTANCE = int(os.getenv("OCR_CACHE_MAX_DISTANCE", "6"))
+# Plate boxes whose centres fall in the same cell of this size (px) share a scope
+OCR_CACHE_GRID_PX = int(os.getenv("OCR_CACHE_GRID_PX", "32"))
+
+HASH_WIDTH = 32
+HASH_HEIGHT = 8
+
+def dhash(crop) -> int:
+    """256-bit difference hash: sign of horizontal gradients on a 33x8 grayscale thumbnail."""
+    gray = crop if crop.ndim == 2 else cv2.cvtColor(crop, cv2.COLOR_BGR2GRAY)
+    small = cv2.resize(gray, (HASH_WIDTH + 1, HASH_HEIGHT), interpolation=cv2.INTER_AREA)
+    bits = (small[:, 1:] > small[:, :-1]).flatten()
+    return int.from_bytes(np.packbits(bits).tobytes(), "big")
+
+def box_scope(camera_id, box, grid: int = OCR_CACHE_GRID_PX):
+    """Scope for an untracked plate box: the camera and the grid cell of the box centre."""
+    x1, y1, x2, y2 = box
+    return (camera_id, (x1 + x2) // 2 // grid, (y1 + y2) // 2 // grid)
+
+class OcrCache:
+    def __init__(self, max_entries: int = OCR_CACHE_SIZE, ttl_seconds: float = OCR_CACHE_TTL_SECONDS,
+                 max_distance: int = OCR_CACHE_MAX_DISTANCE):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.max_distance = max_distance
+        self._entries = OrderedDict()   # (scope, hash) -> (text, conf, expires_at)
+        self._by_scope = {}             # scope -> set of hashes cached for it
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, scope, key: int):
+        """Return the cached (text, conf) for a hash within max_distance in `scope`, or None."""
+        now = time.time()
+        with self._lock:
+            hashes = self._by_scope.get(scope, ())
+            match = key if key in hashes else None
+            if match is None and self.max_distance > 0:
+                best_distance = self.max_distance + 1
+                for cached_key in hashes:
+                    distance = (cached_key ^ key).bit_count()
+                    if distance < best_distance:
+                        match, best_distance = cached_key, distance
+
+            if match is not None:
+                text, conf, expires_at = self._entries[(scope, match)]
+                if expires_at > now:
+                    self._entries.move_to_end((scope, match))
+                    self.hits += 1
+                    ocr_cache_lookups.inc("hit")
+                    return text, conf
+                self._remove((scope, match))
+
+            self.misses += 1
+            ocr_cache_lookups.inc("miss")
+            return None
+
+    def put(self, scope, key: int, text: str, conf: float):
+        with self._lock:
+            self._entries[(scope, key)] = (text, conf, time.time() + self.ttl_seconds)
+            self._entries.move_to_end((scope, key))
+            self._by_scope.setdefault(scope, set()).add(key)
+            while len(self._entries) > self.max_entries:
+                self._remove(next(iter(self._entries)))
+
+    def _remove(self, entry_key):
+        scope, key = entry_key
+        del self._entries[entry_key]
+        hashes = self._by_scope[scope]
+        hashes.discard(key)
+        if not hashes:
+            del self._by_scope[scope]
+
+    def stats(self):
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / total, 3) if total else 0.0,
+            }
+
+# Shared by /detect, the backend camera scanner and the live stream
+ocr_cache = OcrCache()
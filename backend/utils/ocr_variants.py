@@ -0,0 +1,112 @@
+"""
+Pick which OCR preprocessing variant to read first from cheap image statistics.
+
+/detect prepares two variants of a plate region: the CLAHE-enhanced grayscale
+("enhanced") and a 3x-upscaled adaptive threshold ("threshold"). Reading both on
+every request doubles OCR cost, so `choose_variant` looks at the region's
+histogram spread (contrast), mean luminance and Laplacian variance (sharpness):
+  - clean, well-exposed, sharp regions read best as "enhanced",
+  - low-contrast, under/over-exposed, blurry or tiny regions read best as "threshold".
+The caller reads the chosen variant first and only falls back to the other one when
+that read is low-confidence or not a valid plate length.
+
+Every decision is counted (`variant_stats.record`, served on /detect/batch-stats);
+with OCR_VARIANT_LOG=1 each one is also logged with its statistics so the thresholds
+below can be tuned from production logs. The tunables can be overridden with the
+OCR_VARIANT_* settings.
+"""
+
+import os
+import threading
+
+try:
+    import numpy as np
+    import cv2
+    OPENCV_AVAILABLE = True
+except Exception as e:
+    print(f"Warning: 'cv2' or 'numpy' failed to load: {e}. OCR variant selection disabled.")
+    OPENCV_AVAILABLE = False
+
+VARIANTS = ("enhanced", "threshold")
+
+# Grey levels between the 5th and 95th percentile below which a region is "low contrast"
+MIN_SPREAD = float(os.getenv("OCR_VARIANT_MIN_SPREAD", "60"))
+# Mean luminance outside this band counts as under/over-exposed
+MIN_MEAN = float(os.getenv("OCR_VARIANT_MIN_MEAN", "50"))
+MAX_MEAN = float(os.getenv("OCR_VARIANT_MAX_MEAN", "205"))
+# Laplacian variance below which a region counts as blurry
+MIN_SHARPNESS = float(os.getenv("OCR_VARIANT_MIN_SHARPNESS", "100"))
+# Regions shorter than this benefit from the upscaled threshold variant
+MIN_HEIGHT = int(os.getenv("OCR_VARIANT_MIN_HEIGHT", "40"))
+# A first read at or above this confidence with a valid plate length skips the second pass
+ACCEPT_CONF = float(os.getenv("OCR_VARIANT_ACCEPT_CONF", "0.90"))
+# Log every decision with its region statistics (off on the hot path by default)
+LOG_DECISIONS = os.getenv("OCR_VARIANT_LOG", "0") == "1"
+
+def region_stats(gray) -> dict:
+    """Histogram spread, mean luminance, sharpness and height of a grayscale region."""
+    hist = cv2.calcHist([gray], [0], None, [256], [0, 256]).ravel()
+    cdf = np.cumsum(hist) / max(1.0, hist.sum())
+    p5 = int(np.searchsorted(cdf, 0.05))
+    p95 = int(np.searchsorted(cdf, 0.95))
+    return {
+        "spread": p95 - p5,
+        "mean": round(float(gray.mean()), 1),
+        "sharpness": round(float(cv2.Laplacian(gray, cv2.CV_64F).var()), 1),
+        "height": int(gray.shape[0]),
+    }
+
+def choose_variant(gray):
+    """
+    Return (first, second, stats): the variant to read first, the fallback, and the
+    statistics the choice was based on.
+    """
+    if not OPENCV_AVAILABLE:
+        return "enhanced", "threshold", {}
+    stats = region_stats(gray)
+    prefer_threshold = (
+        stats["spread"] < MIN_SPREAD
+        or not MIN_MEAN <= stats["mean"] <= MAX_MEAN
+        or stats["sharpness"] < MIN_SHARPNESS
+        or stats["height"] < MIN_HEIGHT
+    )
+    if prefer_threshold:
+        return "threshold", "enhanced", stats
+    return "enhanced", "threshold", stats
+
+def accept_first(plate: str, conf: float) -> bool:
+    """Whether the first pass is good enough to skip the second one."""
+    return conf >= ACCEPT_CONF and 4 <= len(plate) <= 8
+
+class VariantStats:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.decisions = 0
+        self.second_passes = 0
+        self.wins = {variant: 0 for variant in VARIANTS}
+        self.predicted_correctly = 0
+
+    def record(self, predicted: str, winner: str, second_pass: bool, stats: dict):
+        """Count one decision (and log it with OCR_VARIANT_LOG=1); `winner` is "" when neither variant read a plate."""
+        with self._lock:
+            self.decisions += 1
+            self.second_passes += int(second_pass)
+            if winner:
+                self.wins[winner] += 1
+                self.predicted_correctly += int(winner == predicted)
+        if LOG_DECISIONS:
+            print(f"[OCR] variant predicted={predicted} winner={winner or 'none'} "
+                  f"second_pass={second_pass} stats={stats}")
+
+    def stats(self):
+        with self._lock:
+            return {
+                "decisions": self.decisions,
+                "second_passes": self.second_passes,
+                "second_pass_rate": round(self.second_passes / self.decisions, 3) if self.decisions else 0.0,
+                "wins": dict(self.wins),
+                "predicted_correctly": self.predicted_correctly,
+            }
+
+# Shared by every /detect call in this worker
+variant_stats = VariantStats()
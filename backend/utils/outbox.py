@@ -0,0 +1,288 @@
+"""
+Transactional outbox for the side effects of a gate decision.
+
+The gate only needs the decision (granted/denied, entry/exit). Writing the access
+log, the dashboard notification and sending the SMS used to happen serially before
+the response. `outbox.enqueue_access_event(...)` instead commits all of a decision's
+side effects in one local SQLite transaction (WAL mode, so this costs well under a
+millisecond and survives a crash), and a background dispatcher drains the outbox:
+  - log inserts are grouped per collection into one `insert_many`, notifications
+    into another; documents carry their `_id` from enqueue time, so a retried batch
+    that partly landed skips the duplicates instead of logging twice,
+  - SMS are delivered one by one with `utils.sms.deliver_sms`, only after the
+    batch's logs and notifications are written and settled, so a slow SMS gateway
+    never delays the logs; the claim on the remaining SMS is renewed before each
+    send so it cannot lapse (and another worker send a duplicate) mid-delivery,
+  - failures retry with exponential backoff (capped at OUTBOX_MAX_BACKOFF_SECONDS)
+    and are parked as "dead" after OUTBOX_MAX_ATTEMPTS.
+Rows are claimed before dispatch, so every uvicorn worker on a host can share
+the same OUTBOX_PATH file.
+"""
+
+import json
+import os
+import sqlite3
+import threading
+import time
+
+from utils.metrics import observe_stage
+
+OUTBOX_PATH = os.getenv("OUTBOX_PATH", "outbox.db")
+OUTBOX_BATCH_SIZE = int(os.getenv("OUTBOX_BATCH_SIZE", "100"))
+OUTBOX_POLL_SECONDS = float(os.getenv("OUTBOX_POLL_SECONDS", "1"))
+OUTBOX_MAX_ATTEMPTS = int(os.getenv("OUTBOX_MAX_ATTEMPTS", "10"))
+OUTBOX_MAX_BACKOFF_SECONDS = float(os.getenv("OUTBOX_MAX_BACKOFF_SECONDS", "300"))
+# A claimed batch not finished within this time is picked up again (e.g. after a crash).
+# Renewed before each SMS, so it only has to outlast one send (utils.sms times out at 10s).
+CLAIM_SECONDS = 120
+
+DUPLICATE_KEY = 11000
+
+def new_id() -> str:
+    """A fresh ObjectId (as hex) for a document written later by the dispatcher."""
+    from bson import ObjectId
+    return str(ObjectId())
+
+class Outbox:
+    def __init__(self, path: str = OUTBOX_PATH):
+        self.path = path
+        self._local = threading.local()
+        self._wakeup = threading.Event()
+        self._stop = threading.Event()
+        self._thread = None
+        self._lock = threading.Lock()
+        self.delivered = 0
+        self.failed_attempts = 0
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS outbox ("
+                " id INTEGER PRIMARY KEY AUTOINCREMENT,"
+                " kind TEXT NOT NULL, payload TEXT NOT NULL,"
+                " status TEXT NOT NULL DEFAULT 'pending',"
+                " attempts INTEGER NOT NULL DEFAULT 0,"
+                " next_attempt_at REAL NOT NULL,"
+                " claimed_until REAL NOT NULL DEFAULT 0,"
+                " created_at REAL NOT NULL,"
+                " last_error TEXT)"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS outbox_due ON outbox (status, next_attempt_at)")
+            # Last granted action per vehicle, shared by the workers (see utils.access_state)
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS last_actions ("
+                " vehicle_id TEXT PRIMARY KEY, action TEXT, timestamp TEXT)"
+            )
+
+    def _connect(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=5, isolation_level=None)
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    # --- Producer side ---
+
+    def enqueue(self, events, last_action: tuple = None):
+        """
+        Atomically append [(kind, payload dict), ...], and record `last_action`
+        ((vehicle_id, action, timestamp)) in the same transaction.
+        """
+        from utils.access_state import LastActionStore
+
+        now = time.time()
+        conn = self._connect()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            conn.executemany(
+                "INSERT INTO outbox (kind, payload, next_attempt_at, created_at) VALUES (?, ?, ?, ?)",
+                [(kind, json.dumps(payload, default=str), now, now) for kind, payload in events]
+            )
+            if last_action:
+                LastActionStore.record_in(conn, *last_action)
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        self._wakeup.set()
+
+    def enqueue_access_event(self, collection: str, log_entry: dict, notification: dict = None, sms: dict = None,
+                             last_action: tuple = None):
+        """
+        Queue one gate decision's side effects together: the log document for
+        `collection` ("access_logs" or "denied_logs"; its `_id` must be a hex id from
+        `new_id()`), and optionally the notification document and the SMS
+        ({"phone_number", "message"}). A granted decision passes `last_action`
+        ((vehicle_id, action, timestamp)) so the next Entry/Exit choice on any worker
+        sees it before the log reaches the database.
+        """
+        events = [("log", {"collection": collection, "doc": log_entry})]
+        if notification:
+            events.append(("notification", {"doc": {"_id": new_id(), **notification}}))
+        if sms:
+            events.append(("sms", sms))
+        self.enqueue(events, last_action)
+
+    # --- Dispatcher side ---
+
+    def start(self):
+        with self._lock:
+            if self._thread is None:
+                self._stop.clear()
+                self._thread = threading.Thread(target=self._run, name="outbox-dispatcher", daemon=True)
+                self._thread.start()
+
+    def shutdown(self):
+        """Stop the dispatcher after one last drain of whatever is due."""
+        if self._thread is not None:
+            self._stop.set()
+            self._wakeup.set()
+            self._thread.join()
+            self._thread = None
+
+    def _run(self):
+        while True:
+            try:
+                while self.dispatch_once():
+                    pass
+            except Exception as e:
+                print(f"[OUTBOX] Dispatch failed: {e}")
+            if self._stop.is_set():
+                return
+            self._wakeup.wait(OUTBOX_POLL_SECONDS)
+            self._wakeup.clear()
+
+    def _claim(self):
+        now = time.time()
+        conn = self._connect()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            rows = conn.execute(
+                "SELECT id, kind, payload, attempts FROM outbox"
+                " WHERE status = 'pending' AND next_attempt_at <= ? AND claimed_until <= ?"
+                " ORDER BY id LIMIT ?",
+                (now, now, OUTBOX_BATCH_SIZE)
+            ).fetchall()
+            if rows:
+                conn.executemany("UPDATE outbox SET claimed_until = ? WHERE id = ?",
+                                 [(now + CLAIM_SECONDS, row[0]) for row in rows])
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        return [(row_id, kind, json.loads(payload), attempts) for row_id, kind, payload, attempts in rows]
+
+    def dispatch_once(self) -> bool:
+        """Deliver one batch of due events; returns False when nothing was due."""
+        events = self._claim()
+        if not events:
+            return False
+
+        done, failed = [], []
+        logs_by_collection = {}
+        notifications = []
+        sms = []
+        for event in events:
+            row_id, kind, payload, _ = event
+            if kind == "log":
+                logs_by_collection.setdefault(payload["collection"], []).append((event, payload["doc"]))
+            elif kind == "notification":
+                notifications.append((event, payload["doc"]))
+            elif kind == "sms":
+                sms.append((event, payload))
+            else:
+                failed.append((event, f"Unknown event kind {kind}"))
+
+        import mongo_client
+        for collection, items in logs_by_collection.items():
+            start = time.perf_counter()
+            self._insert_many(getattr(mongo_client, f"{collection}_collection"), items, done, failed)
+            observe_stage("log_insert", time.perf_counter() - start)
+        if notifications:
+            self._insert_many(mongo_client.notifications_collection, notifications, done, failed)
+        self._settle(done, failed)
+
+        for index, (event, payload) in enumerate(sms):
+            self._renew_claim([pending[0][0] for pending in sms[index:]])
+            done, failed = [], []
+            self._deliver_sms(event, payload, done, failed)
+            self._settle(done, failed)
+        return True
+
+    def _renew_claim(self, row_ids):
+        """Extend the claim on rows still to be delivered by a full CLAIM_SECONDS."""
+        until = time.time() + CLAIM_SECONDS
+        conn = self._connect()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            conn.executemany("UPDATE outbox SET claimed_until = ? WHERE id = ?", [(until, row_id) for row_id in row_ids])
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+
+    @staticmethod
+    def _insert_many(collection, items, done, failed):
+        from bson import ObjectId
+        from pymongo.errors import BulkWriteError
+
+        docs = [{**doc, "_id": ObjectId(doc["_id"])} for _, doc in items]
+        try:
+            collection.insert_many(docs, ordered=False)
+            done.extend(event for event, _ in items)
+        except BulkWriteError as e:
+            errors = {err["index"]: err for err in e.details.get("writeErrors", [])}
+            for index, (event, _) in enumerate(items):
+                err = errors.get(index)
+                if err is None or err.get("code") == DUPLICATE_KEY:
+                    # Written now, or by an earlier attempt that was not marked done
+                    done.append(event)
+                else:
+                    failed.append((event, err.get("errmsg", "write error")))
+        except Exception as e:
+            failed.extend((event, str(e)) for event, _ in items)
+
+    @staticmethod
+    def _deliver_sms(event, payload, done, failed):
+        from utils.sms import deliver_sms
+        try:
+            deliver_sms(payload["phone_number"], payload["message"])
+            done.append(event)
+        except Exception as e:
+            failed.append((event, str(e)))
+
+    def _settle(self, done, failed):
+        now = time.time()
+        conn = self._connect()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            conn.executemany("DELETE FROM outbox WHERE id = ?", [(event[0],) for event in done])
+            for (row_id, kind, _, attempts), error in failed:
+                attempts += 1
+                status = "dead" if attempts >= OUTBOX_MAX_ATTEMPTS else "pending"
+                backoff = min(OUTBOX_MAX_BACKOFF_SECONDS, 2 ** attempts)
+                conn.execute(
+                    "UPDATE outbox SET status = ?, attempts = ?, next_attempt_at = ?, claimed_until = 0,"
+                    " last_error = ? WHERE id = ?",
+                    (status, attempts, now + backoff, error, row_id)
+                )
+                print(f"[OUTBOX] {kind} event {row_id} failed (attempt {attempts}, {status}): {error}")
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        self.delivered += len(done)
+        self.failed_attempts += len(failed)
+
+    def stats(self):
+        counts = dict(self._connect().execute(
+            "SELECT status, COUNT(*) FROM outbox GROUP BY status").fetchall())
+        return {
+            "pending": counts.get("pending", 0),
+            "dead": counts.get("dead", 0),
+            "delivered": self.delivered,
+            "failed_attempts": self.failed_attempts,
+        }
+
+# Shared by /detect, the backend camera scanner and the live stream; drained from the app lifespan
+outbox = Outbox()
@@ -0,0 +1,128 @@
+"""
+Classical license-plate localization.
+
+Finds a handful of plate-shaped, text-dense regions with cheap OpenCV operations
+(blackhat + horizontal Sobel edges, closing, contour and aspect-ratio filtering)
+so EasyOCR only has to look at small patches instead of running its CRAFT text
+detector over the whole frame.
+
+A different detector (e.g. a small plate YOLO model) can be plugged in with
+`register_plate_detector(fn)` or the PLATE_DETECTOR="module:function" setting;
+it receives a BGR or grayscale image and returns a list of (x1, y1, x2, y2) boxes.
+"""
+
+import importlib
+import os
+
+try:
+    import numpy as np
+    import cv2
+    OPENCV_AVAILABLE = True
+except Exception as e:
+    print(f"Warning: 'cv2' or 'numpy' failed to load: {e}. Plate localization disabled.")
+    OPENCV_AVAILABLE = False
+
+# Philippine plates are ~390x140mm (2.8:1); allow for perspective and tight/loose contours
+MIN_ASPECT = 1.8
+MAX_ASPECT = 6.5
+MIN_AREA_RATIO = 0.001   # of the searched image
+MAX_AREA_RATIO = 0.25
+MIN_PLATE_HEIGHT = 10    # px, at working resolution
+# Localization is run at this width at most; boxes are scaled back afterwards
+WORKING_WIDTH = 960
+# Fraction of the plate size added around each candidate so edge characters are kept
+CANDIDATE_PADDING = 0.08
+
+_custom_detector = None
+
+def register_plate_detector(detector):
+    """Use `detector(image) -> [(x1, y1, x2, y2), ...]` instead of the classical localizer."""
+    global _custom_detector
+    _custom_detector = detector
+
+def _configured_detector():
+    global _custom_detector
+    if _custom_detector is None and os.getenv("PLATE_DETECTOR"):
+        module_name, _, func_name = os.getenv("PLATE_DETECTOR").partition(":")
+        try:
+            _custom_detector = getattr(importlib.import_module(module_name), func_name)
+            print(f"[LOCALIZER] Using plate detector {module_name}:{func_name}")
+        except Exception as e:
+            print(f"[LOCALIZER] Failed to load PLATE_DETECTOR {os.getenv('PLATE_DETECTOR')}: {e}")
+            _custom_detector = False
+    return _custom_detector or None
+
+def _classical_candidates(gray):
+    img_h, img_w = gray.shape[:2]
+    scale = 1.0
+    if img_w > WORKING_WIDTH:
+        scale = WORKING_WIDTH / img_w
+        gray = cv2.resize(gray, (WORKING_WIDTH, int(img_h * scale)), interpolation=cv2.INTER_AREA)
+    h, w = gray.shape[:2]
+
+    # Dark characters on a light plate stand out after a blackhat with a plate-shaped kernel
+    rect_kernel = cv2.getStructuringElement(cv2.MORPH_RECT, (13, 5))
+    blackhat = cv2.morphologyEx(gray, cv2.MORPH_BLACKHAT, rect_kernel)
+
+    # Character strokes produce dense vertical edges
+    grad = cv2.Sobel(blackhat, cv2.CV_32F, 1, 0, ksize=3)
+    grad = np.absolute(grad)
+    grad = cv2.normalize(grad, None, 0, 255, cv2.NORM_MINMAX).astype("uint8")
+
+    # Merge neighbouring characters into one blob per plate
+    grad = cv2.GaussianBlur(grad, (5, 5), 0)
+    grad = cv2.morphologyEx(grad, cv2.MORPH_CLOSE, rect_kernel)
+    _, thresh = cv2.threshold(grad, 0, 255, cv2.THRESH_BINARY | cv2.THRESH_OTSU)
+    square_kernel = cv2.getStructuringElement(cv2.MORPH_RECT, (3, 3))
+    thresh = cv2.erode(thresh, square_kernel, iterations=2)
+    thresh = cv2.dilate(thresh, square_kernel, iterations=2)
+
+    contours, _ = cv2.findContours(thresh, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
+
+    image_area = float(w * h)
+    candidates = []
+    for contour in contours:
+        x, y, bw, bh = cv2.boundingRect(contour)
+        if bh < MIN_PLATE_HEIGHT:
+            continue
+        aspect = bw / float(bh)
+        area_ratio = (bw * bh) / image_area
+        if not (MIN_ASPECT <= aspect <= MAX_ASPECT and MIN_AREA_RATIO <= area_ratio <= MAX_AREA_RATIO):
+            continue
+        # Rank by how much of the box is edge blob (plates are densely filled)
+        fill = cv2.countNonZero(thresh[y:y + bh, x:x + bw]) / float(bw * bh)
+        candidates.append((fill * area_ratio ** 0.5, (x, y, x + bw, y + bh)))
+
+    candidates.sort(key=lambda item: item[0], reverse=True)
+    return [
+        tuple(int(round(v / scale)) for v in box)
+        for _, box in candidates
+    ]
+
+def _pad(box, img_w, img_h):
+    x1, y1, x2, y2 = box
+    pad_x = int((x2 - x1) * CANDIDATE_PADDING)
+    pad_y = int((y2 - y1) * CANDIDATE_PADDING)
+    return (max(0, x1 - pad_x), max(0, y1 - pad_y), min(img_w, x2 + pad_x), min(img_h, y2 + pad_y))
+
+def localize_plates(image, max_candidates: int = 3):
+    """
+    Return up to `max_candidates` padded (x1, y1, x2, y2) plate boxes in `image`
+    coordinates, best first. Returns [] when nothing plate-like is found.
+    """
+    if not OPENCV_AVAILABLE or image is None or image.size == 0:
+        return []
+
+    img_h, img_w = image.shape[:2]
+    detector = _configured_detector()
+    try:
+        if detector:
+            boxes = list(detector(image))
+        else:
+            gray = image if image.ndim == 2 else cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
+            boxes = _classical_candidates(gray)
+    except Exception as e:
+        print(f"[LOCALIZER] Plate localization failed: {e}")
+        return []
+
+    return [_pad(box, img_w, img_h) for box in boxes[:max_candidates]]
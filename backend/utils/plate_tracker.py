@@ -0,0 +1,197 @@
+"""
+Multi-frame plate tracking with confidence-weighted character voting.
+
+A car at the gate is read on many detection frames, and single-frame OCR sometimes
+drops or swaps characters ("ABC12" vs "ABC123"). Instead of logging every read,
+plate boxes are associated across frames by IoU / centroid distance into tracks.
+Each read adds its confidence as a vote for its length and for each character
+at each position. A track emits exactly one finalized plate event, either:
+  - as soon as it has `min_reads` reads whose consensus agreement reaches
+    `min_agreement`, or
+  - when the track expires (no matching box for `ttl_seconds`) with at least
+    `min_expiry_reads` reads agreeing by `min_agreement`, so a car that drove past
+    quickly is still logged once; a lone or inconsistent read is dropped.
+Finalized tracks report `needs_ocr() == False`, letting the caller skip OCR on them,
+except on every `reverify_every`-th matched frame: that read is checked against the
+finalized text, and a disagreeing read (the next car in the queue stopping on the
+same spot) ends the track and starts a new one.
+"""
+
+import itertools
+import threading
+import time
+
+class PlateTrack:
+    _ids = itertools.count(1)
+
+    def __init__(self, box, now: float):
+        self.id = next(self._ids)
+        self.box = box
+        self.first_seen = now
+        self.last_seen = now
+        self.reads = 0
+        self.length_votes = {}   # plate length -> summed confidence
+        self.char_votes = {}     # plate length -> [ {char: summed confidence}, ... ]
+        self.finalized = False
+        self.matches_since_verify = 0
+        self.text = ""
+        self.confidence = 0.0
+        self.best_conf = 0.0
+        self.best_frame = None   # frame of the most confident read, used for the capture
+
+    def add_read(self, text: str, conf: float, frame=None):
+        self.reads += 1
+        if conf >= self.best_conf:
+            self.best_conf = conf
+            self.best_frame = frame
+        length = len(text)
+        self.length_votes[length] = self.length_votes.get(length, 0.0) + conf
+        positions = self.char_votes.setdefault(length, [{} for _ in range(length)])
+        for pos, char in enumerate(text):
+            positions[pos][char] = positions[pos].get(char, 0.0) + conf
+
+    def consensus(self):
+        """Return (text, agreement) where agreement is the mean winning vote share per character."""
+        if not self.length_votes:
+            return "", 0.0
+        length = max(self.length_votes, key=self.length_votes.get)
+        length_share = self.length_votes[length] / sum(self.length_votes.values())
+
+        text = ""
+        shares = []
+        for votes in self.char_votes[length]:
+            char = max(votes, key=votes.get)
+            text += char
+            shares.append(votes[char] / sum(votes.values()))
+        agreement = length_share * (sum(shares) / len(shares) if shares else 0.0)
+        return text, agreement
+
+def _iou(a, b):
+    ix1, iy1 = max(a[0], b[0]), max(a[1], b[1])
+    ix2, iy2 = min(a[2], b[2]), min(a[3], b[3])
+    inter = max(0, ix2 - ix1) * max(0, iy2 - iy1)
+    union = (a[2] - a[0]) * (a[3] - a[1]) + (b[2] - b[0]) * (b[3] - b[1]) - inter
+    return inter / union if union > 0 else 0.0
+
+def _centroid_close(a, b):
+    acx, acy = (a[0] + a[2]) / 2, (a[1] + a[3]) / 2
+    bcx, bcy = (b[0] + b[2]) / 2, (b[1] + b[3]) / 2
+    # Allow the plate to move by up to one plate width between detection frames
+    reach = max(a[2] - a[0], b[2] - b[0])
+    return abs(acx - bcx) <= reach and abs(acy - bcy) <= reach / 2
+
+class PlateTracker:
+    def __init__(self, min_reads: int = 3, min_agreement: float = 0.6,
+                 ttl_seconds: float = 3.0, iou_threshold: float = 0.3,
+                 min_expiry_reads: int = 2, reverify_every: int = 5):
+        self.min_reads = min_reads
+        self.min_agreement = min_agreement
+        self.min_expiry_reads = min_expiry_reads
+        self.reverify_every = reverify_every
+        self.ttl_seconds = ttl_seconds
+        self.iou_threshold = iou_threshold
+        self.tracks = []
+        self._lock = threading.Lock()
+        self.events_emitted = 0
+        self.ocr_skipped = 0
+        self.tracks_split = 0
+        self.tracks_dropped = 0
+
+    def _match(self, box):
+        best, best_score = None, 0.0
+        for track in self.tracks:
+            score = _iou(track.box, box)
+            if score < self.iou_threshold and _centroid_close(track.box, box):
+                score = self.iou_threshold
+            if score >= self.iou_threshold and score > best_score:
+                best, best_score = track, score
+        return best
+
+    def needs_ocr(self, box) -> bool:
+        """False when `box` belongs to a finalized track, except on its periodic re-verification frames."""
+        with self._lock:
+            track = self._match(box)
+            if track and track.finalized:
+                track.matches_since_verify += 1
+                if track.matches_since_verify >= self.reverify_every:
+                    # Read it again; update() keeps the track alive only if the text still agrees
+                    track.matches_since_verify = 0
+                    return True
+                track.box = box
+                track.last_seen = time.time()
+                self.ocr_skipped += 1
+                return False
+            return True
+
+    def track_id(self, box):
+        """Id of the track `box` belongs to, or None."""
+        with self._lock:
+            track = self._match(box)
+            return track.id if track else None
+
+    def finalized_text(self, box) -> str:
+        with self._lock:
+            track = self._match(box)
+            return track.text if track and track.finalized else ""
+
+    def update(self, reads, now: float = None):
+        """
+        Feed this detection frame's reads as [(box, text, conf, frame), ...]
+        (an empty list just flushes expired tracks).
+        Returns the finalized plate events as [(text, agreement, frame), ...],
+        including tracks that expired since the last update; `frame` is the
+        frame of the track's most confident read.
+        """
+        now = now or time.time()
+        events = []
+        with self._lock:
+            for box, text, conf, frame in reads:
+                track = self._match(box)
+                if track is not None and track.finalized and text and text != track.text:
+                    # A different plate where a finalized one stood: the previous car left
+                    self.tracks.remove(track)
+                    self.tracks_split += 1
+                    track = None
+                if track is None:
+                    track = PlateTrack(box, now)
+                    self.tracks.append(track)
+                track.box = box
+                track.last_seen = now
+                if track.finalized or not text:
+                    continue
+                track.add_read(text, conf, frame)
+                consensus, agreement = track.consensus()
+                if track.reads >= self.min_reads and agreement >= self.min_agreement:
+                    events.append(self._finalize(track, consensus, agreement))
+
+            alive = []
+            for track in self.tracks:
+                if now - track.last_seen <= self.ttl_seconds:
+                    alive.append(track)
+                elif not track.finalized and track.reads:
+                    consensus, agreement = track.consensus()
+                    if track.reads >= self.min_expiry_reads and agreement >= self.min_agreement:
+                        events.append(self._finalize(track, consensus, agreement))
+                    else:
+                        self.tracks_dropped += 1
+            self.tracks = alive
+        return events
+
+    def _finalize(self, track, text: str, agreement: float):
+        track.finalized = True
+        track.text = text
+        track.confidence = agreement
+        self.events_emitted += 1
+        frame, track.best_frame = track.best_frame, None
+        return text, agreement, frame
+
+    def stats(self):
+        with self._lock:
+            return {
+                "active_tracks": len(self.tracks),
+                "finalized_tracks": sum(1 for t in self.tracks if t.finalized),
+                "events_emitted": self.events_emitted,
+                "ocr_skipped": self.ocr_skipped,
+                "tracks_split": self.tracks_split,
+                "tracks_dropped": self.tracks_dropped,
+            }
@@ -0,0 +1,14 @@
+import re
+
+# Characters users type between plate groups ("ABC 123", "ABC-123") that the AI never reads
+_PLATE_SEPARATORS = re.compile(r'[\s\-]+')
+
+def normalize_plate(plate_number: str) -> str:
+    """
+    Canonical form of a plate used as the `plate_key` lookup field.
+    Uppercases and strips spaces/hyphens so "abc-123", "ABC 123" and "ABC123"
+    all resolve to the same registered vehicle.
+    """
+    if not plate_number:
+        return ""
+    return _PLATE_SEPARATORS.sub("", str(plate_number)).upper()
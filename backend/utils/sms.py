@@ -5,10 +5,11 @@ import threading
 # Use the API Key previously provided by the user
 SMS_API_PH_KEY = os.getenv("SMS_API_PH_KEY", "sk-2b10etxbzawur9btl08miuxyohnsnexu")
 
-def _send_sms_thread(phone_number: str, message: str):
+def deliver_sms(phone_number: str, message: str):
     """
-    Internal function to send the SMS using SMS API PH synchronously.
-    Intended to be run in a separate thread so it doesn't block the video stream.
+    Send one SMS through SMS API PH synchronously.
+    Returns without sending for an invalid number (nothing to retry) and raises on
+    a failed request, so queued deliveries (utils/outbox.py) can retry it.
     """
     if not phone_number or len(phone_number) < 10:
         print(f"[SMS WARNING] Invalid or missing phone number: '{phone_number}'")
@@ -33,24 +34,33 @@ def _send_sms_thread(phone_number: str, message: str):
         "message": message
     }
     
+    response = requests.post(url, json=payload, headers=headers, timeout=10)
+    if response.status_code == 200 or response.status_code == 201:
+        print(f"[SMS SUCCESS] SMS API PH sent to {cleaned_phone}")
+    else:
+        raise RuntimeError(f"Failed to send to {cleaned_phone}. Status: {response.status_code}, Response: {response.text}")
+
+def _send_sms_thread(phone_number: str, message: str):
+    """
+    Internal function to send the SMS using SMS API PH synchronously.
+    Intended to be run in a separate thread so it doesn't block the video stream.
+    """
     try:
-        response = requests.post(url, json=payload, headers=headers, timeout=10)
-        if response.status_code == 200 or response.status_code == 201:
-            print(f"[SMS SUCCESS] SMS API PH sent to {cleaned_phone}")
-        else:
-            print(f"[SMS ERROR] Failed to send to {cleaned_phone}. Status: {response.status_code}, Response: {response.text}")
+        deliver_sms(phone_number, message)
     except Exception as e:
-        print(f"[SMS EXCEPTION] SMS API PH could not send SMS to {cleaned_phone}: {e}")
+        print(f"[SMS EXCEPTION] SMS API PH could not send SMS to {phone_number}: {e}")
+
+def access_sms_message(owner_name: str, plate_number: str, time_str: str, action: str) -> str:
+    action_str = action.lower() + "ed" # entry -> entryed (we'll fix below)
+    if action.lower() == "entry":
+        action_str = "entered"
+    return f"IntelliAccess: Vehicle {plate_number} {action_str} the campus at {time_str}. If not you, remove this vehicle in your Dashboard."
 
 def send_access_sms(phone_number: str, owner_name: str, plate_number: str, time_str: str, action: str):
     """
     Fires off SMS sending in a background thread for Vehicle Entry or Exit.
     """
-    action_str = action.lower() + "ed" # entry -> entryed (we'll fix below)
-    if action.lower() == "entry":
-        action_str = "entered"
-        
-    message = f"IntelliAccess: Vehicle {plate_number} {action_str} the campus at {time_str}. If not you, remove this vehicle in your Dashboard."
+    message = access_sms_message(owner_name, plate_number, time_str, action)
     
     # Start a new thread so the main video stream isn't stalled by network requests
     thread = threading.Thread(target=_send_sms_thread, args=(phone_number, message))
@@ -0,0 +1,290 @@
+"""
+In-process registry of registered vehicles joined with their owners.
+
+Gate decisions only need a vehicle's status and its owner's name, role and phone,
+so the whole projection is kept in memory keyed by normalized plate. A background
+thread keeps it fresh from MongoDB: a change stream when the server supports one
+(replica set / Atlas), otherwise polling on the `updated_at` watermark plus a
+periodic full resync to pick up deletes made by other processes.
+The `vehicles` and `auth` write endpoints invalidate entries directly so the
+worker that handled the write sees it immediately.
+"""
+
+import os
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime
+
+from utils.plates import normalize_plate
+
+REGISTRY_POLL_SECONDS = float(os.getenv("REGISTRY_POLL_SECONDS", "5"))
+REGISTRY_RESYNC_SECONDS = float(os.getenv("REGISTRY_RESYNC_SECONDS", "300"))
+# Negative entries are only needed before the first full load completes
+NEGATIVE_CACHE_SIZE = 1024
+NEGATIVE_TTL_SECONDS = 30
+
+_OWNER_FIELDS = {"name": 1, "role": 1, "phone": 1}
+
+def _owner_projection(user_doc):
+    if not user_doc:
+        return None
+    return {
+        "name": user_doc.get("name", "Unknown"),
+        "role": user_doc.get("role", "GUEST"),
+        "phone": user_doc.get("phone"),
+    }
+
+def _vehicle_projection(vehicle_doc):
+    vehicle = dict(vehicle_doc)
+    vehicle["id"] = str(vehicle.pop("_id"))
+    vehicle.pop("updated_at", None)
+    return vehicle
+
+class VehicleRegistry:
+    def __init__(self):
+        self._entries = {}          # plate_key -> {"vehicle": {...}, "owner_id": str | None}
+        self._owners = {}           # owner_id -> owner projection
+        self._key_by_vehicle = {}   # vehicle_id -> plate_key
+        self._negative = OrderedDict()  # plate_key -> expiry, used until the first load
+        self._lock = threading.Lock()
+        self._loaded = False
+        self._watermark = None
+        self._thread = None
+        self.hits = 0
+        self.misses = 0
+
+    # ---------- Hot path ----------
+
+    def resolve(self, plate_text: str):
+        """
+        Return (vehicle_info, owner_phone) for a detected plate, or (None, None)
+        when it is not registered. vehicle_info is a fresh dict carrying the
+        vehicle fields plus owner_name/owner_role, safe for the caller to mutate.
+        """
+        plate_key = normalize_plate(plate_text)
+        if not plate_key:
+            return None, None
+
+        with self._lock:
+            entry = self._entries.get(plate_key)
+            loaded = self._loaded
+            if entry is None and not loaded:
+                expiry = self._negative.get(plate_key)
+                if expiry and expiry > time.time():
+                    self.hits += 1
+                    return None, None
+            cold = entry is None and not loaded
+            if cold:
+                self.misses += 1
+            else:
+                self.hits += 1
+
+        if cold:
+            # Cold start: fall back to MongoDB and remember the answer
+            entry = self._load_single(plate_key)
+
+        if entry is None:
+            return None, None
+
+        vehicle_info = dict(entry["vehicle"])
+        owner_phone = None
+        with self._lock:
+            owner = self._owners.get(entry["owner_id"]) if entry["owner_id"] else None
+        if owner:
+            vehicle_info["owner_name"] = owner["name"]
+            vehicle_info["owner_role"] = owner["role"]
+            owner_phone = owner["phone"]
+        return vehicle_info, owner_phone
+
+    # ---------- Invalidation (called by write endpoints) ----------
+
+    def invalidate_vehicle(self, vehicle_id: str):
+        """Re-read one vehicle (and its owner) after it was created, updated or deleted."""
+        from bson import ObjectId
+        from mongo_client import vehicles_collection
+
+        try:
+            doc = vehicles_collection.find_one({"_id": ObjectId(vehicle_id)})
+        except Exception as e:
+            print(f"[REGISTRY] Failed to refresh vehicle {vehicle_id}: {e}")
+            return
+        if doc:
+            self._upsert_vehicle(doc)
+            if doc.get("owner_id"):
+                self.invalidate_owner(doc["owner_id"])
+        else:
+            self._remove_vehicle(vehicle_id)
+
+    def invalidate_owner(self, owner_id: str):
+        """Re-read an owner's name/role/phone after an account change."""
+        from bson import ObjectId
+        from mongo_client import users_collection
+
+        try:
+            doc = users_collection.find_one({"_id": ObjectId(owner_id)}, _OWNER_FIELDS)
+        except Exception as e:
+            print(f"[REGISTRY] Failed to refresh owner {owner_id}: {e}")
+            return
+        with self._lock:
+            if doc:
+                self._owners[owner_id] = _owner_projection(doc)
+            else:
+                self._owners.pop(owner_id, None)
+
+    # ---------- Internal state changes ----------
+
+    def _upsert_vehicle(self, doc):
+        vehicle = _vehicle_projection(doc)
+        plate_key = vehicle.get("plate_key") or normalize_plate(vehicle.get("plate_number"))
+        if not plate_key:
+            return
+        with self._lock:
+            old_key = self._key_by_vehicle.get(vehicle["id"])
+            if old_key and old_key != plate_key:
+                self._entries.pop(old_key, None)
+            self._entries[plate_key] = {"vehicle": vehicle, "owner_id": vehicle.get("owner_id")}
+            self._key_by_vehicle[vehicle["id"]] = plate_key
+            self._negative.pop(plate_key, None)
+
+    def _remove_vehicle(self, vehicle_id: str):
+        with self._lock:
+            plate_key = self._key_by_vehicle.pop(vehicle_id, None)
+            if plate_key:
+                self._entries.pop(plate_key, None)
+
+    def _load_single(self, plate_key: str):
+        from mongo_client import vehicles_collection, users_collection
+        from bson import ObjectId
+
+        doc = vehicles_collection.find_one({"plate_key": plate_key})
+        if not doc:
+            with self._lock:
+                self._negative[plate_key] = time.time() + NEGATIVE_TTL_SECONDS
+                self._negative.move_to_end(plate_key)
+                while len(self._negative) > NEGATIVE_CACHE_SIZE:
+                    self._negative.popitem(last=False)
+            return None
+
+        self._upsert_vehicle(doc)
+        owner_id = doc.get("owner_id")
+        if owner_id:
+            try:
+                owner_doc = users_collection.find_one({"_id": ObjectId(owner_id)}, _OWNER_FIELDS)
+                if owner_doc:
+                    with self._lock:
+                        self._owners[owner_id] = _owner_projection(owner_doc)
+            except Exception as e:
+                print(f"[REGISTRY] Failed to load owner {owner_id}: {e}")
+        with self._lock:
+            return self._entries.get(plate_key)
+
+    def full_load(self):
+        """Rebuild the whole registry from MongoDB and swap it in atomically."""
+        from mongo_client import vehicles_collection, users_collection
+
+        started = datetime.utcnow()
+        owners = {str(u["_id"]): _owner_projection(u) for u in users_collection.find({}, _OWNER_FIELDS)}
+        entries = {}
+        key_by_vehicle = {}
+        for doc in vehicles_collection.find({}):
+            vehicle = _vehicle_projection(doc)
+            plate_key = vehicle.get("plate_key") or normalize_plate(vehicle.get("plate_number"))
+            if not plate_key:
+                continue
+            entries[plate_key] = {"vehicle": vehicle, "owner_id": vehicle.get("owner_id")}
+            key_by_vehicle[vehicle["id"]] = plate_key
+
+        with self._lock:
+            self._entries = entries
+            self._owners = owners
+            self._key_by_vehicle = key_by_vehicle
+            self._negative.clear()
+            self._loaded = True
+            self._watermark = started
+        print(f"[REGISTRY] Loaded {len(entries)} vehicles and {len(owners)} owners.")
+
+    # ---------- Background refresh ----------
+
+    def start(self):
+        if self._thread and self._thread.is_alive():
+            return
+        self._thread = threading.Thread(target=self._refresh_loop, daemon=True)
+        self._thread.start()
+
+    def _refresh_loop(self):
+        while True:
+            try:
+                self.full_load()
+                break
+            except Exception as e:
+                print(f"[REGISTRY] Initial load failed, retrying: {e}")
+                time.sleep(REGISTRY_POLL_SECONDS)
+
+        try:
+            self._watch_changes()
+        except Exception as e:
+            print(f"[REGISTRY] Change streams unavailable ({e}), polling every {REGISTRY_POLL_SECONDS}s.")
+        self._poll_changes()
+
+    def _watch_changes(self):
+        from mongo_client import db
+
+        pipeline = [{"$match": {"ns.coll": {"$in": ["vehicles", "users"]}}}]
+        with db.watch(pipeline, full_document="updateLookup") as stream:
+            print("[REGISTRY] Watching vehicle/user change stream.")
+            for change in stream:
+                self._apply_change(change)
+
+    def _apply_change(self, change):
+        collection = change["ns"]["coll"]
+        doc_id = str(change["documentKey"]["_id"])
+        doc = change.get("fullDocument")
+
+        if collection == "vehicles":
+            if change["operationType"] == "delete" or not doc:
+                self._remove_vehicle(doc_id)
+            else:
+                self._upsert_vehicle(doc)
+        else:
+            with self._lock:
+                if change["operationType"] == "delete" or not doc:
+                    self._owners.pop(doc_id, None)
+                else:
+                    self._owners[doc_id] = _owner_projection(doc)
+
+    def _poll_changes(self):
+        from mongo_client import vehicles_collection, users_collection
+
+        last_resync = time.time()
+        while True:
+            time.sleep(REGISTRY_POLL_SECONDS)
+            try:
+                if time.time() - last_resync >= REGISTRY_RESYNC_SECONDS:
+                    self.full_load()
+                    last_resync = time.time()
+                    continue
+
+                polled_at = datetime.utcnow()
+                since = {"updated_at": {"$gte": self._watermark}}
+                for doc in vehicles_collection.find(since):
+                    self._upsert_vehicle(doc)
+                changed_owners = {str(u["_id"]): _owner_projection(u) for u in users_collection.find(since, _OWNER_FIELDS)}
+                with self._lock:
+                    self._owners.update(changed_owners)
+                    self._watermark = polled_at
+            except Exception as e:
+                print(f"[REGISTRY] Poll failed: {e}")
+
+    def stats(self):
+        with self._lock:
+            return {
+                "loaded": self._loaded,
+                "vehicles": len(self._entries),
+                "owners": len(self._owners),
+                "hits": self.hits,
+                "misses": self.misses,
+            }
+
+# Global instance shared by detection, the live stream and the write endpoints
+vehicle_registry = VehicleRegistry()
@@ -0,0 +1,52 @@
+"""
+Inference backends for the YOLO vehicle detector.
+
+The gate boxes are CPU-only, where the stock PyTorch path of ultralytics is the
+slowest option. An exported model can be served instead by setting YOLO_BACKEND:
+
+    pytorch    yolov8n.pt (default)
+    onnx       yolov8n.onnx under ONNX Runtime
+    onnx-int8  yolov8n-int8.onnx, dynamically quantized ONNX (smaller, faster on most CPUs)
+    openvino   yolov8n_openvino_model/ (Intel CPUs)
+
+Exported models are loaded through ultralytics' own runtime wrappers, so callers
+keep getting the same `Results` objects (`r.boxes`, `model.names`) whichever
+backend is active. Create the exports with `python export_model.py`.
+"""
+
+import os
+
+BACKENDS = ("pytorch", "onnx", "onnx-int8", "openvino")
+
+YOLO_BACKEND = os.getenv("YOLO_BACKEND", "pytorch").lower()
+
+def backend_weights(backend: str, base_weights: str) -> str:
+    """Path of the model file/directory `backend` loads for the given .pt weights."""
+    stem, _ = os.path.splitext(base_weights)
+    if backend == "onnx":
+        return f"{stem}.onnx"
+    if backend == "onnx-int8":
+        return f"{stem}-int8.onnx"
+    if backend == "openvino":
+        return f"{stem}_openvino_model"
+    return base_weights
+
+def load_detector(base_weights: str, backend: str = YOLO_BACKEND):
+    """
+    Load the vehicle detector for `backend`. Returns (model, backend_used, weights_path);
+    falls back to PyTorch when the export for the requested backend is missing.
+    """
+    from ultralytics import YOLO
+
+    if backend not in BACKENDS:
+        print(f"[YOLO] Unknown YOLO_BACKEND '{backend}', using pytorch. Choose one of {', '.join(BACKENDS)}.")
+        backend = "pytorch"
+
+    weights = backend_weights(backend, base_weights)
+    if backend != "pytorch" and not os.path.exists(weights):
+        print(f"[YOLO] {weights} not found for backend '{backend}'; run `python export_model.py --backend {backend}`. Using pytorch.")
+        backend, weights = "pytorch", base_weights
+
+    model = YOLO(weights, task="detect")
+    print(f"[YOLO] Loaded {weights} ({backend} backend)")
+    return model, backend, weights
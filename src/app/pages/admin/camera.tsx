@@ -13,6 +13,12 @@ import {
 } from "lucide-react";
 import toast from "react-hot-toast";
 import { apiFetch, API_BASE_URL } from "@/lib/api";
+
+// Grid thumbnails of the live feed poll a small snapshot instead of each holding a full MJPEG stream
+const SNAPSHOT_REFRESH_MS = 5000;
+const thumbnailUrl = (url: string, tick: number) =>
+    url.includes("/live-feed") ? `${url.split("?")[0]}/snapshot?tier=thumb&t=${tick}` : url;
+
 const CameraPage = () => {
     const [selectedCamera, setSelectedCamera] = useState<number>(1);
     const [detectionResult, setDetectionResult] = useState<any>(null);
@@ -49,6 +55,12 @@ const CameraPage = () => {
         fetchCameras();
     }, []);
 
+    const [snapshotTick, setSnapshotTick] = useState(() => Date.now());
+    useEffect(() => {
+        const timer = setInterval(() => setSnapshotTick(Date.now()), SNAPSHOT_REFRESH_MS);
+        return () => clearInterval(timer);
+    }, []);
+
     const handleAddCamera = async () => {
         if (!newCamera.name || !newCamera.location || !newCamera.url) {
             toast.error("Please fill in all fields");
@@ -553,7 +565,7 @@ const CameraPage = () => {
                                     <div className="flex items-center gap-3">
                                         <div className="relative h-16 w-24 overflow-hidden rounded-lg bg-black">
                                             <img
-                                                src={camera.url}
+                                                src={thumbnailUrl(camera.url, snapshotTick)}
                                                 alt={camera.name}
                                                 className={`h-full w-full object-cover ${camera.status === 'Offline' ? 'opacity-20' : 'opacity-80'}`}
                                             />
@@ -12,6 +12,7 @@ interface AccessLog {
   status: string;
   plate_detected: string;
   image_url?: string;
+  thumbnail_url?: string;
   vehicle?: {
     model: string;
     owner?: {
@@ -72,7 +73,8 @@ const LogsPage = () => {
             time_out: "--",
             created_at: log.created_at,
             vehicle: log.vehicle,
-            image_url: log.image_url
+            image_url: log.image_url,
+            thumbnail_url: log.thumbnail_url
           };
         }
       } else if (log.action === 'Exit' || log.action === 'EXIT') {
@@ -91,7 +93,8 @@ const LogsPage = () => {
             time_out: new Date(log.created_at).toLocaleTimeString([], { hour: '2-digit', minute: '2-digit' }),
             created_at: log.created_at,
             vehicle: log.vehicle,
-            image_url: log.image_url
+            image_url: log.image_url,
+            thumbnail_url: log.thumbnail_url
           });
         }
       }
@@ -274,7 +277,7 @@ const LogsPage = () => {
                         <div className="flex items-center gap-3">
                           {session.image_url && (
                             <div className="h-10 w-16 overflow-hidden rounded-md bg-black border border-white/10 shrink-0 relative group">
-                              <img src={`${API_BASE_URL}${session.image_url}`} alt="Plate" className="h-full w-full object-cover" />
+                              <img src={`${API_BASE_URL}${session.thumbnail_url || session.image_url}`} alt="Plate" loading="lazy" className="h-full w-full object-cover" />
                               <div className="absolute inset-0 bg-black/50 opacity-0 group-hover:opacity-100 flex items-center justify-center transition-opacity cursor-pointer">
                                 <Eye className="h-4 w-4 text-white" />
                               </div>
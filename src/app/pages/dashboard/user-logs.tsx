@@ -13,6 +13,7 @@ interface AccessLog {
     status: string;
     plate_detected: string;
     image_url?: string;
+    thumbnail_url?: string;
 }
 
 interface UserLogsPageProps {
@@ -67,7 +68,8 @@ const UserLogsPage: React.FC<UserLogsPageProps> = ({ userType = "user" }) => {
                         time_in: new Date(log.created_at).toLocaleTimeString([], { hour: '2-digit', minute: '2-digit' }),
                         time_out: "--",
                         created_at: log.created_at,
-                        image_url: log.image_url
+                        image_url: log.image_url,
+                        thumbnail_url: log.thumbnail_url
                     };
                 }
             } else if (log.action === 'Exit' || log.action === 'EXIT') {
@@ -85,7 +87,8 @@ const UserLogsPage: React.FC<UserLogsPageProps> = ({ userType = "user" }) => {
                         time_in: "--",
                         time_out: new Date(log.created_at).toLocaleTimeString([], { hour: '2-digit', minute: '2-digit' }),
                         created_at: log.created_at,
-                        image_url: log.image_url
+                        image_url: log.image_url,
+                        thumbnail_url: log.thumbnail_url
                     });
                 }
             }
@@ -182,7 +185,7 @@ const UserLogsPage: React.FC<UserLogsPageProps> = ({ userType = "user" }) => {
                                                     <div className="flex items-center gap-3">
                                                         {session.image_url && (
                                                             <div className="h-10 w-16 overflow-hidden rounded-md bg-black border border-white/10 shrink-0 relative group/img">
-                                                                <img src={`${API_BASE_URL}${session.image_url}`} alt="Plate" className="h-full w-full object-cover" />
+                                                                <img src={`${API_BASE_URL}${session.thumbnail_url || session.image_url}`} alt="Plate" loading="lazy" className="h-full w-full object-cover" />
                                                                 <div
                                                                     className="absolute inset-0 bg-black/50 opacity-0 group-hover/img:opacity-100 flex items-center justify-center transition-opacity cursor-pointer"
                                                                     onClick={() => setSelectedImage(`${API_BASE_URL}${session.image_url}`)}